@@ -5,12 +5,9 @@ from __future__ import annotations
 import asyncio
 from datetime import timedelta
 import logging
-import threading
-from typing import Optional
+import time
 
-from pymodbus.client import ModbusTcpClient
-from pymodbus.exceptions import ConnectionException
-import voluptuous as vol
+from pymodbus.exceptions import ModbusException, ModbusIOException
 
 from homeassistant.helpers.entity import Entity
 from homeassistant.config_entries import ConfigEntry
@@ -22,14 +19,75 @@ from homeassistant.const import (
     Platform,
 )
 from homeassistant.core import HomeAssistant, callback
-import homeassistant.helpers.config_validation as cv
-from homeassistant.helpers.event import async_track_time_interval
-
-
-from .const import DEFAULT_NAME, DEFAULT_SCAN_INTERVAL, DOMAIN
+from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.update_coordinator import (
+    TimestampDataUpdateCoordinator,
+    UpdateFailed,
+)
+import homeassistant.util.dt as dt_util
+
+
+from .const import (
+    CONF_HISTORY_HOURS,
+    CONF_MAX_READ_GAP,
+    CONF_REQUEST_DELAY,
+    CONF_RETRIES,
+    CONF_SCAN_INTERVAL_NORMAL,
+    CONF_SCAN_INTERVAL_SLOW,
+    CONF_TIMEOUT,
+    CONF_UNIT_ID,
+    DEFAULT_HISTORY_HOURS,
+    DEFAULT_MAX_READ_GAP,
+    DEFAULT_REQUEST_DELAY,
+    DEFAULT_RETRIES,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL_NORMAL,
+    DEFAULT_SCAN_INTERVAL_SLOW,
+    DEFAULT_TIMEOUT,
+    DEFAULT_UNIT_ID,
+    DOMAIN,
+    EVENT_DETECTION,
+    READ_BACK_COOLDOWN_SECONDS,
+    WRITE_DEBOUNCE_SECONDS,
+)
+from .registers import (
+    BETRIEBSART,
+    POLL_FAST,
+    POLL_NORMAL,
+    POLL_SLOW,
+    REGISTER_HOLDING,
+    REGISTERS,
+    RegisterDecoder,
+    Snapshot,
+    plan_read_blocks,
+    plan_write_blocks,
+)
+from .analytics import ANALYTICS_SOURCES, PerformanceAnalytics
+from .circuit_breaker import CircuitBreaker
+from .counters import CounterGuards
+from .detector import DETECTION_SOURCES, FaultDetector
+from .history import RegisterHistory
+from .scheduler import PollScheduler
+from .services import async_setup_services
+from .stats import (
+    KIND_READ_HOLDING,
+    KIND_READ_INPUT,
+    KIND_WRITE,
+    READ_REQUEST_BYTES,
+    READ_RESPONSE_BYTES,
+    WRITE_MULTIPLE_REQUEST_BYTES,
+    WRITE_MULTIPLE_RESPONSE_BYTES,
+    WRITE_SINGLE_BYTES,
+    TransactionStats,
+)
+from .transport import async_get_transport, async_release_transport
 
 _LOGGER = logging.getLogger(__name__)
 
+MODBUS_ERRORS = (ModbusException, asyncio.TimeoutError, OSError)
+TIMEOUT_ERRORS = (ModbusIOException, asyncio.TimeoutError)
+
 # PLATFORMS = [Platform.SENSOR, Platform.BINARY_SENSOR, Platform.SELECT]
 PLATFORMS = [Platform.SELECT, Platform.SENSOR, Platform.BINARY_SENSOR, Platform.CLIMATE]
 
@@ -37,6 +95,7 @@ PLATFORMS = [Platform.SELECT, Platform.SENSOR, Platform.BINARY_SENSOR, Platform.
 async def async_setup(hass, config):
     """Set up the HaHeliotherm modbus component."""
     hass.data[DOMAIN] = {}
+    async_setup_services(hass)
     return True
 
 
@@ -45,38 +104,84 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     host = entry.data[CONF_HOST]
     name = entry.data[CONF_NAME]
     port = entry.data[CONF_PORT]
-    scan_interval = DEFAULT_SCAN_INTERVAL
+    unit_id = entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID)
 
     _LOGGER.debug("Setup %s.%s", DOMAIN, name)
 
-    hub = HaHeliothermModbusHub(hass, name, host, port, scan_interval)
+    hub = HaHeliothermModbusHub(
+        hass, name, host, port, unit_id=unit_id, **get_hub_options(entry)
+    )
+    # Read every register once so the entities start with a state.
+    try:
+        await hub.async_config_entry_first_refresh()
+    except ConfigEntryNotReady:
+        await hub.async_close()
+        raise
+
     # """Register the hub."""
     hass.data[DOMAIN][name] = {"hub": hub}
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
 
     return True
 
 
+def get_hub_options(entry: ConfigEntry):
+    """Return the hub settings stored in the options of a config entry."""
+    options = entry.options
+    return {
+        "scan_interval": options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+        "max_read_gap": options.get(CONF_MAX_READ_GAP, DEFAULT_MAX_READ_GAP),
+        "poll_intervals": {
+            POLL_NORMAL: options.get(
+                CONF_SCAN_INTERVAL_NORMAL, DEFAULT_SCAN_INTERVAL_NORMAL
+            ),
+            POLL_SLOW: options.get(CONF_SCAN_INTERVAL_SLOW, DEFAULT_SCAN_INTERVAL_SLOW),
+        },
+        "timeout": options.get(CONF_TIMEOUT, DEFAULT_TIMEOUT),
+        "retries": options.get(CONF_RETRIES, DEFAULT_RETRIES),
+        "request_delay": options.get(CONF_REQUEST_DELAY, DEFAULT_REQUEST_DELAY),
+        "history_hours": options.get(CONF_HISTORY_HOURS, DEFAULT_HISTORY_HOURS),
+    }
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry):
+    """Apply changed options and connection settings to the running hub.
+
+    Entities are kept, a reload would drop their states and recreate them.
+    """
+    hub = hass.data[DOMAIN][entry.data[CONF_NAME]]["hub"]
+    hub.async_configure(**get_hub_options(entry))
+    connection = (
+        entry.data[CONF_HOST],
+        int(entry.data[CONF_PORT]),
+        entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID),
+    )
+    if connection != hub.connection:
+        hub.async_set_connection(*connection)
+        await hub.async_request_refresh()
+
+
 async def async_unload_entry(hass, entry):
     """Unload HaHeliotherm mobus entry."""
-    unload_ok = all(
-        await asyncio.gather(
-            *[
-                hass.config_entries.async_forward_entry_unload(entry, component)
-                for component in PLATFORMS
-            ]
-        )
-    )
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if not unload_ok:
         return False
 
-    hass.data[DOMAIN].pop(entry.data["name"])
+    hub = hass.data[DOMAIN].pop(entry.data["name"])["hub"]
+    await hub.async_close()
     return True
 
 
-class HaHeliothermModbusHub:
-    """Thread safe wrapper class for pymodbus."""
+class HaHeliothermModbusHub(TimestampDataUpdateCoordinator[Snapshot]):
+    """Coordinator polling a Heliotherm heat pump over Modbus TCP.
+
+    The coordinator ticks every fast scan interval, the poll scheduler
+    decides which register tiers are read on a tick. Entities subscribe
+    with their data key as listener context, only the registers behind
+    subscribed keys are read and only listeners of changed keys are called.
+    """
 
     def __init__(
         self,
@@ -85,130 +190,491 @@ class HaHeliothermModbusHub:
         host,
         port,
         scan_interval,
+        max_read_gap=DEFAULT_MAX_READ_GAP,
+        poll_intervals=None,
+        unit_id=DEFAULT_UNIT_ID,
+        timeout=DEFAULT_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        request_delay=DEFAULT_REQUEST_DELAY,
+        history_hours=DEFAULT_HISTORY_HOURS,
     ):
         """Initialize the Modbus hub."""
-        self._hass = hass
-        self._client = ModbusTcpClient(host=host, port=port, timeout=3, retries=3)
-        self._lock = threading.Lock()
-        self._name = name
-        self._scan_interval = timedelta(seconds=scan_interval)
-        self._unsub_interval_method = None
-        self._sensors = []
-        self.data = {}
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=name,
+            update_interval=timedelta(seconds=scan_interval),
+            always_update=False,
+        )
+        self._transport_settings = (timeout, retries, request_delay)
+        self._transport = async_get_transport(hass, host, int(port))
+        self._transport.async_configure(self, *self._transport_settings)
+        self.connection = (host, int(port), unit_id)
+        self._unit_id = unit_id
+        self._key_listeners = {}
+        self._changed_keys = None
+        self._notified_success = True
+        self._registers_by_key = {}
+        self._registers_by_address = {}
+        self._tier_keys = {tier: set() for tier in (POLL_FAST, POLL_NORMAL, POLL_SLOW)}
+        for register in REGISTERS:
+            self._registers_by_key.setdefault(register.key, []).append(register)
+            for address in range(register.address, register.address + register.count):
+                self._registers_by_address.setdefault(
+                    (register.register_type, address), []
+                ).append(register)
+            self._tier_keys[register.poll_tier].add(register.key)
+        # Derived values are read through the registers they are computed from.
+        for key, sources in {**ANALYTICS_SOURCES, **DETECTION_SOURCES}.items():
+            self._registers_by_key[key] = [
+                register
+                for source in sources
+                for register in self._registers_by_key[source]
+            ]
+        self._max_read_gap = max_read_gap
+        self._read_plans = {}
+        self._plan_slots = {}
+        intervals = self._get_poll_intervals(scan_interval, poll_intervals)
+        self._scheduler = PollScheduler(
+            intervals, tick=scan_interval, backoff_tiers=(POLL_SLOW,)
+        )
+        self._decoder = RegisterDecoder(REGISTERS)
+        self.snapshot_layout = self._decoder.snapshot_layout
+        self.history = RegisterHistory(
+            self.snapshot_layout.fields, REGISTERS, history_hours * 3600, intervals
+        )
+        self._counters = CounterGuards(self.snapshot_layout, REGISTERS)
+        self.analytics = PerformanceAnalytics(self.snapshot_layout)
+        self.detector = FaultDetector(self.snapshot_layout)
+        self._pending_writes = {}
+        self._write_task = None
+        self._read_back_addresses = set()
+        self._read_back_debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=READ_BACK_COOLDOWN_SECONDS,
+            immediate=False,
+            function=self._async_read_back_writes,
+        )
+        self._breaker = CircuitBreaker()
+        self.stats = TransactionStats()
+
+    @staticmethod
+    def _get_poll_intervals(scan_interval, poll_intervals):
+        """Return the poll interval of every tier."""
+        return {
+            POLL_FAST: scan_interval,
+            POLL_NORMAL: DEFAULT_SCAN_INTERVAL_NORMAL,
+            POLL_SLOW: DEFAULT_SCAN_INTERVAL_SLOW,
+            **(poll_intervals or {}),
+        }
 
     @callback
-    def async_add_haheliotherm_modbus_sensor(self, update_callback):
-        """Listen for data updates."""
-        # This is the first sensor, set up interval.
-        if not self._sensors:
-            self.connect()
-            self._unsub_interval_method = async_track_time_interval(
-                self._hass, self.async_refresh_modbus_data, self._scan_interval
-            )
-
-        self._sensors.append(update_callback)
+    def async_configure(
+        self,
+        scan_interval,
+        max_read_gap=DEFAULT_MAX_READ_GAP,
+        poll_intervals=None,
+        timeout=DEFAULT_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        request_delay=DEFAULT_REQUEST_DELAY,
+        history_hours=DEFAULT_HISTORY_HOURS,
+    ):
+        """Apply changed polling and transport settings while running."""
+        self._transport_settings = (timeout, retries, request_delay)
+        self._transport.async_configure(self, *self._transport_settings)
+        if max_read_gap != self._max_read_gap:
+            self._max_read_gap = max_read_gap
+            self._read_plans.clear()
+            self._plan_slots.clear()
+        intervals = self._get_poll_intervals(scan_interval, poll_intervals)
+        self._scheduler.reschedule(intervals, scan_interval)
+        self.history.configure(history_hours * 3600, intervals)
+        update_interval = timedelta(seconds=scan_interval)
+        if update_interval != self.update_interval:
+            self.update_interval = update_interval
+            if self._listeners:
+                self._schedule_refresh()
+        _LOGGER.debug("Applied options to %s", self.name)
 
     @callback
-    def async_remove_haheliotherm_modbus_sensor(self, update_callback):
-        """Remove data update."""
-        self._sensors.remove(update_callback)
-
-        if not self._sensors:
-            # """stop the interval timer upon removal of last sensor"""
-            self._unsub_interval_method()
-            self._unsub_interval_method = None
-            self.close()
-
-    async def async_refresh_modbus_data(self, _now: Optional[int] = None) -> None:
-        """Time to update."""
-        if not self._sensors:
-            return
+    def async_set_connection(self, host, port, unit_id):
+        """Move the hub to another gateway or unit id while running.
+
+        The current snapshot is kept until the first poll of the new
+        connection, every register tier is read on the next tick.
+        """
+        if (host, port) != self.connection[:2]:
+            previous = self._transport
+            self._transport = async_get_transport(self.hass, host, port)
+            self._transport.async_configure(self, *self._transport_settings)
+            async_release_transport(self.hass, previous, self)
+        self._unit_id = unit_id
+        self.connection = (host, port, unit_id)
+        self._breaker = CircuitBreaker()
+        self._scheduler.reset()
+        _LOGGER.debug("Connection of %s changed to %s", self.name, self.connection)
 
-        update_result = self.read_modbus_registers()
+    @callback
+    def async_add_listener(self, update_callback, context=None):
+        """Listen for data updates of the data key given as context."""
+        remove_listener = super().async_add_listener(update_callback, context)
+        callbacks = self._key_listeners.get(context)
+        if callbacks is None:
+            callbacks = self._key_listeners[context] = {}
+            self._read_plans.clear()
+        callbacks[update_callback] = None
+
+        @callback
+        def remove_key_listener():
+            remove_listener()
+            callbacks.pop(update_callback, None)
+            if not callbacks and self._key_listeners.get(context) is callbacks:
+                del self._key_listeners[context]
+                self._read_plans.clear()
+
+        return remove_key_listener
 
-        if update_result:
-            for update_callback in self._sensors:
+    @callback
+    def async_update_listeners(self) -> None:
+        """Call the listeners of changed data keys.
+
+        Every listener is called when the availability changed or when the
+        changed keys are unknown.
+        """
+        changed_keys, self._changed_keys = self._changed_keys, None
+        if changed_keys is None or self._notified_success != self.last_update_success:
+            self._notified_success = self.last_update_success
+            super().async_update_listeners()
+            return
+        for key in changed_keys:
+            for update_callback in list(self._key_listeners.get(key, ())):
                 update_callback()
+        for update_callback in list(self._key_listeners.get(None, ())):
+            update_callback()
+
+    async def _async_update_data(self) -> Snapshot:
+        """Read the register tiers that are due on this tick."""
+        self._changed_keys = None
+        tiers = self._scheduler.due_tiers()
+        if not tiers and self.data is not None:
+            self._changed_keys = set()
+            return self.data
+
+        result = await self._async_read_plan(self.get_read_plan(tiers))
+        if result is None:
+            # Failed below the breaker threshold, the tiers stay due.
+            self._changed_keys = set()
+            return self.data
+        snapshot, changed_keys = result
+        for tier in tiers:
+            self._scheduler.record(
+                tier, not changed_keys.isdisjoint(self._tier_keys[tier])
+            )
+        self._changed_keys = changed_keys
+        return snapshot
+
+    async def async_refresh_modbus_registers(
+        self, register_type, addresses
+    ) -> set[str] | None:
+        """Re-read single registers and update only the keys decoded from them.
+
+        Used to read back written holding registers without a full refresh,
+        the registers are merged into as few requests as the planner allows.
+        Returns None if the registers could not be read.
+        """
+        read_plan = plan_read_blocks(
+            (
+                register
+                for address in addresses
+                for register in self._registers_by_address.get(
+                    (register_type, address), ()
+                )
+            ),
+            self._max_read_gap,
+        )
+        if not read_plan:
+            return set()
+        try:
+            result = await self._async_read_plan(read_plan)
+        except UpdateFailed as err:
+            _LOGGER.debug("Reading back registers of %s failed: %s", self.name, err)
+            return None
+        if result is None:
+            return None
+        snapshot, changed_keys = result
+        self._changed_keys = changed_keys
+        self.async_set_updated_data(snapshot)
+        return changed_keys
+
+    async def _async_read_plan(self, read_plan):
+        """Read the blocks of a read plan into a new snapshot.
+
+        Returns the new snapshot and the changed keys, or None for a failure the
+        circuit breaker still tolerates. Raises UpdateFailed otherwise.
+        """
+        if not self._breaker.allow_request(time.monotonic()):
+            raise UpdateFailed(
+                f"{self.name} is not reachable, retrying in "
+                f"{self._breaker.retry_delay:.0f} s"
+            )
 
-    @property
-    def name(self):
-        """Return the name of this hub."""
-        return self._name
-
-    def close(self):
-        """Disconnect client."""
-        with self._lock:
-            self._client.close()
+        decoded = list((self.data or self._decoder.empty_snapshot()).values)
+        now = time.time()
+        try:
+            await self.async_read_modbus_registers(read_plan, decoded, now)
+        except MODBUS_ERRORS as err:
+            self._breaker.record_failure(time.monotonic())
+            if self._breaker.available and self.data is not None:
+                _LOGGER.debug("Modbus request to %s failed: %s", self.name, err)
+                return None
+            if self._breaker.available:
+                raise UpdateFailed(
+                    f"Modbus request to {self.name} failed: {err}"
+                ) from err
+            raise UpdateFailed(
+                f"Modbus requests to {self.name} failed {self._breaker.failures} "
+                f"times ({err}), retrying in {self._breaker.retry_delay:.0f} s"
+            ) from err
+        self._breaker.record_success()
+        plan_slots = self._get_plan_slots(read_plan)
+        self._counters.process(now, decoded, plan_slots)
+        self.history.record(now, decoded, plan_slots)
+
+        # Another read may have published a snapshot meanwhile, only the
+        # slots of this plan are taken over into the current snapshot.
+        previous = self.data
+        values = list((previous or self._decoder.empty_snapshot()).values)
+        keys = self.snapshot_layout.keys
+        changed_keys = set()
+        for slot in plan_slots:
+            if previous is None or previous[slot] != decoded[slot]:
+                values[slot] = decoded[slot]
+                changed_keys.add(keys[slot])
+        changed_keys |= self.analytics.update(
+            now, dt_util.now().date(), values, plan_slots
+        )
+        detected_keys, events = self.detector.update(now, values, plan_slots)
+        changed_keys |= detected_keys
+        for event in events:
+            _LOGGER.info("%s detected on %s: %s", event["type"], self.name, event)
+            self.hass.bus.async_fire(EVENT_DETECTION, {CONF_NAME: self.name, **event})
+        return Snapshot(self.snapshot_layout, values), changed_keys
+
+    def get_read_plan(self, tiers):
+        """Return the read requests needed by the subscribed entities.
+
+        Without subscribed entities, e.g. on the first refresh, every
+        register of the tiers is read.
+        """
+        tiers = frozenset(tiers)
+        read_plan = self._read_plans.get(tiers)
+        if read_plan is None:
+            read_plan = plan_read_blocks(
+                (
+                    register
+                    for key in (self._key_listeners or self._registers_by_key)
+                    for register in self._registers_by_key.get(key, ())
+                    if register.poll_tier in tiers
+                ),
+                self._max_read_gap,
+            )
+            self._read_plans[tiers] = read_plan
+            _LOGGER.debug(
+                "Read plan for %s %s: %s", self.name, sorted(tiers), read_plan
+            )
+        return read_plan
+
+    def _get_plan_slots(self, read_plan):
+        """Return the snapshot slots decoded from the blocks of a read plan."""
+        slots = self._plan_slots.get(read_plan)
+        if slots is None:
+            slots = self._plan_slots[read_plan] = frozenset(
+                slot
+                for block in read_plan
+                for slot in self._decoder.get_layout(*block).slots
+            )
+        return slots
+
+    def get_diagnostics(self):
+        """Return the connection state and statistics for diagnostics."""
+        return {
+            "unit_id": self._unit_id,
+            "last_update_success": self.last_update_success,
+            "last_update_success_time": self.last_update_success_time,
+            "update_interval": self.update_interval,
+            "circuit_breaker": {
+                "state": self._breaker.state,
+                "failures": self._breaker.failures,
+                "retry_delay": self._breaker.retry_delay,
+            },
+            "subscribed_keys": sorted(key for key in self._key_listeners if key),
+            "read_plans": {
+                ",".join(sorted(tiers)): read_plan
+                for tiers, read_plan in self._read_plans.items()
+            },
+            "statistics": self.stats.as_dict(),
+            "rejected_readings": self._decoder.rejected(),
+            "rejected_counter_readings": self._counters.rejected(),
+            "data": self.data.as_dict() if self.data is not None else None,
+        }
 
-    def connect(self):
-        """Connect client."""
-        with self._lock:
-            self._client.connect()
+    async def async_close(self):
+        """Stop polling and release the shared gateway connection."""
+        await self.async_shutdown()
+        self._read_back_debouncer.async_shutdown()
+        if self._transport is not None:
+            async_release_transport(self.hass, self._transport, self)
+            self._transport = None
+
+    def _transaction_recorder(self, kind, address, count, bytes_sent, bytes_received):
+        """Return a callback counting a transaction of a block in the statistics."""
+        block = (kind, address, count)
+        retries = self._transport.retries
+
+        def record(duration, response, err):
+            if err is not None:
+                timeout = isinstance(err, TIMEOUT_ERRORS)
+                self.stats.record(
+                    block,
+                    duration,
+                    bytes_sent,
+                    0,
+                    retries=retries if timeout else 0,
+                    error=True,
+                    timeout=timeout,
+                )
+                return
+            self.stats.record(
+                block,
+                duration,
+                bytes_sent,
+                bytes_received,
+                retries=getattr(response, "retries", 0),
+            )
+            if response.isError():
+                self.stats.record_exception_response()
+
+        return record
+
+    async def async_read_input_registers(self, slave, address, count):
+        """Read input registers."""
+        return await self._transport.async_execute(
+            self,
+            lambda client: client.read_input_registers(
+                address, count=count, device_id=slave
+            ),
+            record=self._transaction_recorder(
+                KIND_READ_INPUT,
+                address,
+                count,
+                READ_REQUEST_BYTES,
+                READ_RESPONSE_BYTES + 2 * count,
+            ),
+        )
 
-    def read_input_registers(self, slave, address, count):
+    async def async_read_holding_registers(self, slave, address, count):
         """Read holding registers."""
-        with self._lock:
-            return self._client.read_input_registers(address, count=count, device_id=slave)
-
-    def getsignednumber(self, number, bitlength=16):
-        mask = (2**bitlength) - 1
-        if number & (1 << (bitlength - 1)):
-            return number | ~mask
-        else:
-            return number & mask
-
-    def checkval(self, value, scale, bitlength=16):
-        """Check value for missing item"""
-        if value is None:
-            return None
-        value = self.getsignednumber(value, bitlength)
-        value = round(value * scale, 1)
-        if value == -50.0:
-            value = None
-        return value
-
-    def getbetriebsart(self, bietriebsart_nr: int):
-        return (
-            "Aus"
-            if bietriebsart_nr == 0
-            else "Auto"
-            if bietriebsart_nr == 1
-            else "Kühlen"
-            if bietriebsart_nr == 2
-            else "Sommer"
-            if bietriebsart_nr == 3
-            else "Dauerbetrieb"
-            if bietriebsart_nr == 4
-            else "Absenken"
-            if bietriebsart_nr == 5
-            else "Urlaub"
-            if bietriebsart_nr == 6
-            else "Party"
-            if bietriebsart_nr == 7
-            else None
+        return await self._transport.async_execute(
+            self,
+            lambda client: client.read_holding_registers(
+                address, count=count, device_id=slave
+            ),
+            record=self._transaction_recorder(
+                KIND_READ_HOLDING,
+                address,
+                count,
+                READ_REQUEST_BYTES,
+                READ_RESPONSE_BYTES + 2 * count,
+            ),
+        )
+
+    async def async_write_register(self, slave, address, value):
+        """Write a single holding register."""
+        return await self._transport.async_execute(
+            self,
+            lambda client: client.write_register(
+                address=address, value=value, device_id=slave
+            ),
+            priority=True,
+            record=self._transaction_recorder(
+                KIND_WRITE, address, 1, WRITE_SINGLE_BYTES, WRITE_SINGLE_BYTES
+            ),
         )
 
-    def getbetriebsartnr(self, bietriebsart_str: str):
-        return (
-            0
-            if bietriebsart_str == "Aus"
-            else 1
-            if bietriebsart_str == "Auto"
-            else 2
-            if bietriebsart_str == "Kühlen"
-            else 3
-            if bietriebsart_str == "Sommer"
-            else 4
-            if bietriebsart_str == "Dauerbetrieb"
-            else 5
-            if bietriebsart_str == "Absenken"
-            else 6
-            if bietriebsart_str == "Urlaub"
-            else 7
-            if bietriebsart_str == "Party"
-            else None
+    async def async_write_registers(self, slave, address, values):
+        """Write consecutive holding registers in a single request."""
+        return await self._transport.async_execute(
+            self,
+            lambda client: client.write_registers(
+                address=address, values=values, device_id=slave
+            ),
+            priority=True,
+            record=self._transaction_recorder(
+                KIND_WRITE,
+                address,
+                len(values),
+                WRITE_MULTIPLE_REQUEST_BYTES + 2 * len(values),
+                WRITE_MULTIPLE_RESPONSE_BYTES,
+            ),
         )
 
+    async def async_queue_writes(self, values):
+        """Queue holding register writes and wait until they are flushed.
+
+        Writes arriving within WRITE_DEBOUNCE_SECONDS are merged, the last
+        value per register wins and consecutive registers are sent as one
+        write multiple registers request.
+        """
+        self._pending_writes.update(values)
+        if self._write_task is None:
+            self._write_task = self.hass.async_create_task(
+                self._async_flush_writes()
+            )
+        await asyncio.shield(self._write_task)
+
+    async def _async_flush_writes(self):
+        """Send the queued writes and schedule the read back."""
+        await asyncio.sleep(WRITE_DEBOUNCE_SECONDS)
+        pending_writes, self._pending_writes = self._pending_writes, {}
+        self._write_task = None
+
+        if not self._breaker.allow_request(time.monotonic()):
+            raise HomeAssistantError(f"{self.name} is not reachable")
+
+        rejected = []
+        try:
+            for address, values in plan_write_blocks(pending_writes):
+                if len(values) == 1:
+                    response = await self.async_write_register(
+                        slave=self._unit_id, address=address, value=values[0]
+                    )
+                else:
+                    response = await self.async_write_registers(
+                        slave=self._unit_id, address=address, values=values
+                    )
+                if response.isError():
+                    # The device answered, e.g. refusing an out of range value,
+                    # this says nothing about the connection.
+                    rejected.append(f"register {address}: {response}")
+        except MODBUS_ERRORS as err:
+            self._breaker.record_failure(time.monotonic())
+            raise HomeAssistantError(f"Writing to {self.name} failed: {err}") from err
+        self._breaker.record_success()
+
+        self._read_back_addresses.update(pending_writes)
+        await self._read_back_debouncer.async_call()
+        if rejected:
+            raise HomeAssistantError(
+                f"{self.name} rejected writing {', '.join(rejected)}"
+            )
+
+    async def _async_read_back_writes(self):
+        """Read back the registers written since the last read back."""
+        while self._read_back_addresses:
+            addresses, self._read_back_addresses = self._read_back_addresses, set()
+            await self.async_refresh_modbus_registers(REGISTER_HOLDING, addresses)
+
     async def setter_function_callback(self, entity: Entity, option):
         if entity.entity_description.key == "select_betriebsart":
             await self.set_betriebsart(option)
@@ -239,48 +705,32 @@ class HaHeliothermModbusHub:
 #---------------------eingefügt-------------------------------------------------
 
     async def set_betriebsart(self, betriebsart: str):
-        betriebsart_nr = self.getbetriebsartnr(betriebsart)
-        if betriebsart_nr is None:
-            return
-        self._client.write_register(address=100, value=betriebsart_nr, device_id=1)
-        await self.async_refresh_modbus_data()
+        await self.async_queue_writes({100: BETRIEBSART.encode(betriebsart)})
 
     async def set_mkr1_betriebsart(self, betriebsart: str):
-        betriebsart_nr = self.getbetriebsartnr(betriebsart)
-        if betriebsart_nr is None:
-            return
-        self._client.write_register(address=107, value=betriebsart_nr, device_id=1)
-        await self.async_refresh_modbus_data()
+        await self.async_queue_writes({107: BETRIEBSART.encode(betriebsart)})
 
     async def set_mkr2_betriebsart(self, betriebsart: str):
-        betriebsart_nr = self.getbetriebsartnr(betriebsart)
-        if betriebsart_nr is None:
-            return
-        self._client.write_register(address=112, value=betriebsart_nr, device_id=1)
-        await self.async_refresh_modbus_data()
+        await self.async_queue_writes({112: BETRIEBSART.encode(betriebsart)})
 
     async def set_raumtemperatur(self, temperature: float):
         if temperature is None:
             return
         temp_int = int(temperature * 10)
-        self._client.write_register(address=101, value=temp_int, device_id=1)
-        await self.async_refresh_modbus_data()
+        await self.async_queue_writes({101: temp_int})
 
     async def set_rltkuehlen(self, temperature: float):
         if temperature is None:
             return
         temp_int = int(temperature * 10)
-        self._client.write_register(address=104, value=temp_int, device_id=1)
-        await self.async_refresh_modbus_data()
+        await self.async_queue_writes({104: temp_int})
 
     async def set_ww_bereitung(self, temp_min: float, temp_max: float):
         if temp_min is None or temp_max is None:
             return
         temp_max_int = int(temp_max * 10)
         temp_min_int = int(temp_min * 10)
-        self._client.write_register(address=105, value=temp_max_int, device_id=1)
-        self._client.write_register(address=106, value=temp_min_int, device_id=1)
-        await self.async_refresh_modbus_data()
+        await self.async_queue_writes({105: temp_max_int, 106: temp_min_int})
 
 #---------------------eingefügt-------------------------------------------------
     async def set_rl_soll(self, temperature: float):
@@ -288,211 +738,34 @@ class HaHeliothermModbusHub:
             return
         temp_int = int(temperature * 10)
         temp_activate_rl_soll = 1
-        self._client.write_register(address=102, value=temp_int, device_id=1)
-        self._client.write_register(address=103, value=temp_activate_rl_soll, device_id=1)
-        await self.async_refresh_modbus_data()
-#---------------------eingefügt-------------------------------------------------
-
-    def read_modbus_registers(self):
-        """Read from modbus registers"""
-        modbusdata = self.read_input_registers(slave=1, address=10, count=32)
-        modbusdata2 = self.read_input_registers(slave=1, address=60, count=16)
-        modbusdata3 = self._client.read_holding_registers(
-            address=100, count=27, device_id=1
-        )
-
-        # if modbusdata.isError():
-        #    return False
-
-        temp_aussen = modbusdata.registers[0]
-        self.data["temp_aussen"] = self.checkval(temp_aussen, 0.1)
-
-        temp_brauchwasser = modbusdata.registers[1]
-        self.data["temp_brauchwasser"] = self.checkval(temp_brauchwasser, 0.1)
-
-        temp_vorlauf = modbusdata.registers[2]
-        self.data["temp_vorlauf"] = self.checkval(temp_vorlauf, 0.1)
-
-        temp_ruecklauf = modbusdata.registers[3]
-        self.data["temp_ruecklauf"] = self.checkval(temp_ruecklauf, 0.1)
-
-        temp_pufferspeicher = modbusdata.registers[4]
-        self.data["temp_pufferspeicher"] = self.checkval(temp_pufferspeicher, 0.1)
-
-        temp_eq_eintritt = modbusdata.registers[5]
-        self.data["temp_eq_eintritt"] = self.checkval(temp_eq_eintritt, 0.1)
-
-        temp_eq_austritt = modbusdata.registers[6]
-        self.data["temp_eq_austritt"] = self.checkval(temp_eq_austritt, 0.1)
-
-        temp_sauggas = modbusdata.registers[7]
-        self.data["temp_sauggas"] = self.checkval(temp_sauggas, 0.1)
-
-        temp_verdampfung = modbusdata.registers[8]
-        self.data["temp_verdampfung"] = self.checkval(temp_verdampfung, 0.1)
-
-        temp_kodensation = modbusdata.registers[9]
-        self.data["temp_kodensation"] = self.checkval(temp_kodensation, 0.1)
-
-        temp_heissgas = modbusdata.registers[10]
-        self.data["temp_heissgas"] = self.checkval(temp_heissgas, 0.1)
-
-        bar_niederdruck = modbusdata.registers[11]
-        self.data["bar_niederdruck"] = self.checkval(bar_niederdruck, 0.1)
-
-        bar_hochdruck = modbusdata.registers[12]
-        self.data["bar_hochdruck"] = self.checkval(bar_hochdruck, 0.1)
-
-        on_off_heizkreispumpe = modbusdata.registers[13]
-        self.data["on_off_heizkreispumpe"] = (
-            "off" if (on_off_heizkreispumpe == 0) else "on"
-        )
-
-        on_off_pufferladepumpe = modbusdata.registers[14]
-        self.data["on_off_pufferladepumpe"] = (
-            "off" if (on_off_pufferladepumpe == 0) else "on"
-        )
-
-        on_off_verdichter = modbusdata.registers[15]
-        self.data["on_off_verdichter"] = "off" if (on_off_verdichter == 0) else "on"
-
-        on_off_stoerung = modbusdata.registers[16]
-        self.data["on_off_stoerung"] = "off" if (on_off_stoerung == 0) else "on"
-
-        vierwegeventil_luft = modbusdata.registers[17]
-        self.data["vierwegeventil_luft"] = (
-            "Abtaubetrieb" if (vierwegeventil_luft != 0) else "Aus"
-        )
-
-        wmz_durchfluss = modbusdata.registers[18]
-        self.data["wmz_durchfluss"] = self.checkval(wmz_durchfluss, 0.1)
-
-        n_soll_verdichter = modbusdata.registers[19]
-        self.data["n_soll_verdichter"] = self.checkval(n_soll_verdichter, 1)
-
-        cop = modbusdata.registers[20]
-        self.data["cop"] = self.checkval(cop, 0.1)
-
-        temp_frischwasser = modbusdata.registers[21]
-        self.data["temp_frischwasser"] = self.checkval(temp_frischwasser, 0.1)
-
-        on_off_evu_sperre = modbusdata.registers[22]
-        self.data["on_off_evu_sperre"] = "on" if (on_off_evu_sperre == 0) else "off"
-
-        temp_aussen_verzoegert = modbusdata.registers[23]
-        self.data["temp_aussen_verzoegert"] = self.checkval(temp_aussen_verzoegert, 0.1)
-
-        hkr_solltemperatur = modbusdata.registers[24]
-        self.data["hkr_solltemperatur"] = self.checkval(hkr_solltemperatur, 0.1)
-
-        mkr1_solltemperatur = modbusdata.registers[25]
-        self.data["mkr1_solltemperatur"] = self.checkval(mkr1_solltemperatur, 0.1)
-
-        mkr2_solltemperatur = modbusdata.registers[26]
-        self.data["mkr2_solltemperatur"] = self.checkval(mkr2_solltemperatur, 0.1)
-
-        on_off_eq_ventilator = modbusdata.registers[27]
-        self.data["on_off_eq_ventilator"] = (
-            "off" if (on_off_eq_ventilator == 0) else "on"
-        )
-
-        ww_vorrang = modbusdata.registers[28]
-        self.data["ww_vorrang"] = "off" if (ww_vorrang == 0) else "on"
-
-        kuehlen_umv_passiv = modbusdata.registers[29]
-        self.data["kuehlen_umv_passiv"] = "off" if (kuehlen_umv_passiv == 0) else "on"
-
-        expansionsventil = modbusdata.registers[30]
-        self.data["expansionsventil"] = self.checkval(expansionsventil, 0.1)
-
-#---------------------geändert-------------------------------------------------
-        verdichteranforderung = modbusdata.registers[31]
-        self.data["verdichteranforderung"] = (
-            "Kühlen"
-            if (verdichteranforderung == 10)
-            else "Heizen"
-            if (verdichteranforderung == 20)
-            else "Warmwasser"
-            if (verdichteranforderung == 30)
-            else "Externe Anforderung"
-            if (verdichteranforderung == 40)
-            else "Keine"
-        )
-#---------------------geändert-------------------------------------------------
-
-        # -----------------------------------------------------------------------------------
-        # decoder = BinaryPayloadDecoder.fromRegisters(
-        #    modbusdata2.registers, byteorder=ENDIAN.BIG
-        # )
-        decoder = self._client.convert_from_registers(
-            modbusdata2.registers,
-            data_type=self._client.DATATYPE.UINT32,
-        )
-
-        wmz_heizung = decoder[0]
-        self.data["wmz_heizung"] = wmz_heizung
-
-        stromz_heizung = decoder[1]
-        self.data["stromz_heizung"] = stromz_heizung
-
-        wmz_brauchwasser = decoder[2]
-        self.data["wmz_brauchwasser"] = wmz_brauchwasser
-
-        stromz_brauchwasser = decoder[3]
-        self.data["stromz_brauchwasser"] = stromz_brauchwasser
-
-        stromz_gesamt = decoder[4]
-        self.data["stromz_gesamt"] = stromz_gesamt
-
-        stromz_leistung = decoder[5]
-        self.data["stromz_leistung"] = stromz_leistung
-
-        wmz_gesamt = decoder[6]
-        self.data["wmz_gesamt"] = wmz_gesamt
-
-        wmz_leistung = decoder[7] * 0.1
-        self.data["wmz_leistung"] = wmz_leistung
-
-        # -----------------------------------------------------------------------------------
-
-        select_betriebsart = modbusdata3.registers[0]
-        self.data["select_betriebsart"] = self.getbetriebsart(select_betriebsart)
-
-        select_mkr1_betriebsart = modbusdata3.registers[7]
-        self.data["select_mkr1_betriebsart"] = self.getbetriebsart(
-            select_mkr1_betriebsart
-        )
-
-        select_mkr2_betriebsart = modbusdata3.registers[12]
-        self.data["select_mkr2_betriebsart"] = self.getbetriebsart(
-            select_mkr2_betriebsart
-        )
-
-        climate_hkr_raum_soll = modbusdata3.registers[1]
-        self.data["climate_hkr_raum_soll"] = {
-            "temperature": self.checkval(climate_hkr_raum_soll, 0.1)
-        }
-
-        climate_rlt_kuehlen = modbusdata3.registers[4]
-        self.data["climate_rlt_kuehlen"] = {
-            "temperature": self.checkval(climate_rlt_kuehlen, 0.1)
-        }
-
-        climate_ww_bereitung_max = modbusdata3.registers[5]
-        climate_ww_bereitung_min = modbusdata3.registers[6]
-        self.data["climate_ww_bereitung"] = {
-            "target_temp_low": self.checkval(climate_ww_bereitung_min, 0.1),
-            "target_temp_high": self.checkval(climate_ww_bereitung_max, 0.1),
-            "temperature": self.checkval(temp_brauchwasser, 0.1),
-        }
-
-#---------------------eingefügt-------------------------------------------------
-        climate_rl_soll = modbusdata3.registers[2]
-        self.data["climate_rl_soll"] = {
-            "temperature": self.checkval(climate_rl_soll, 0.1)
-        }
+        await self.async_queue_writes({102: temp_int, 103: temp_activate_rl_soll})
 #---------------------eingefügt-------------------------------------------------
 
-        # externe_anforderung = modbusdata3.registers[20]
+    async def async_read_modbus_registers(self, read_plan, values, timestamp):
+        """Read from modbus registers, all blocks must succeed before decoding.
+
+        The plausibility checks of the decoder take timestamp as reading time.
+        """
+        blocks = []
+        for register_type, address, count in read_plan:
+            if register_type == REGISTER_HOLDING:
+                modbusdata = await self.async_read_holding_registers(
+                    slave=self._unit_id, address=address, count=count
+                )
+            else:
+                modbusdata = await self.async_read_input_registers(
+                    slave=self._unit_id, address=address, count=count
+                )
+            if modbusdata.isError():
+                raise ModbusException(
+                    f"Reading {register_type} registers {address}-"
+                    f"{address + count - 1} failed: {modbusdata}"
+                )
+            blocks.append((register_type, address, modbusdata.registers))
+
+        start = time.perf_counter()
+        for register_type, address, registers in blocks:
+            self._decoder.decode(register_type, address, registers, values, timestamp)
+        self.stats.record_decode(time.perf_counter() - start)
 
         return True
@@ -0,0 +1,178 @@
+"""Derived performance metrics of a HaHeliotherm hub."""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Container, Sequence
+from datetime import date
+from typing import Any
+
+from .registers import SnapshotLayout
+
+HEAT_KEY = "wmz_gesamt"
+ENERGY_KEY = "stromz_gesamt"
+COMPRESSOR_KEY = "on_off_verdichter"
+DEFROST_KEY = "vierwegeventil_luft"
+
+COMPRESSOR_ON = "on"
+DEFROST_ON = "Abtaubetrieb"
+
+COP_ROLLING = "cop_24h"
+COP_TODAY = "cop_heute"
+COP_TOTAL = "cop_gesamt"
+COMPRESSOR_STARTS_TODAY = "verdichter_starts_heute"
+COMPRESSOR_STARTS_HOUR = "verdichter_starts_stunde"
+COMPRESSOR_RUNTIME_TODAY = "verdichter_laufzeit_heute"
+COMPRESSOR_LAST_RUNTIME = "verdichter_letzte_laufzeit"
+DEFROSTS_TODAY = "abtauungen_heute"
+
+# Register keys every derived value is computed from.
+ANALYTICS_SOURCES: dict[str, tuple[str, ...]] = {
+    COP_ROLLING: (HEAT_KEY, ENERGY_KEY),
+    COP_TODAY: (HEAT_KEY, ENERGY_KEY),
+    COP_TOTAL: (HEAT_KEY, ENERGY_KEY),
+    COMPRESSOR_STARTS_TODAY: (COMPRESSOR_KEY,),
+    COMPRESSOR_STARTS_HOUR: (COMPRESSOR_KEY,),
+    COMPRESSOR_RUNTIME_TODAY: (COMPRESSOR_KEY,),
+    COMPRESSOR_LAST_RUNTIME: (COMPRESSOR_KEY,),
+    DEFROSTS_TODAY: (DEFROST_KEY,),
+}
+
+ROLLING_WINDOW = 24 * 3600
+CHECKPOINT_INTERVAL = 3600
+STARTS_WINDOW = 3600
+# Longer gaps between two polls are not counted as runtime.
+MAX_SAMPLE_GAP = 600
+
+
+class PerformanceAnalytics:
+    """Incremental COP, compressor cycle and defrost statistics.
+
+    Updated after every poll in constant time from the decoded snapshot,
+    no history is queried. Only the values whose registers were read by
+    the poll are updated, polls finishing after a newer one are ignored.
+    The rolling COP keeps one counter checkpoint per hour, the daily values
+    start over at local midnight. All values start over when Home Assistant
+    restarts.
+    """
+
+    def __init__(self, layout: SnapshotLayout) -> None:
+        """Initialize empty statistics for snapshots of layout."""
+        self._heat_slot = layout.slot(HEAT_KEY)
+        self._energy_slot = layout.slot(ENERGY_KEY)
+        self._compressor_slot = layout.slot(COMPRESSOR_KEY)
+        self._defrost_slot = layout.slot(DEFROST_KEY)
+        self.values: dict[str, Any] = dict.fromkeys(ANALYTICS_SOURCES)
+        self._checkpoints: deque[tuple[float, float, float]] = deque(
+            maxlen=ROLLING_WINDOW // CHECKPOINT_INTERVAL + 1
+        )
+        self._starts: deque[float] = deque()
+        self._day: date | None = None
+        self._day_counters: tuple[float, float] | None = None
+        self._last_time: float | None = None
+        self._compressor_time: float | None = None
+        self._compressor: str | None = None
+        self._run_started: float | None = None
+        self._defrost: str | None = None
+
+    def update(
+        self,
+        timestamp: float,
+        day: date,
+        values: Sequence[Any],
+        slots: Container[int],
+    ) -> set[str]:
+        """Update the statistics with the slots a poll read, return the changed keys."""
+        if self._last_time is not None and timestamp < self._last_time:
+            return set()
+        self._last_time = timestamp
+        previous = dict(self.values)
+        heat = values[self._heat_slot]
+        energy = values[self._energy_slot]
+        counters = (
+            None
+            if heat is None
+            or energy is None
+            or self._heat_slot not in slots
+            or self._energy_slot not in slots
+            else (heat, energy)
+        )
+
+        if day != self._day:
+            self._day = day
+            self._day_counters = counters
+            self.values[COMPRESSOR_STARTS_TODAY] = 0
+            self.values[COMPRESSOR_RUNTIME_TODAY] = 0.0
+            self.values[DEFROSTS_TODAY] = 0
+
+        if counters is not None:
+            self._update_cop(timestamp, counters)
+        if self._compressor_slot in slots:
+            self._update_compressor(timestamp, values[self._compressor_slot])
+        if self._defrost_slot in slots:
+            self._update_defrost(values[self._defrost_slot])
+
+        return {key for key, value in self.values.items() if previous[key] != value}
+
+    def _update_cop(self, timestamp: float, counters: tuple[float, float]) -> None:
+        """Update the COP values from the heat and energy counters."""
+        heat, energy = counters
+        checkpoints = self._checkpoints
+        if not checkpoints or timestamp - checkpoints[-1][0] >= CHECKPOINT_INTERVAL:
+            checkpoints.append((timestamp, heat, energy))
+        if self._day_counters is None:
+            self._day_counters = counters
+
+        self.values[COP_TOTAL] = _ratio(heat, energy)
+        _time, window_heat, window_energy = checkpoints[0]
+        self.values[COP_ROLLING] = _ratio(heat - window_heat, energy - window_energy)
+        day_heat, day_energy = self._day_counters
+        self.values[COP_TODAY] = _ratio(heat - day_heat, energy - day_energy)
+
+    def _update_compressor(self, timestamp: float, state: str | None) -> None:
+        """Count compressor starts and runtime from the on/off register."""
+        if state is None:
+            return
+        if (
+            self._compressor == COMPRESSOR_ON
+            and self._compressor_time is not None
+            and timestamp - self._compressor_time <= MAX_SAMPLE_GAP
+        ):
+            self.values[COMPRESSOR_RUNTIME_TODAY] = round(
+                self.values[COMPRESSOR_RUNTIME_TODAY]
+                + (timestamp - self._compressor_time) / 3600,
+                3,
+            )
+
+        if state == COMPRESSOR_ON and self._compressor not in (None, COMPRESSOR_ON):
+            self.values[COMPRESSOR_STARTS_TODAY] += 1
+            self._starts.append(timestamp)
+            self._run_started = timestamp
+        elif state != COMPRESSOR_ON and self._compressor == COMPRESSOR_ON:
+            if self._run_started is not None:
+                self.values[COMPRESSOR_LAST_RUNTIME] = round(
+                    (timestamp - self._run_started) / 60, 1
+                )
+            self._run_started = None
+        self._compressor = state
+        self._compressor_time = timestamp
+
+        starts = self._starts
+        while starts and timestamp - starts[0] > STARTS_WINDOW:
+            starts.popleft()
+        self.values[COMPRESSOR_STARTS_HOUR] = len(starts)
+
+    def _update_defrost(self, state: str | None) -> None:
+        """Count the switches of the four way valve into defrost mode."""
+        if state is None:
+            return
+        if state == DEFROST_ON and self._defrost not in (None, DEFROST_ON):
+            self.values[DEFROSTS_TODAY] += 1
+        self._defrost = state
+
+
+def _ratio(heat: float, energy: float) -> float | None:
+    """Return the COP of a heat and an energy delta, None without energy."""
+    if energy <= 0 or heat < 0:
+        return None
+    return round(heat / energy, 2)
@@ -1,10 +1,7 @@
 from homeassistant.const import CONF_NAME
 from homeassistant.core import callback
-from homeassistant.components.binary_sensor import (
-    BinarySensorDeviceClass,
-    BinarySensorEntity,
-    BinarySensorEntityDescription,
-)
+from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 import logging
 from typing import Optional, Dict, Any
 
@@ -14,8 +11,8 @@ import homeassistant.util.dt as dt_util
 from .const import (
     ATTR_MANUFACTURER,
     DOMAIN,
-    SENSOR_TYPES,
     BINARYSENSOR_TYPES,
+    DETECTION_BINARYSENSOR_TYPES,
     HaHeliothermBinarySensorEntityDescription,
 )
 
@@ -42,11 +39,16 @@ async def async_setup_entry(hass, entry, async_add_entities):
         )
         entities.append(sensor)
 
+    for description in DETECTION_BINARYSENSOR_TYPES.values():
+        entities.append(
+            HaHeliothermDetectionBinarySensor(hub_name, hub, device_info, description)
+        )
+
     async_add_entities(entities)
     return True
 
 
-class HaHeliothermModbusBinarySensor(BinarySensorEntity):
+class HaHeliothermModbusBinarySensor(CoordinatorEntity, BinarySensorEntity):
     """Representation of an IamMeter Modbus sensor."""
 
     def __init__(
@@ -57,29 +59,24 @@ class HaHeliothermModbusBinarySensor(BinarySensorEntity):
         description: HaHeliothermBinarySensorEntityDescription,
     ):
         """Initialize the sensor."""
+        super().__init__(hub, context=description.key)
         self._platform_name = platform_name
         self._attr_device_info = device_info
         self._hub = hub
         self.entity_description: HaHeliothermBinarySensorEntityDescription = description
-
-    async def async_added_to_hass(self):
-        """Register callbacks."""
-        self._hub.async_add_haheliotherm_modbus_sensor(self._modbus_data_updated)
-
-    async def async_will_remove_from_hass(self) -> None:
-        self._hub.async_remove_haheliotherm_modbus_sensor(self._modbus_data_updated)
+        self._value_slot = hub.snapshot_layout.slot(description.key)
+        self._update_state()
 
     @callback
-    def _modbus_data_updated(self):
+    def _handle_coordinator_update(self) -> None:
         self._update_state()
         self.async_write_ha_state()
 
     @callback
     def _update_state(self):
-        if self.entity_description.key in self._hub.data:
-            self._attr_is_on = (
-                True if self._hub.data[self.entity_description.key] == "on" else False
-            )
+        value = self._hub.data[self._value_slot]
+        if value is not None:
+            self._attr_is_on = True if value == "on" else False
 
     @property
     def name(self):
@@ -93,8 +90,17 @@ class HaHeliothermModbusBinarySensor(BinarySensorEntity):
     @property
     def native_value(self):
         """Return the state of the sensor."""
-        return (
-            self._hub.data[self.entity_description.key]
-            if self.entity_description.key in self._hub.data
-            else None
-        )
+        return self._hub.data[self._value_slot]
+
+
+class HaHeliothermDetectionBinarySensor(HaHeliothermModbusBinarySensor):
+    """Problem detected by the hub on the poll stream."""
+
+    @callback
+    def _update_state(self):
+        self._attr_is_on = self._hub.detector.states[self.entity_description.key]
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        return self._attr_is_on
@@ -0,0 +1,73 @@
+"""Circuit breaker for the Modbus connection of a HaHeliotherm hub."""
+
+from __future__ import annotations
+
+import random
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stop talking to a failing heat pump and retry with exponential backoff.
+
+    The breaker opens after ``failure_threshold`` consecutive failed
+    transactions. While open every request is refused until the retry
+    delay has passed, then a single probe is let through (half open) and
+    other requests are refused until its result is recorded. A successful
+    probe closes the breaker, a failed one opens it again with twice the
+    delay, capped at ``max_delay``. A probe without a result after
+    ``probe_timeout``, e.g. because it was cancelled, is replaced by a new
+    one. Delays are jittered so hubs behind one gateway do not reconnect in
+    lockstep.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        base_delay: float = 15,
+        max_delay: float = 600,
+        probe_timeout: float = 120,
+    ) -> None:
+        """Initialize a closed breaker."""
+        self._failure_threshold = failure_threshold
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._probe_timeout = probe_timeout
+        self._retry_at = 0.0
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.retry_delay = 0.0
+
+    @property
+    def available(self) -> bool:
+        """Return True while the connection is considered healthy."""
+        return self.state == STATE_CLOSED
+
+    def allow_request(self, now: float) -> bool:
+        """Return True if a transaction may be attempted at monotonic time now."""
+        if self.state == STATE_CLOSED:
+            return True
+        if now < self._retry_at:
+            return False
+        self.state = STATE_HALF_OPEN
+        self._retry_at = now + self._probe_timeout
+        return True
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful transaction."""
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.retry_delay = 0.0
+
+    def record_failure(self, now: float) -> None:
+        """Count a failed transaction and open the breaker if needed."""
+        self.failures += 1
+        if self.state != STATE_HALF_OPEN and self.failures < self._failure_threshold:
+            return
+        attempt = min(max(self.failures - self._failure_threshold, 0), 16)
+        delay = min(self._max_delay, self._base_delay * 2**attempt)
+        self.retry_delay = delay * random.uniform(0.5, 1.0)
+        self._retry_at = now + self.retry_delay
+        self.state = STATE_OPEN
@@ -6,6 +6,7 @@ from homeassistant.components.climate import (
     ClimateEntityFeature,
     HVACMode,
 )
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from custom_components.ha_heliotherm import HaHeliothermModbusHub
 
@@ -49,7 +50,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     return True
 
 
-class HaHeliothermModbusClimate(ClimateEntity):
+class HaHeliothermModbusClimate(CoordinatorEntity, ClimateEntity):
     """Representation of an Heliotherm Modbus sensor."""
 
     def __init__(
@@ -60,10 +61,20 @@ class HaHeliothermModbusClimate(ClimateEntity):
         description: HaHeliothermClimateEntityDescription,
     ):
         """Initialize the sensor."""
+        super().__init__(hub, context=description.key)
         self._platform_name = platform_name
         self._attr_device_info = device_info
         self._hub = hub
         self.entity_description: HaHeliothermClimateEntityDescription = description
+        self._temperature_slot = hub.snapshot_layout.slot(
+            description.key, "temperature"
+        )
+        self._target_low_slot = hub.snapshot_layout.slot(
+            description.key, "target_temp_low"
+        )
+        self._target_high_slot = hub.snapshot_layout.slot(
+            description.key, "target_temp_high"
+        )
         self._attr_hvac_modes = [HVACMode.AUTO]
         self._attr_hvac_mode = HVACMode.AUTO
         self._attr_temperature_unit = description.temperature_unit
@@ -73,28 +84,30 @@ class HaHeliothermModbusClimate(ClimateEntity):
         self._attr_target_temperature_high = description.max_value
         self._attr_target_temperature_step = description.step
         self._attr_supported_features = description.supported_features
-
-    async def async_added_to_hass(self):
-        """Register callbacks."""
-        self._hub.async_add_haheliotherm_modbus_sensor(self._modbus_data_updated)
-
-    async def async_will_remove_from_hass(self) -> None:
-        self._hub.async_remove_haheliotherm_modbus_sensor(self._modbus_data_updated)
+        self._update_state()
 
     @callback
-    def _modbus_data_updated(self):
-        if self.entity_description.key in self._hub.data:
-            args = self._hub.data[self.entity_description.key]
-            if "temperature" in args:
-                self._attr_current_temperature = float(args["temperature"])
-                self._attr_target_temperature = float(args["temperature"])
-            if "target_temp_low" in args:
-                self._attr_target_temperature_low = float(args["target_temp_low"])
-            if "target_temp_high" in args:
-                self._attr_target_temperature_high = float(args["target_temp_high"])
-
+    def _handle_coordinator_update(self) -> None:
+        self._update_state()
         self.async_write_ha_state()
 
+    @callback
+    def _update_state(self):
+        data = self._hub.data
+        if self._temperature_slot is not None:
+            temperature = data[self._temperature_slot]
+            if temperature is not None:
+                self._attr_current_temperature = float(temperature)
+                self._attr_target_temperature = float(temperature)
+        if self._target_low_slot is not None:
+            target_low = data[self._target_low_slot]
+            if target_low is not None:
+                self._attr_target_temperature_low = float(target_low)
+        if self._target_high_slot is not None:
+            target_high = data[self._target_high_slot]
+            if target_high is not None:
+                self._attr_target_temperature_high = float(target_high)
+
     @property
     def name(self):
         """Return the name."""
@@ -104,16 +117,7 @@ class HaHeliothermModbusClimate(ClimateEntity):
     def unique_id(self) -> Optional[str]:
         return f"{self._platform_name}_{self.entity_description.key}"
 
-    @property
-    def native_value(self):
-        """Return the state of the sensor."""
-        return (
-            self._hub.data[self.entity_description.key]
-            if self.entity_description.key in self._hub.data
-            else None
-        )
-
-    def set_temperature(self, **kwargs) -> None:
+    async def async_set_temperature(self, **kwargs) -> None:
         """Set new target temperature."""
         if "temperature" in kwargs:
             self._attr_current_temperature = float(kwargs["temperature"])
@@ -123,4 +127,4 @@ class HaHeliothermModbusClimate(ClimateEntity):
         if "target_temp_high" in kwargs:
             self._attr_target_temperature_high = float(kwargs["target_temp_high"])
 
-        self.hass.add_job(self._hub.setter_function_callback(self, kwargs))
+        await self._hub.setter_function_callback(self, kwargs)
@@ -11,24 +11,104 @@ import homeassistant.helpers.config_validation as cv
 
 import voluptuous as vol
 from homeassistant import config_entries
-from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT
+from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT, CONF_SCAN_INTERVAL
 
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 
-from .const import DOMAIN, DEFAULT_NAME, DEFAULT_PORT
+from .const import (
+    CONF_HISTORY_HOURS,
+    CONF_MAX_READ_GAP,
+    CONF_REQUEST_DELAY,
+    CONF_RETRIES,
+    CONF_SCAN_INTERVAL_NORMAL,
+    CONF_SCAN_INTERVAL_SLOW,
+    CONF_TIMEOUT,
+    CONF_UNIT_ID,
+    DOMAIN,
+    DEFAULT_HISTORY_HOURS,
+    DEFAULT_MAX_READ_GAP,
+    DEFAULT_NAME,
+    DEFAULT_PORT,
+    DEFAULT_REQUEST_DELAY,
+    DEFAULT_RETRIES,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL_NORMAL,
+    DEFAULT_SCAN_INTERVAL_SLOW,
+    DEFAULT_TIMEOUT,
+    DEFAULT_UNIT_ID,
+)
+from .registers import MAX_READ_GAP
 
 _LOGGER = logging.getLogger(__name__)
 
+PORT_SCHEMA = vol.All(vol.Coerce(int), vol.Range(min=1, max=65535))
+
+OPTIONS_SCHEMA = {
+    vol.Required(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=3600)
+    ),
+    vol.Required(
+        CONF_SCAN_INTERVAL_NORMAL, default=DEFAULT_SCAN_INTERVAL_NORMAL
+    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=3600)),
+    vol.Required(CONF_SCAN_INTERVAL_SLOW, default=DEFAULT_SCAN_INTERVAL_SLOW): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=86400)
+    ),
+    vol.Required(CONF_TIMEOUT, default=DEFAULT_TIMEOUT): vol.All(
+        vol.Coerce(float), vol.Range(min=0.5, max=60)
+    ),
+    vol.Required(CONF_RETRIES, default=DEFAULT_RETRIES): vol.All(
+        vol.Coerce(int), vol.Range(min=0, max=10)
+    ),
+    vol.Required(CONF_REQUEST_DELAY, default=DEFAULT_REQUEST_DELAY): vol.All(
+        vol.Coerce(float), vol.Range(min=0, max=5)
+    ),
+    vol.Required(CONF_HISTORY_HOURS, default=DEFAULT_HISTORY_HOURS): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=168)
+    ),
+    vol.Required(CONF_MAX_READ_GAP, default=DEFAULT_MAX_READ_GAP): vol.All(
+        vol.Coerce(int), vol.Range(min=0, max=MAX_READ_GAP)
+    ),
+}
+
 DATA_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_NAME, default=DEFAULT_NAME): cv.string,
         vol.Required(CONF_HOST): cv.string,
-        vol.Required(CONF_PORT, default=DEFAULT_PORT): cv.string,
+        vol.Required(CONF_PORT, default=DEFAULT_PORT): PORT_SCHEMA,
+        vol.Required(CONF_UNIT_ID, default=DEFAULT_UNIT_ID): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=247)
+        ),
+        **OPTIONS_SCHEMA,
     }
 )
 
 
+def split_options(user_input):
+    """Split the input of a form into entry data and options."""
+    data = dict(user_input)
+    options = {key.schema: data.pop(key.schema) for key in OPTIONS_SCHEMA}
+    return data, options
+
+
+def validate_options(options):
+    """Return the errors of options, tiers must not poll faster than faster ones."""
+    errors = {}
+    if options[CONF_SCAN_INTERVAL_NORMAL] < options[CONF_SCAN_INTERVAL]:
+        errors[CONF_SCAN_INTERVAL_NORMAL] = "interval_order"
+    if options[CONF_SCAN_INTERVAL_SLOW] < options[CONF_SCAN_INTERVAL_NORMAL]:
+        errors[CONF_SCAN_INTERVAL_SLOW] = "interval_order"
+    return errors
+
+
+def options_schema(options):
+    """Return the option fields with the current options as defaults."""
+    return {
+        vol.Required(key.schema, default=options.get(key.schema, key.default())): value
+        for key, value in OPTIONS_SCHEMA.items()
+    }
+
+
 def host_valid(host):
     """Return True if hostname or IP address is valid."""
     try:
@@ -40,13 +120,35 @@ def host_valid(host):
 
 
 @callback
-def ha_heliotherm_modbus_entries(hass: HomeAssistant):
-    """Return the hosts already configured."""
+def ha_heliotherm_modbus_entries(hass: HomeAssistant, exclude_entry_id=None):
+    """Return the units already configured, see unit_key.
+
+    The entry with exclude_entry_id is left out, e.g. the entry being edited.
+    """
     return set(
-        entry.data[CONF_HOST] for entry in hass.config_entries.async_entries(DOMAIN)
+        unit_key(
+            entry.data[CONF_HOST],
+            entry.data.get(CONF_PORT, DEFAULT_PORT),
+            entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID),
+        )
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.entry_id != exclude_entry_id
     )
 
 
+def unit_key(host, port, unit_id):
+    """Return the gateway and unit id of a heat pump, like transports are shared."""
+    return (host, int(port), int(unit_id))
+
+
+def unique_id_for(host, port, unit_id):
+    """Return the unique id of a heat pump, the host alone for port 502 and unit 1."""
+    unique_id = host if int(port) == DEFAULT_PORT else f"{host}:{port}"
+    if unit_id == DEFAULT_UNIT_ID:
+        return unique_id
+    return f"{unique_id}_{unit_id}"
+
+
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for HaHeliotherm."""
 
@@ -54,9 +156,9 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     CONNECTION_CLASS = config_entries.CONN_CLASS_LOCAL_POLL
 
-    def _host_in_configuration_exists(self, host) -> bool:
-        """Return True if host exists in configuration."""
-        if host in ha_heliotherm_modbus_entries(self.hass):
+    def _host_in_configuration_exists(self, host, port, unit_id) -> bool:
+        """Return True if the unit on the gateway exists in configuration."""
+        if unit_key(host, port, unit_id) in ha_heliotherm_modbus_entries(self.hass):
             return True
         return False
 
@@ -66,16 +168,21 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             host = user_input[CONF_HOST]
+            port = user_input[CONF_PORT]
+            unit_id = user_input[CONF_UNIT_ID]
 
-            if self._host_in_configuration_exists(host):
+            data, options = split_options(user_input)
+            if self._host_in_configuration_exists(host, port, unit_id):
                 errors[CONF_HOST] = "already_configured"
             elif not host_valid(user_input[CONF_HOST]):
                 errors[CONF_HOST] = "invalid host IP"
             else:
-                await self.async_set_unique_id(user_input[CONF_HOST])
+                errors = validate_options(options)
+            if not errors:
+                await self.async_set_unique_id(unique_id_for(host, port, unit_id))
                 self._abort_if_unique_id_configured()
                 return self.async_create_entry(
-                    title=user_input[CONF_NAME], data=user_input
+                    title=user_input[CONF_NAME], data=data, options=options
                 )
 
         return self.async_show_form(
@@ -99,15 +206,32 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
     async def async_step_init(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
-        """Manage the options."""
+        """Manage the options.
+
+        The update listener of the entry applies the changes to the hub.
+        """
 
+        errors = {}
         if user_input is not None:
-            user_input[CONF_NAME] = self.config_entry.data[CONF_NAME]
+            data, options = split_options(user_input)
+            if unit_key(
+                data[CONF_HOST], data[CONF_PORT], data[CONF_UNIT_ID]
+            ) in ha_heliotherm_modbus_entries(self.hass, self.config_entry.entry_id):
+                errors[CONF_HOST] = "already_configured"
+            else:
+                errors = validate_options(options)
+        if user_input is not None and not errors:
+            data[CONF_NAME] = self.config_entry.data[CONF_NAME]
+            options = {**self.config_entry.options, **options}
             self.hass.config_entries.async_update_entry(
-                self.config_entry, data=user_input, options=self.config_entry.options
+                self.config_entry,
+                data=data,
+                options=options,
+                unique_id=unique_id_for(
+                    data[CONF_HOST], data[CONF_PORT], data[CONF_UNIT_ID]
+                ),
             )
-            await self.hass.config_entries.async_reload(self.config_entry.entry_id)
-            return self.async_create_entry(title="", data={})
+            return self.async_create_entry(title="", data=options)
 
         return self.async_show_form(
             step_id="init",
@@ -118,7 +242,15 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     ): cv.string,
                     vol.Required(
                         CONF_PORT, default=self.config_entry.data[CONF_PORT]
-                    ): cv.string,
+                    ): PORT_SCHEMA,
+                    vol.Required(
+                        CONF_UNIT_ID,
+                        default=self.config_entry.data.get(
+                            CONF_UNIT_ID, DEFAULT_UNIT_ID
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=247)),
+                    **options_schema(self.config_entry.options),
                 }
             ),
+            errors=errors,
         )
@@ -1,6 +1,9 @@
 """Constants for the HaHeliotherm integration."""
 
+from collections.abc import Callable
 from dataclasses import dataclass
+from typing import Any
+
 from homeassistant.components.climate import (
     ClimateEntityDescription,
     ClimateEntityFeature,
@@ -19,14 +22,62 @@ from homeassistant.components.number import (
     NumberEntityDescription,
     NumberDeviceClass,
 )
-from homeassistant.const import UnitOfPressure, UnitOfTemperature, CONF_NAME
+from homeassistant.const import (
+    UnitOfEnergy,
+    UnitOfInformation,
+    UnitOfPower,
+    UnitOfPressure,
+    UnitOfTemperature,
+    UnitOfTime,
+    CONF_NAME,
+    EntityCategory,
+)
+
+from .analytics import (
+    COMPRESSOR_LAST_RUNTIME,
+    COMPRESSOR_RUNTIME_TODAY,
+    COMPRESSOR_STARTS_HOUR,
+    COMPRESSOR_STARTS_TODAY,
+    COP_ROLLING,
+    COP_TODAY,
+    COP_TOTAL,
+    DEFROSTS_TODAY,
+)
+from .detector import PRESSURE_ANOMALY, SHORT_CYCLE, STUCK_SETPOINT
+from .registers import BETRIEBSART
+from .stats import TransactionStats
 
 # from homeassistant.const import *
 
 DOMAIN = "ha_heliotherm"
 DEFAULT_NAME = "Heliotherm Heatpump"
 DEFAULT_SCAN_INTERVAL = 15
+CONF_SCAN_INTERVAL_NORMAL = "scan_interval_normal"
+DEFAULT_SCAN_INTERVAL_NORMAL = 30
+CONF_SCAN_INTERVAL_SLOW = "scan_interval_slow"
+DEFAULT_SCAN_INTERVAL_SLOW = 300
 DEFAULT_PORT = 502
+CONF_UNIT_ID = "unit_id"
+DEFAULT_UNIT_ID = 1
+DATA_TRANSPORTS = f"{DOMAIN}_transports"
+CONF_MAX_READ_GAP = "max_read_gap"
+DEFAULT_MAX_READ_GAP = 8
+CONF_TIMEOUT = "timeout"
+DEFAULT_TIMEOUT = 3
+CONF_RETRIES = "retries"
+DEFAULT_RETRIES = 3
+CONF_REQUEST_DELAY = "request_delay"
+DEFAULT_REQUEST_DELAY = 0
+CONF_HISTORY_HOURS = "history_hours"
+DEFAULT_HISTORY_HOURS = 24
+SERVICE_GET_HISTORY = "get_history"
+EVENT_DETECTION = f"{DOMAIN}_detection"
+ATTR_KEYS = "keys"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_RESOLUTION = "resolution"
+WRITE_DEBOUNCE_SECONDS = 0.5
+READ_BACK_COOLDOWN_SECONDS = 1
 CONF_HALEIOTHERM_HUB = "haheliotherm_hub"
 ATTR_MANUFACTURER = "Heliotherm"
 
@@ -45,6 +96,15 @@ class HaHeliothermSensorEntityDescription(SensorEntityDescription):
     """A class that describes HaHeliotherm Modbus sensor entities."""
 
 
+@dataclass
+class HaHeliothermDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """A class that describes HaHeliotherm Modbus transaction statistics."""
+
+    value_fn: Callable[[TransactionStats], Any] = None
+    entity_category: EntityCategory = EntityCategory.DIAGNOSTIC
+    entity_registry_enabled_default: bool = False
+
+
 @dataclass
 class HaHeliothermBinarySensorEntityDescription(BinarySensorEntityDescription):
     """A class that describes HaHeliotherm Modbus binarysensor entities."""
@@ -119,46 +179,19 @@ SELECT_TYPES: dict[str, list[HaHeliothermSelectEntityDescription]] = {
     "select_betriebsart": HaHeliothermSelectEntityDescription(
         name="Betriebsart",
         key="select_betriebsart",
-        select_options=[
-            "Aus",
-            "Auto",
-            "Kühlen",
-            "Sommer",
-            "Dauerbetrieb",
-            "Absenken",
-            "Urlaub",
-            "Party",
-        ],
+        select_options=BETRIEBSART.options,
         default_select_option="Auto",
     ),
     "select_mkr1_betriebsart": HaHeliothermSelectEntityDescription(
         name="MKR 1 Betriebsart",
         key="select_mkr1_betriebsart",
-        select_options=[
-            "Aus",
-            "Auto",
-            "Kühlen",
-            "Sommer",
-            "Dauerbetrieb",
-            "Absenken",
-            "Urlaub",
-            "Party",
-        ],
+        select_options=BETRIEBSART.options,
         default_select_option="Auto",
     ),
     "select_mkr2_betriebsart": HaHeliothermSelectEntityDescription(
         name="MKR 2 Betriebsart",
         key="select_mkr2_betriebsart",
-        select_options=[
-            "Aus",
-            "Auto",
-            "Kühlen",
-            "Sommer",
-            "Dauerbetrieb",
-            "Absenken",
-            "Urlaub",
-            "Party",
-        ],
+        select_options=BETRIEBSART.options,
         default_select_option="Auto",
     ),
 }
@@ -303,61 +336,184 @@ SENSOR_TYPES: dict[str, list[HaHeliothermSensorEntityDescription]] = {
     "wmz_heizung": HaHeliothermSensorEntityDescription(
         name="WMZ Heizung",
         key="wmz_heizung",
-        native_unit_of_measurement="kWh",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
     ),
     "stromz_heizung": HaHeliothermSensorEntityDescription(
         name="Stromzähler Heizung",
         key="stromz_heizung",
-        native_unit_of_measurement="kWh",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
     ),
     "wmz_brauchwasser": HaHeliothermSensorEntityDescription(
         name="WMZ Brauchwasser",
         key="wmz_brauchwasser",
-        native_unit_of_measurement="kWh",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
     ),
     "stromz_brauchwasser": HaHeliothermSensorEntityDescription(
         name="Stromzähler Brauchwasser",
         key="stromz_brauchwasser",
-        native_unit_of_measurement="kWh",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
     ),
     "stromz_gesamt": HaHeliothermSensorEntityDescription(
         name="Stromzähler Gesamt",
         key="stromz_gesamt",
-        native_unit_of_measurement="kWh",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
     ),
     "stromz_leistung": HaHeliothermSensorEntityDescription(
         name="Stromzähler Leistung",
         key="stromz_leistung",
-        native_unit_of_measurement="W",
+        native_unit_of_measurement=UnitOfPower.WATT,
         device_class=SensorDeviceClass.POWER,
         state_class=SensorStateClass.MEASUREMENT,
     ),
     "wmz_gesamt": HaHeliothermSensorEntityDescription(
         name="WMZ Gesamt",
         key="wmz_gesamt",
-        native_unit_of_measurement="kWh",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
     ),
     "wmz_leistung": HaHeliothermSensorEntityDescription(
         name="WMZ Leistung",
         key="wmz_leistung",
-        native_unit_of_measurement="kW",
+        native_unit_of_measurement=UnitOfPower.KILO_WATT,
         device_class=SensorDeviceClass.POWER,
         state_class=SensorStateClass.MEASUREMENT,
     ),
 }
 
+ANALYTICS_SENSOR_TYPES: dict[str, HaHeliothermSensorEntityDescription] = {
+    COP_ROLLING: HaHeliothermSensorEntityDescription(
+        name="COP 24h",
+        key=COP_ROLLING,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    COP_TODAY: HaHeliothermSensorEntityDescription(
+        name="COP Heute",
+        key=COP_TODAY,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    COP_TOTAL: HaHeliothermSensorEntityDescription(
+        name="COP Gesamt",
+        key=COP_TOTAL,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    COMPRESSOR_STARTS_TODAY: HaHeliothermSensorEntityDescription(
+        name="Verdichter Starts Heute",
+        key=COMPRESSOR_STARTS_TODAY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    COMPRESSOR_STARTS_HOUR: HaHeliothermSensorEntityDescription(
+        name="Verdichter Starts pro Stunde",
+        key=COMPRESSOR_STARTS_HOUR,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    COMPRESSOR_RUNTIME_TODAY: HaHeliothermSensorEntityDescription(
+        name="Verdichter Laufzeit Heute",
+        key=COMPRESSOR_RUNTIME_TODAY,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    COMPRESSOR_LAST_RUNTIME: HaHeliothermSensorEntityDescription(
+        name="Verdichter letzte Laufzeit",
+        key=COMPRESSOR_LAST_RUNTIME,
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    DEFROSTS_TODAY: HaHeliothermSensorEntityDescription(
+        name="Abtauungen Heute",
+        key=DEFROSTS_TODAY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+}
+
+DIAGNOSTIC_SENSOR_TYPES: dict[str, HaHeliothermDiagnosticSensorEntityDescription] = {
+    "modbus_requests": HaHeliothermDiagnosticSensorEntityDescription(
+        name="Modbus Anfragen",
+        key="modbus_requests",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.requests,
+    ),
+    "modbus_errors": HaHeliothermDiagnosticSensorEntityDescription(
+        name="Modbus Fehler",
+        key="modbus_errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.errors,
+    ),
+    "modbus_timeouts": HaHeliothermDiagnosticSensorEntityDescription(
+        name="Modbus Timeouts",
+        key="modbus_timeouts",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.timeouts,
+    ),
+    "modbus_retries": HaHeliothermDiagnosticSensorEntityDescription(
+        name="Modbus Wiederholungen",
+        key="modbus_retries",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.retries,
+    ),
+    "modbus_exception_responses": HaHeliothermDiagnosticSensorEntityDescription(
+        name="Modbus Exception Antworten",
+        key="modbus_exception_responses",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.exception_responses,
+    ),
+    "modbus_bytes_sent": HaHeliothermDiagnosticSensorEntityDescription(
+        name="Modbus Gesendet",
+        key="modbus_bytes_sent",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.bytes_sent,
+    ),
+    "modbus_bytes_received": HaHeliothermDiagnosticSensorEntityDescription(
+        name="Modbus Empfangen",
+        key="modbus_bytes_received",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.bytes_received,
+    ),
+    "modbus_round_trip_mean": HaHeliothermDiagnosticSensorEntityDescription(
+        name="Modbus Antwortzeit Mittel",
+        key="modbus_round_trip_mean",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        value_fn=lambda stats: stats.round_trip_mean,
+    ),
+    "modbus_round_trip_p95": HaHeliothermDiagnosticSensorEntityDescription(
+        name="Modbus Antwortzeit P95",
+        key="modbus_round_trip_p95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        value_fn=lambda stats: stats.round_trip_percentile(0.95),
+    ),
+    "modbus_decode_mean": HaHeliothermDiagnosticSensorEntityDescription(
+        name="Modbus Dekodierzeit Mittel",
+        key="modbus_decode_mean",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=3,
+        value_fn=lambda stats: stats.decode.mean,
+    ),
+}
+
 
 BINARYSENSOR_TYPES: dict[str, list[HaHeliothermBinarySensorEntityDescription]] = {
     "on_off_heizkreispumpe": HaHeliothermBinarySensorEntityDescription(
@@ -393,3 +549,21 @@ BINARYSENSOR_TYPES: dict[str, list[HaHeliothermBinarySensorEntityDescription]] =
         key="kuehlen_umv_passiv",
     ),
 }
+
+DETECTION_BINARYSENSOR_TYPES: dict[str, HaHeliothermBinarySensorEntityDescription] = {
+    SHORT_CYCLE: HaHeliothermBinarySensorEntityDescription(
+        name="Kurztakten",
+        key=SHORT_CYCLE,
+        device_class=BinarySensorDeviceClass.PROBLEM,
+    ),
+    STUCK_SETPOINT: HaHeliothermBinarySensorEntityDescription(
+        name="Verdichter Sollwert hängt",
+        key=STUCK_SETPOINT,
+        device_class=BinarySensorDeviceClass.PROBLEM,
+    ),
+    PRESSURE_ANOMALY: HaHeliothermBinarySensorEntityDescription(
+        name="Druck Anomalie",
+        key=PRESSURE_ANOMALY,
+        device_class=BinarySensorDeviceClass.PROBLEM,
+    ),
+}
@@ -0,0 +1,159 @@
+"""Validation of the energy counters of a HaHeliotherm hub."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, MutableSequence
+import logging
+from typing import Any
+
+from .registers import DATATYPE_UINT32, HeliothermRegister, SnapshotLayout
+
+_LOGGER = logging.getLogger(__name__)
+
+# Readings that jump implausibly are accepted once confirmed this often,
+# e.g. after the counter was reset or replaced.
+CONFIRMATIONS = 3
+# Allowed increase on top of max_rate, covers the counter resolution.
+SLACK = 1.0
+# A decrease is a rollover if the counter was this close to wrapping.
+ROLLOVER_MARGIN = 0.1
+
+
+class CounterGuard:
+    """Keep a cumulative counter monotonic and free of glitches.
+
+    Accepted readings never decrease and grow at most max_rate per hour.
+    A reading just after the wrap value of the register continues the
+    counter across the rollover. Other jumps, like zeros or garbage read
+    after a reconnect, are rejected and the last accepted value is kept
+    until CONFIRMATIONS consistent readings show the jump is real. The
+    first reading is published at once, a rollover is only assumed once a
+    plausible increase confirmed it, so a glitched first frame is replaced
+    like any other jump.
+    """
+
+    __slots__ = (
+        "key",
+        "max_rate",
+        "wrap",
+        "rejected",
+        "_value",
+        "_time",
+        "_offset",
+        "_candidate",
+        "_candidate_time",
+        "_confirmations",
+        "_confirmed",
+    )
+
+    def __init__(self, key: str, max_rate: float, wrap: float | None) -> None:
+        """Initialize a guard without an accepted reading."""
+        self.key = key
+        self.max_rate = max_rate
+        self.wrap = wrap
+        self.rejected = 0
+        self._value: float | None = None
+        self._time = 0.0
+        self._offset = 0.0
+        self._candidate: float | None = None
+        self._candidate_time = 0.0
+        self._confirmations = 0
+        self._confirmed = False
+
+    def process(self, timestamp: float, reading: float | None) -> float | None:
+        """Return the value to publish for a reading."""
+        if reading is None:
+            return self._value
+        if self._value is None:
+            # Zeros are read after reconnects, a real zero must be confirmed.
+            if reading == 0 and not self._confirm(timestamp, reading):
+                return None
+            return self._accept(timestamp, reading)
+
+        value = reading + self._offset
+        if 0 <= value - self._value <= self._limit(timestamp - self._time):
+            self._confirmed = True
+            return self._accept(timestamp, value)
+        if self._confirmed and self._is_rollover(reading):
+            self._offset += self.wrap
+            _LOGGER.info("Counter %s rolled over", self.key)
+            return self._accept(timestamp, reading + self._offset)
+
+        self.rejected += 1
+        if self._confirm(timestamp, reading):
+            _LOGGER.warning(
+                "Counter %s jumped from %s to %s", self.key, self._value, reading
+            )
+            self._offset = 0.0
+            self._confirmed = True
+            return self._accept(timestamp, reading)
+        _LOGGER.debug("Rejected reading %s of counter %s", reading, self.key)
+        return self._value
+
+    def _limit(self, elapsed: float) -> float:
+        """Return the largest plausible increase within elapsed seconds."""
+        return self.max_rate * max(elapsed, 0) / 3600 + SLACK
+
+    def _is_rollover(self, reading: float) -> bool:
+        """Return True if the reading wrapped around the register size."""
+        return (
+            self.wrap is not None
+            and self._value - self._offset > self.wrap * (1 - ROLLOVER_MARGIN)
+            and reading < self.wrap * ROLLOVER_MARGIN
+        )
+
+    def _confirm(self, timestamp: float, reading: float) -> bool:
+        """Count a rejected reading, True once it was confirmed."""
+        if self._candidate is not None and 0 <= reading - self._candidate <= (
+            self._limit(timestamp - self._candidate_time)
+        ):
+            self._confirmations += 1
+        else:
+            self._confirmations = 1
+        self._candidate = reading
+        self._candidate_time = timestamp
+        return self._confirmations >= CONFIRMATIONS
+
+    def _accept(self, timestamp: float, value: float) -> float:
+        """Publish a value and forget pending candidates."""
+        self._value = value
+        self._time = timestamp
+        self._candidate = None
+        self._confirmations = 0
+        return value
+
+
+class CounterGuards:
+    """The guards of all monotonic registers, by snapshot slot."""
+
+    def __init__(
+        self, layout: SnapshotLayout, registers: Iterable[HeliothermRegister]
+    ) -> None:
+        """Create a guard for every monotonic register."""
+        self._guards = {
+            layout.slot(register.key, register.attribute): CounterGuard(
+                register.key,
+                register.max_rate,
+                (
+                    (1 << 32) * register.scale
+                    if register.data_type == DATATYPE_UINT32
+                    else None
+                ),
+            )
+            for register in registers
+            if register.monotonic
+        }
+
+    def process(
+        self, timestamp: float, values: MutableSequence[Any], slots: Iterable[int]
+    ) -> None:
+        """Replace the readings of the counters among slots by valid values."""
+        guards = self._guards
+        for slot in slots:
+            guard = guards.get(slot)
+            if guard is not None:
+                values[slot] = guard.process(timestamp, values[slot])
+
+    def rejected(self) -> dict[str, int]:
+        """Return the number of rejected readings per counter."""
+        return {guard.key: guard.rejected for guard in self._guards.values()}
@@ -0,0 +1,212 @@
+"""Short cycle and fault detection on the poll stream of a HaHeliotherm hub."""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Container, Sequence
+from typing import Any
+
+from .analytics import COMPRESSOR_KEY, COMPRESSOR_ON
+from .registers import SnapshotLayout
+
+FAULT_KEY = "on_off_stoerung"
+SETPOINT_KEY = "n_soll_verdichter"
+HIGH_PRESSURE_KEY = "bar_hochdruck"
+LOW_PRESSURE_KEY = "bar_niederdruck"
+HOT_GAS_KEY = "temp_heissgas"
+
+SHORT_CYCLE = "kurztakten"
+STUCK_SETPOINT = "verdichter_sollwert_haengt"
+PRESSURE_ANOMALY = "druck_anomalie"
+
+EVENT_SHORT_CYCLE = "short_cycle"
+EVENT_STUCK_SETPOINT = "stuck_setpoint"
+EVENT_PRESSURE_ANOMALY = "pressure_anomaly"
+EVENT_FAULT = "fault"
+EVENT_FAULT_CLEARED = "fault_cleared"
+
+# Register keys every detection is computed from.
+DETECTION_SOURCES: dict[str, tuple[str, ...]] = {
+    SHORT_CYCLE: (COMPRESSOR_KEY,),
+    STUCK_SETPOINT: (COMPRESSOR_KEY, SETPOINT_KEY),
+    PRESSURE_ANOMALY: (
+        COMPRESSOR_KEY,
+        HIGH_PRESSURE_KEY,
+        LOW_PRESSURE_KEY,
+        HOT_GAS_KEY,
+    ),
+}
+
+# A run shorter than this is a short cycle, in seconds.
+MIN_RUNTIME = 10 * 60
+MAX_STARTS_PER_HOUR = 3
+# Short cycling is reported until an hour without a short cycle passed.
+SHORT_CYCLE_HOLD = 3600
+STUCK_SETPOINT_SECONDS = 2 * 3600
+# Pressures are checked once the compressor ran this long, in seconds.
+PRESSURE_SETTLE_SECONDS = 5 * 60
+MAX_HIGH_PRESSURE = 35.0
+MIN_LOW_PRESSURE = 1.0
+MIN_PRESSURE_SPREAD = 3.0
+MAX_HOT_GAS_TEMPERATURE = 120.0
+
+
+class FaultDetector:
+    """Detect short cycles, stuck setpoints, pressure anomalies and faults.
+
+    Updated after every poll in constant time with bounded state: the
+    compressor starts of the last hour, the last setpoint change and the
+    previous register states. Only the checks whose registers were read by
+    the poll run, polls finishing after a newer one are ignored. Returns the
+    changed detection states and the events to fire.
+    """
+
+    def __init__(self, layout: SnapshotLayout) -> None:
+        """Initialize the detector for snapshots of layout."""
+        self._compressor_slot = layout.slot(COMPRESSOR_KEY)
+        self._fault_slot = layout.slot(FAULT_KEY)
+        self._setpoint_slot = layout.slot(SETPOINT_KEY)
+        self._high_slot = layout.slot(HIGH_PRESSURE_KEY)
+        self._low_slot = layout.slot(LOW_PRESSURE_KEY)
+        self._hot_gas_slot = layout.slot(HOT_GAS_KEY)
+        self.states: dict[str, bool | None] = dict.fromkeys(DETECTION_SOURCES)
+        self._compressor: str | None = None
+        self._run_started: float | None = None
+        # False for a run already going on when the detector started.
+        self._run_observed = False
+        self._starts: deque[float] = deque(maxlen=MAX_STARTS_PER_HOUR + 1)
+        self._last_short_cycle: float | None = None
+        self._setpoint: Any = None
+        self._setpoint_since: float | None = None
+        self._fault: str | None = None
+        self._last_time: float | None = None
+
+    def update(
+        self, timestamp: float, values: Sequence[Any], slots: Container[int]
+    ) -> tuple[set[str], list[dict[str, Any]]]:
+        """Check the slots a poll read, return the changed states and new events."""
+        if self._last_time is not None and timestamp < self._last_time:
+            return set(), []
+        self._last_time = timestamp
+        previous = dict(self.states)
+        events: list[dict[str, Any]] = []
+        compressor = values[self._compressor_slot]
+        if compressor is not None:
+            if self._compressor_slot in slots:
+                self._check_cycles(timestamp, compressor, events)
+                self._compressor = compressor
+            if self._setpoint_slot in slots:
+                self._check_setpoint(timestamp, values[self._setpoint_slot], events)
+            if (
+                self._high_slot in slots
+                or self._low_slot in slots
+                or self._hot_gas_slot in slots
+            ):
+                self._check_pressures(timestamp, values, events)
+        if self._fault_slot in slots:
+            self._check_fault(values[self._fault_slot], events)
+        changed = {key for key, state in self.states.items() if previous[key] != state}
+        return changed, events
+
+    def _check_cycles(
+        self, timestamp: float, compressor: str, events: list[dict[str, Any]]
+    ) -> None:
+        """Detect runs shorter than MIN_RUNTIME and too many starts."""
+        starts = self._starts
+        if compressor == COMPRESSOR_ON and self._compressor is None:
+            self._run_started = timestamp
+            self._run_observed = False
+        elif compressor == COMPRESSOR_ON and self._compressor != COMPRESSOR_ON:
+            self._run_started = timestamp
+            self._run_observed = True
+            starts.append(timestamp)
+            if (
+                len(starts) > MAX_STARTS_PER_HOUR
+                and timestamp - starts[0] <= SHORT_CYCLE_HOLD
+            ):
+                self._last_short_cycle = timestamp
+                events.append(
+                    {"type": EVENT_SHORT_CYCLE, "starts_per_hour": len(starts)}
+                )
+        elif compressor != COMPRESSOR_ON and self._compressor == COMPRESSOR_ON:
+            if self._run_observed and timestamp - self._run_started < MIN_RUNTIME:
+                self._last_short_cycle = timestamp
+                events.append(
+                    {
+                        "type": EVENT_SHORT_CYCLE,
+                        "runtime": round(timestamp - self._run_started),
+                    }
+                )
+            self._run_started = None
+        self.states[SHORT_CYCLE] = (
+            self._last_short_cycle is not None
+            and timestamp - self._last_short_cycle < SHORT_CYCLE_HOLD
+        )
+
+    def _check_setpoint(
+        self, timestamp: float, setpoint: Any, events: list[dict[str, Any]]
+    ) -> None:
+        """Detect a compressor setpoint that did not change during a long run."""
+        if self._run_started is None or setpoint != self._setpoint:
+            self._setpoint = setpoint
+            self._setpoint_since = timestamp
+        stuck = (
+            setpoint is not None
+            and self._run_started is not None
+            and timestamp - self._setpoint_since >= STUCK_SETPOINT_SECONDS
+        )
+        if stuck and not self.states[STUCK_SETPOINT]:
+            events.append(
+                {
+                    "type": EVENT_STUCK_SETPOINT,
+                    "setpoint": setpoint,
+                    "since": round(timestamp - self._setpoint_since),
+                }
+            )
+        self.states[STUCK_SETPOINT] = stuck
+
+    def _check_pressures(
+        self, timestamp: float, values: Sequence[Any], events: list[dict[str, Any]]
+    ) -> None:
+        """Detect pressures and hot gas temperatures out of range."""
+        high = values[self._high_slot]
+        low = values[self._low_slot]
+        hot_gas = values[self._hot_gas_slot]
+        reasons = []
+        if high is not None and high > MAX_HIGH_PRESSURE:
+            reasons.append("high_pressure")
+        if hot_gas is not None and hot_gas > MAX_HOT_GAS_TEMPERATURE:
+            reasons.append("hot_gas")
+        if (
+            self._run_started is not None
+            and timestamp - self._run_started >= PRESSURE_SETTLE_SECONDS
+        ):
+            if low is not None and low < MIN_LOW_PRESSURE:
+                reasons.append("low_pressure")
+            if (
+                high is not None
+                and low is not None
+                and high - low < MIN_PRESSURE_SPREAD
+            ):
+                reasons.append("pressure_spread")
+        if reasons and not self.states[PRESSURE_ANOMALY]:
+            events.append(
+                {
+                    "type": EVENT_PRESSURE_ANOMALY,
+                    "reasons": reasons,
+                    HIGH_PRESSURE_KEY: high,
+                    LOW_PRESSURE_KEY: low,
+                    HOT_GAS_KEY: hot_gas,
+                }
+            )
+        self.states[PRESSURE_ANOMALY] = bool(reasons)
+
+    def _check_fault(self, fault: str | None, events: list[dict[str, Any]]) -> None:
+        """Report switches of the fault register."""
+        if fault is None:
+            return
+        if self._fault is not None and fault != self._fault:
+            events.append(
+                {"type": EVENT_FAULT if fault == "on" else EVENT_FAULT_CLEARED}
+            )
+        self._fault = fault
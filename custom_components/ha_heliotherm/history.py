@@ -0,0 +1,298 @@
+"""In-memory register history of a HaHeliotherm hub."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Callable, Iterable, Mapping, Sequence
+import math
+from typing import Any
+
+from .registers import HeliothermRegister
+
+RESOLUTION_AUTO = "auto"
+RESOLUTION_RAW = "raw"
+
+# Name, bucket width in seconds and number of buckets kept per register.
+DOWNSAMPLE_TIERS: tuple[tuple[str, int, int], ...] = (
+    ("5min", 300, 2 * 24 * 12),
+    ("1h", 3600, 30 * 24),
+)
+RESOLUTIONS = (
+    RESOLUTION_AUTO,
+    RESOLUTION_RAW,
+    *(name for name, _width, _capacity in DOWNSAMPLE_TIERS),
+)
+
+
+class RingBuffer:
+    """Fixed capacity buffer of samples, the oldest sample is overwritten.
+
+    Timestamps and values live in two preallocated arrays, the memory per
+    buffer does not grow with the number of samples.
+    """
+
+    __slots__ = ("_times", "_values", "_next", "_count")
+
+    def __init__(self, capacity: int) -> None:
+        """Initialize an empty buffer for capacity samples."""
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Return the number of stored samples."""
+        return self._count
+
+    @property
+    def capacity(self) -> int:
+        """Return the number of samples the buffer holds."""
+        return len(self._times)
+
+    def covers(self, start: float) -> bool:
+        """Return True if no sample since start was overwritten."""
+        if self._count < self.capacity:
+            return True
+        return self._times[self._next] <= start
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Store a sample, timestamps must not decrease."""
+        self._times[self._next] = timestamp
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def samples(
+        self, start: float = -math.inf, end: float = math.inf
+    ) -> list[tuple[float, float]]:
+        """Return the samples between start and end, oldest first."""
+        capacity = self.capacity
+        first = self._next - self._count
+        return [
+            (self._times[index], self._values[index])
+            for index in ((first + offset) % capacity for offset in range(self._count))
+            if start <= self._times[index] <= end
+        ]
+
+    def resized(self, capacity: int) -> RingBuffer:
+        """Return a buffer of another capacity holding the newest samples."""
+        buffer = RingBuffer(capacity)
+        for timestamp, value in self.samples()[-capacity:]:
+            buffer.append(timestamp, value)
+        return buffer
+
+
+class BucketBuffer:
+    """Fixed number of min/max/mean buckets of a fixed width in seconds."""
+
+    __slots__ = (
+        "width",
+        "_starts",
+        "_minimums",
+        "_maximums",
+        "_means",
+        "_next",
+        "_count",
+        "_start",
+        "_minimum",
+        "_maximum",
+        "_total",
+        "_samples",
+    )
+
+    def __init__(self, width: int, capacity: int) -> None:
+        """Initialize an empty buffer for capacity closed buckets."""
+        self.width = width
+        self._starts = array("d", bytes(8 * capacity))
+        self._minimums = array("d", bytes(8 * capacity))
+        self._maximums = array("d", bytes(8 * capacity))
+        self._means = array("d", bytes(8 * capacity))
+        self._next = 0
+        self._count = 0
+        self._start: float | None = None
+        self._minimum = self._maximum = self._total = 0.0
+        self._samples = 0
+
+    def covers(self, start: float) -> bool:
+        """Return True if no bucket since start was overwritten."""
+        if self._count < len(self._starts):
+            return True
+        return self._starts[self._next] <= start
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Add a sample to its bucket, closing the previous bucket if needed."""
+        start = timestamp - timestamp % self.width
+        if start != self._start:
+            self._close()
+            self._start = start
+            self._minimum = self._maximum = self._total = value
+            self._samples = 1
+            return
+        if value < self._minimum:
+            self._minimum = value
+        elif value > self._maximum:
+            self._maximum = value
+        self._total += value
+        self._samples += 1
+
+    def _close(self) -> None:
+        """Move the open bucket into the buffer."""
+        if not self._samples:
+            return
+        index = self._next
+        self._starts[index] = self._start
+        self._minimums[index] = self._minimum
+        self._maximums[index] = self._maximum
+        self._means[index] = self._total / self._samples
+        self._next = (index + 1) % len(self._starts)
+        if self._count < len(self._starts):
+            self._count += 1
+
+    def buckets(
+        self, start: float = -math.inf, end: float = math.inf
+    ) -> list[tuple[float, float, float, float]]:
+        """Return start, min, max and mean of the buckets, oldest first.
+
+        The open bucket of the current period is included.
+        """
+        capacity = len(self._starts)
+        first = self._next - self._count
+        buckets = [
+            (
+                self._starts[index],
+                self._minimums[index],
+                self._maximums[index],
+                self._means[index],
+            )
+            for index in ((first + offset) % capacity for offset in range(self._count))
+            if start <= self._starts[index] + self.width and self._starts[index] <= end
+        ]
+        if self._samples and start <= self._start + self.width and self._start <= end:
+            buckets.append(
+                (
+                    self._start,
+                    self._minimum,
+                    self._maximum,
+                    self._total / self._samples,
+                )
+            )
+        return buckets
+
+
+def sample_converter(
+    register: HeliothermRegister,
+) -> Callable[[Any], float | None]:
+    """Return the conversion of a decoded value into a history sample.
+
+    Option values are stored as their register code, the default option
+    of registers without a code for it as 1.
+    """
+    if register.codec is not None:
+        codes = dict(register.codec.codes)
+    elif register.options is not None:
+        codes = {label: code for code, label in register.options.items()}
+        codes.setdefault(register.default_option, 1)
+    else:
+        return lambda value: None if value is None else float(value)
+    return codes.get
+
+
+class RegisterHistory:
+    """Raw and downsampled history of every decoded snapshot slot.
+
+    Raw samples of a slot cover the configured window at the poll interval
+    of its register, older data is only kept in the downsampled tiers.
+    Recording a poll costs constant time per read slot.
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[tuple[str, str | None]],
+        registers: Iterable[HeliothermRegister],
+        window: float,
+        intervals: Mapping[str, float],
+    ) -> None:
+        """Initialize empty buffers for the slots of the registers."""
+        self.window = window
+        self._names = {
+            slot: key if attribute is None else f"{key}.{attribute}"
+            for slot, (key, attribute) in enumerate(fields)
+        }
+        self._slots = {name: slot for slot, name in self._names.items()}
+        self._tiers: dict[int, str] = {}
+        self._converters: dict[int, Callable[[Any], float | None]] = {}
+        for register in registers:
+            slot = fields.index((register.key, register.attribute))
+            self._tiers[slot] = register.poll_tier
+            self._converters[slot] = sample_converter(register)
+        self._raw: dict[int, RingBuffer] = {}
+        self._buckets = {
+            slot: tuple(
+                BucketBuffer(width, capacity)
+                for _name, width, capacity in DOWNSAMPLE_TIERS
+            )
+            for slot in self._tiers
+        }
+        self.configure(window, intervals)
+
+    @property
+    def names(self) -> list[str]:
+        """Return the names of the recorded series."""
+        return list(self._slots)
+
+    def configure(self, window: float, intervals: Mapping[str, float]) -> None:
+        """Size the raw buffers for window seconds at the poll intervals."""
+        self.window = window
+        for slot, tier in self._tiers.items():
+            capacity = max(1, math.ceil(window / intervals[tier]))
+            raw = self._raw.get(slot)
+            if raw is None:
+                self._raw[slot] = RingBuffer(capacity)
+            elif raw.capacity != capacity:
+                self._raw[slot] = raw.resized(capacity)
+
+    def record(self, timestamp: float, values: Sequence[Any], slots: Iterable[int]):
+        """Add the values of the slots read by a poll."""
+        for slot in slots:
+            sample = self._converters[slot](values[slot])
+            if sample is None:
+                continue
+            self._raw[slot].append(timestamp, sample)
+            for buckets in self._buckets[slot]:
+                buckets.add(timestamp, sample)
+
+    def resolution_for(self, names: Iterable[str], start: float) -> str:
+        """Return the finest resolution covering start for all series."""
+        slots = [self._slots[name] for name in names if name in self._slots]
+        if all(self._raw[slot].covers(start) for slot in slots):
+            return RESOLUTION_RAW
+        for index, (name, _width, _capacity) in enumerate(DOWNSAMPLE_TIERS):
+            if all(self._buckets[slot][index].covers(start) for slot in slots):
+                return name
+        return DOWNSAMPLE_TIERS[-1][0]
+
+    def query(
+        self,
+        names: Iterable[str],
+        resolution: str,
+        start: float = -math.inf,
+        end: float = math.inf,
+    ) -> dict[str, list[tuple[float, ...]]]:
+        """Return the samples or buckets of the named series.
+
+        Raw series are lists of (timestamp, value), downsampled series lists
+        of (start, min, max, mean). Unknown names are left out.
+        """
+        series = {}
+        for name in names:
+            slot = self._slots.get(name)
+            if slot is None:
+                continue
+            if resolution == RESOLUTION_RAW:
+                series[name] = self._raw[slot].samples(start, end)
+                continue
+            for index, (tier_name, _width, _capacity) in enumerate(DOWNSAMPLE_TIERS):
+                if tier_name == resolution:
+                    series[name] = self._buckets[slot][index].buckets(start, end)
+        return series
@@ -1,5 +1,5 @@
-from homeassistant.core import callback
 from homeassistant.components.number import NumberEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.components.input_number import (
     InputNumber,
     CONF_NAME,
@@ -50,7 +50,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     return True
 
 
-class HaHeliothermModbusNumber(NumberEntity):
+class HaHeliothermModbusNumber(CoordinatorEntity, NumberEntity):
     """Representation of an Heliotherm Modbus number."""
 
     def __init__(
@@ -61,23 +61,14 @@ class HaHeliothermModbusNumber(NumberEntity):
         description: HaHeliothermNumberEntityDescription,
     ):
         """Initialize the sensor."""
+        super().__init__(hub, context=description.key)
         self._platform_name = platform_name
         self._attr_device_info = device_info
         self._hub = hub
         self.entity_description: HaHeliothermNumberEntityDescription = description
+        self._value_slot = hub.snapshot_layout.slot(description.key)
         self._attr_mode = description.mode
 
-    async def async_added_to_hass(self):
-        """Register callbacks."""
-        self._hub.async_add_haheliotherm_modbus_sensor(self._modbus_data_updated)
-
-    async def async_will_remove_from_hass(self) -> None:
-        self._hub.async_remove_haheliotherm_modbus_sensor(self._modbus_data_updated)
-
-    @callback
-    def _modbus_data_updated(self):
-        self.async_write_ha_state()
-
     @property
     def name(self):
         """Return the name."""
@@ -90,11 +81,7 @@ class HaHeliothermModbusNumber(NumberEntity):
     @property
     def native_value(self):
         """Return the state of the sensor."""
-        return (
-            self._hub.data[self.entity_description.key]
-            if self.entity_description.key in self._hub.data
-            else None
-        )
+        return self._hub.data[self._value_slot]
 
     def set_native_value(self, value: float) -> None:
         self._attr_value = value
@@ -0,0 +1,128 @@
+"""Plausibility checks applied to the values of a HaHeliotherm hub while decoding."""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .registers import HeliothermRegister
+
+_LOGGER = logging.getLogger(__name__)
+
+# Implausible readings are replaced by the last valid value until they
+# occurred this often in a row.
+CONFIRMATIONS = 3
+
+
+class ValueFilter:
+    """Reject outliers of one numeric register.
+
+    A reading outside minimum and maximum is never published. With
+    spike_filter the median of the last three readings is published, which
+    removes single sample spikes. A change faster than max_rate per hour is
+    accepted once CONFIRMATIONS readings in a row agree on the new level.
+    Rejected readings keep the last valid value, after CONFIRMATIONS of
+    them in a row the value is None until readings are plausible again.
+    """
+
+    __slots__ = (
+        "key",
+        "minimum",
+        "maximum",
+        "max_rate",
+        "spike_filter",
+        "rejected",
+        "_value",
+        "_time",
+        "_window",
+        "_invalid",
+        "_candidate",
+        "_candidate_time",
+    )
+
+    def __init__(self, register: HeliothermRegister) -> None:
+        """Initialize the filter with the limits of a register."""
+        self.key = register.key
+        self.minimum = register.minimum
+        self.maximum = register.maximum
+        # Counters are kept monotonic by their CounterGuard instead.
+        self.max_rate = None if register.monotonic else register.max_rate
+        self.spike_filter = register.spike_filter
+        self.rejected = 0
+        self._value: float | None = None
+        self._time = 0.0
+        self._window: list[float] = []
+        self._invalid = 0
+        self._candidate: float | None = None
+        self._candidate_time = 0.0
+
+    def process(self, timestamp: float, reading: float | None) -> float | None:
+        """Return the value to publish for a reading."""
+        if reading is None:
+            self._window.clear()
+            return self._accept(timestamp, None)
+        if (self.minimum is not None and reading < self.minimum) or (
+            self.maximum is not None and reading > self.maximum
+        ):
+            _LOGGER.debug("Reading %s of %s is out of range", reading, self.key)
+            self._candidate = None
+            return self._reject()
+
+        if self.spike_filter:
+            window = self._window
+            window.append(reading)
+            if len(window) > 3:
+                del window[0]
+            if len(window) == 3:
+                reading = sorted(window)[1]
+
+        if (
+            self.max_rate is None
+            or self._value is None
+            or self._within_rate(reading, self._value, timestamp - self._time)
+        ):
+            return self._accept(timestamp, reading)
+        if (
+            self._candidate is not None
+            and self._within_rate(
+                reading, self._candidate, timestamp - self._candidate_time
+            )
+            and self._invalid + 1 >= CONFIRMATIONS
+        ):
+            _LOGGER.debug("Accepted %s of %s after a jump", reading, self.key)
+            return self._accept(timestamp, reading)
+        _LOGGER.debug("Reading %s of %s changed too fast", reading, self.key)
+        self._candidate = reading
+        self._candidate_time = timestamp
+        return self._reject()
+
+    def _within_rate(self, reading: float, value: float, elapsed: float) -> bool:
+        """Return True if reading is reachable from value within elapsed seconds."""
+        return abs(reading - value) <= self.max_rate * max(elapsed, 0) / 3600
+
+    def _reject(self) -> float | None:
+        """Count a rejected reading and return the value to keep."""
+        self.rejected += 1
+        self._invalid += 1
+        if self._invalid >= CONFIRMATIONS:
+            return None
+        return self._value
+
+    def _accept(self, timestamp: float, value: float | None) -> float | None:
+        """Publish a value and forget rejected readings."""
+        self._value = value
+        self._time = timestamp
+        self._invalid = 0
+        self._candidate = None
+        return value
+
+
+def has_limits(register: HeliothermRegister) -> bool:
+    """Return True if readings of the register need a ValueFilter."""
+    return (
+        register.minimum is not None
+        or register.maximum is not None
+        or register.spike_filter
+        or (register.max_rate is not None and not register.monotonic)
+    )
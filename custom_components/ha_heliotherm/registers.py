@@ -0,0 +1,732 @@
+"""Register map and decoder for the Heliotherm Modbus interface."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from enum import IntEnum
+from functools import lru_cache
+from operator import itemgetter
+import logging
+import struct
+from types import MappingProxyType
+from typing import Any
+
+from .plausibility import ValueFilter, has_limits
+
+_LOGGER = logging.getLogger(__name__)
+
+REGISTER_INPUT = "input"
+REGISTER_HOLDING = "holding"
+
+DATATYPE_INT16 = "int16"
+DATATYPE_UINT32 = "uint32"
+
+SENTINEL_MISSING = -50.0
+# Highest plausible increase of an energy counter in kWh per hour.
+MAX_COUNTER_RATE = 100.0
+# Plausible temperatures in °C.
+MIN_TEMPERATURE = -40.0
+MAX_TEMPERATURE = 100.0
+MAX_OUTDOOR_TEMPERATURE = 60.0
+# Highest plausible change of a temperature in K per hour. The outdoor air
+# changes slowly, storage tanks faster while tapping, the water circuits
+# jump by 10 K and more within a poll at compressor start or defrost end.
+OUTDOOR_TEMPERATURE_RATE = 30.0
+STORAGE_TEMPERATURE_RATE = 600.0
+CIRCUIT_TEMPERATURE_RATE = 3600.0
+
+POLL_FAST = "fast"
+POLL_NORMAL = "normal"
+POLL_SLOW = "slow"
+POLL_TIERS = (POLL_FAST, POLL_NORMAL, POLL_SLOW)
+
+ON_OFF_OPTIONS = {0: "off"}
+OFF_ON_OPTIONS = {0: "on"}
+
+
+class OptionCodec:
+    """Bidirectional lookup between register codes and option labels.
+
+    Both directions are precomputed dicts. Codes without a label are
+    logged once per code and decoded to None, instead of being mapped to
+    a made up label.
+    """
+
+    def __init__(self, name: str, labels: Mapping[int, str]) -> None:
+        """Build the lookup tables from the code to label mapping."""
+        self.name = name
+        self.labels: Mapping[int, str] = MappingProxyType(
+            {int(code): label for code, label in labels.items()}
+        )
+        self.codes: Mapping[str, int] = MappingProxyType(
+            {label: code for code, label in self.labels.items()}
+        )
+        self.options: list[str] = list(self.labels.values())
+        self._reported: set[int] = set()
+
+    def decode(self, code: int) -> str | None:
+        """Return the label of a register code."""
+        label = self.labels.get(code)
+        if label is None:
+            self._report_unknown(code)
+        return label
+
+    def decode_all(self, codes: Iterable[int]) -> list[str | None]:
+        """Return the labels of several register codes."""
+        labels = self.labels
+        return [
+            labels[code] if code in labels else self._report_unknown(code)
+            for code in codes
+        ]
+
+    def encode(self, label: str) -> int:
+        """Return the register code of a label, raise ValueError if unknown."""
+        try:
+            return self.codes[label]
+        except KeyError:
+            raise ValueError(f"Unknown {self.name} option: {label}") from None
+
+    def _report_unknown(self, code: int) -> None:
+        if code not in self._reported:
+            self._reported.add(code)
+            _LOGGER.warning("Unknown %s code %s", self.name, code)
+
+
+class Betriebsart(IntEnum):
+    """Operating mode codes of the heating circuits."""
+
+    AUS = 0
+    AUTO = 1
+    KUEHLEN = 2
+    SOMMER = 3
+    DAUERBETRIEB = 4
+    ABSENKEN = 5
+    URLAUB = 6
+    PARTY = 7
+
+
+class Verdichteranforderung(IntEnum):
+    """Reason codes of a compressor request."""
+
+    KEINE = 0
+    KUEHLEN = 10
+    HEIZEN = 20
+    WARMWASSER = 30
+    EXTERNE_ANFORDERUNG = 40
+
+
+BETRIEBSART = OptionCodec(
+    "Betriebsart",
+    {
+        Betriebsart.AUS: "Aus",
+        Betriebsart.AUTO: "Auto",
+        Betriebsart.KUEHLEN: "Kühlen",
+        Betriebsart.SOMMER: "Sommer",
+        Betriebsart.DAUERBETRIEB: "Dauerbetrieb",
+        Betriebsart.ABSENKEN: "Absenken",
+        Betriebsart.URLAUB: "Urlaub",
+        Betriebsart.PARTY: "Party",
+    },
+)
+
+VERDICHTERANFORDERUNG = OptionCodec(
+    "Verdichteranforderung",
+    {
+        Verdichteranforderung.KEINE: "Keine",
+        Verdichteranforderung.KUEHLEN: "Kühlen",
+        Verdichteranforderung.HEIZEN: "Heizen",
+        Verdichteranforderung.WARMWASSER: "Warmwasser",
+        Verdichteranforderung.EXTERNE_ANFORDERUNG: "Externe Anforderung",
+    },
+)
+
+
+@dataclass(frozen=True)
+class HeliothermRegister:
+    """Describes how one value is decoded from the Modbus register map."""
+
+    key: str
+    address: int
+    register_type: str = REGISTER_INPUT
+    data_type: str = DATATYPE_INT16
+    scale: float = 0.1
+    sentinel: float | None = SENTINEL_MISSING
+    options: Mapping[int, str] | None = None
+    default_option: str | None = None
+    codec: OptionCodec | None = None
+    attribute: str | None = None
+    poll_tier: str = POLL_NORMAL
+    monotonic: bool = False
+    # Plausibility limits of the scaled value, max_rate is per hour.
+    minimum: float | None = None
+    maximum: float | None = None
+    max_rate: float | None = None
+    spike_filter: bool = False
+
+    @property
+    def count(self) -> int:
+        """Return the number of 16 bit registers occupied by the value."""
+        return 2 if self.data_type == DATATYPE_UINT32 else 1
+
+
+def _on_off(
+    key: str, address: int, inverted: bool = False, poll_tier: str = POLL_NORMAL
+) -> HeliothermRegister:
+    return HeliothermRegister(
+        key=key,
+        address=address,
+        options=OFF_ON_OPTIONS if inverted else ON_OFF_OPTIONS,
+        default_option="off" if inverted else "on",
+        poll_tier=poll_tier,
+    )
+
+
+def _temperature(
+    key: str,
+    address: int,
+    max_rate: float | None,
+    maximum: float = MAX_TEMPERATURE,
+    attribute: str | None = None,
+) -> HeliothermRegister:
+    return HeliothermRegister(
+        key=key,
+        address=address,
+        attribute=attribute,
+        minimum=MIN_TEMPERATURE,
+        maximum=maximum,
+        max_rate=max_rate,
+    )
+
+
+def _counter(
+    key: str,
+    address: int,
+    scale: float = 1,
+    poll_tier: str = POLL_SLOW,
+    monotonic: bool = True,
+) -> HeliothermRegister:
+    return HeliothermRegister(
+        key=key,
+        address=address,
+        data_type=DATATYPE_UINT32,
+        scale=scale,
+        sentinel=None,
+        poll_tier=poll_tier,
+        monotonic=monotonic,
+        max_rate=MAX_COUNTER_RATE if monotonic else None,
+    )
+
+
+def _betriebsart(key: str, address: int) -> HeliothermRegister:
+    return HeliothermRegister(
+        key=key,
+        address=address,
+        register_type=REGISTER_HOLDING,
+        codec=BETRIEBSART,
+        poll_tier=POLL_SLOW,
+    )
+
+
+def _setpoint(key: str, address: int, attribute: str) -> HeliothermRegister:
+    return HeliothermRegister(
+        key=key,
+        address=address,
+        register_type=REGISTER_HOLDING,
+        attribute=attribute,
+        poll_tier=POLL_SLOW,
+    )
+
+
+REGISTERS: tuple[HeliothermRegister, ...] = (
+    _temperature(
+        "temp_aussen", 10, OUTDOOR_TEMPERATURE_RATE, maximum=MAX_OUTDOOR_TEMPERATURE
+    ),
+    _temperature("temp_brauchwasser", 11, STORAGE_TEMPERATURE_RATE),
+    _temperature("temp_vorlauf", 12, CIRCUIT_TEMPERATURE_RATE),
+    _temperature("temp_ruecklauf", 13, CIRCUIT_TEMPERATURE_RATE),
+    _temperature("temp_pufferspeicher", 14, STORAGE_TEMPERATURE_RATE),
+    _temperature(
+        "temp_eq_eintritt",
+        15,
+        CIRCUIT_TEMPERATURE_RATE,
+        maximum=MAX_OUTDOOR_TEMPERATURE,
+    ),
+    _temperature(
+        "temp_eq_austritt",
+        16,
+        CIRCUIT_TEMPERATURE_RATE,
+        maximum=MAX_OUTDOOR_TEMPERATURE,
+    ),
+    # The refrigerant temperatures change within seconds when the
+    # compressor starts or stops.
+    _temperature("temp_sauggas", 17, None),
+    _temperature("temp_verdampfung", 18, None),
+    _temperature("temp_kodensation", 19, None),
+    _temperature("temp_heissgas", 20, None, maximum=150.0),
+    HeliothermRegister(
+        "bar_niederdruck", 21, minimum=0.0, maximum=40.0, spike_filter=True
+    ),
+    HeliothermRegister(
+        "bar_hochdruck", 22, minimum=0.0, maximum=60.0, spike_filter=True
+    ),
+    _on_off("on_off_heizkreispumpe", 23),
+    _on_off("on_off_pufferladepumpe", 24),
+    _on_off("on_off_verdichter", 25, poll_tier=POLL_FAST),
+    _on_off("on_off_stoerung", 26, poll_tier=POLL_FAST),
+    HeliothermRegister(
+        "vierwegeventil_luft",
+        27,
+        options={0: "Aus"},
+        default_option="Abtaubetrieb",
+    ),
+    HeliothermRegister(
+        "wmz_durchfluss", 28, minimum=0.0, maximum=1000.0, spike_filter=True
+    ),
+    HeliothermRegister(
+        "n_soll_verdichter",
+        29,
+        scale=1,
+        poll_tier=POLL_FAST,
+        minimum=0,
+        maximum=1000,
+    ),
+    HeliothermRegister("cop", 30, minimum=0.0, maximum=20.0),
+    # Follows the tapping of the fresh water station.
+    _temperature("temp_frischwasser", 31, CIRCUIT_TEMPERATURE_RATE),
+    _on_off("on_off_evu_sperre", 32, inverted=True),
+    _temperature(
+        "temp_aussen_verzoegert",
+        33,
+        OUTDOOR_TEMPERATURE_RATE,
+        maximum=MAX_OUTDOOR_TEMPERATURE,
+    ),
+    # Setpoints change in steps.
+    _temperature("hkr_solltemperatur", 34, None),
+    _temperature("mkr1_solltemperatur", 35, None),
+    _temperature("mkr2_solltemperatur", 36, None),
+    _on_off("on_off_eq_ventilator", 37),
+    _on_off("ww_vorrang", 38),
+    _on_off("kuehlen_umv_passiv", 39),
+    HeliothermRegister("expansionsventil", 40, minimum=0.0, maximum=1000.0),
+    HeliothermRegister(
+        "verdichteranforderung",
+        41,
+        codec=VERDICHTERANFORDERUNG,
+    ),
+    _counter("wmz_heizung", 60),
+    _counter("stromz_heizung", 62),
+    _counter("wmz_brauchwasser", 64),
+    _counter("stromz_brauchwasser", 66),
+    _counter("stromz_gesamt", 68),
+    _counter("stromz_leistung", 70, poll_tier=POLL_FAST, monotonic=False),
+    _counter("wmz_gesamt", 72),
+    _counter("wmz_leistung", 74, scale=0.1, poll_tier=POLL_FAST, monotonic=False),
+    _betriebsart("select_betriebsart", 100),
+    _betriebsart("select_mkr1_betriebsart", 107),
+    _betriebsart("select_mkr2_betriebsart", 112),
+    _setpoint("climate_hkr_raum_soll", 101, "temperature"),
+    _setpoint("climate_rl_soll", 102, "temperature"),
+    _setpoint("climate_rlt_kuehlen", 104, "temperature"),
+    _setpoint("climate_ww_bereitung", 105, "target_temp_high"),
+    _setpoint("climate_ww_bereitung", 106, "target_temp_low"),
+    _temperature(
+        "climate_ww_bereitung", 11, STORAGE_TEMPERATURE_RATE, attribute="temperature"
+    ),
+)
+
+# Address ranges documented by Heliotherm. Reads never span two of them,
+# gateways answer with an exception for the undocumented gaps in between.
+READ_BLOCKS: tuple[tuple[str, int, int], ...] = (
+    (REGISTER_INPUT, 10, 32),
+    (REGISTER_INPUT, 60, 16),
+    (REGISTER_HOLDING, 100, 27),
+)
+
+# Maximum number of registers in a single read request (Modbus PDU limit).
+MAX_READ_COUNT = 125
+# Maximum number of registers in a single write multiple registers request.
+MAX_WRITE_COUNT = 123
+# Largest useful gap for merging reads, no documented block is longer.
+MAX_READ_GAP = max(count for _register_type, _address, count in READ_BLOCKS)
+
+
+def _read_block_index(register: HeliothermRegister) -> int:
+    """Return the index of the documented block containing the register."""
+    for index, (register_type, address, count) in enumerate(READ_BLOCKS):
+        if (
+            register.register_type == register_type
+            and address <= register.address
+            and register.address + register.count <= address + count
+        ):
+            return index
+    raise ValueError(f"Register {register.key} is outside the documented blocks")
+
+
+def plan_read_blocks(
+    registers: Iterable[HeliothermRegister],
+    max_gap: int,
+    max_count: int = MAX_READ_COUNT,
+) -> tuple[tuple[str, int, int], ...]:
+    """Return the smallest set of read requests covering the registers.
+
+    Adjacent ranges are merged when at most max_gap unused registers lie
+    between them and the merged request stays within max_count registers.
+    """
+    spans = sorted(
+        {
+            (_read_block_index(register), register.address, register.count)
+            for register in registers
+        }
+    )
+    blocks: list[tuple[str, int, int]] = []
+    current_index = current_start = current_end = None
+    for index, address, count in spans:
+        end = address + count
+        if (
+            index == current_index
+            and address - current_end <= max_gap
+            and max(end, current_end) - current_start <= max_count
+        ):
+            current_end = max(end, current_end)
+            continue
+        if current_index is not None:
+            blocks.append(
+                (
+                    READ_BLOCKS[current_index][0],
+                    current_start,
+                    current_end - current_start,
+                )
+            )
+        current_index, current_start, current_end = index, address, end
+    if current_index is not None:
+        blocks.append(
+            (READ_BLOCKS[current_index][0], current_start, current_end - current_start)
+        )
+    return tuple(blocks)
+
+
+def plan_write_blocks(
+    values: Mapping[int, int], max_count: int = MAX_WRITE_COUNT
+) -> list[tuple[int, list[int]]]:
+    """Merge register writes into runs of consecutive addresses."""
+    blocks: list[tuple[int, list[int]]] = []
+    for address in sorted(values):
+        if blocks:
+            start, run = blocks[-1]
+            if address == start + len(run) and len(run) < max_count:
+                run.append(values[address])
+                continue
+        blocks.append((address, [values[address]]))
+    return blocks
+
+
+def _compile(register: HeliothermRegister) -> Callable[[Sequence[int]], list]:
+    """Build the conversion of a group of registers sharing one description.
+
+    The function converts all unpacked values of the group in one
+    comprehension, registers with equal scale, sentinel and options share
+    the same function.
+    """
+    if register.codec is not None:
+        return register.codec.decode_all
+
+    if register.options is not None:
+        options = register.options
+        default = register.default_option
+
+        def convert_options(values: Sequence[int]) -> list:
+            return [options.get(value, default) for value in values]
+
+        return convert_options
+
+    scale = register.scale
+    sentinel = register.sentinel
+    divisor = round(1 / scale)
+
+    if scale == 1:
+
+        def scale_values(values: Sequence[int]) -> list:
+            return list(values)
+
+    elif divisor * scale == 1:
+        # value / 10 is the same float as round(value * 0.1, 1), but cheaper.
+
+        def scale_values(values: Sequence[int]) -> list:
+            return [value / divisor for value in values]
+
+    else:
+
+        def scale_values(values: Sequence[int]) -> list:
+            return [round(value * scale, 1) for value in values]
+
+    def convert_numbers(values: Sequence[int]) -> list:
+        converted = scale_values(values)
+        if sentinel in converted:
+            return [None if value == sentinel else value for value in converted]
+        return converted
+
+    return convert_numbers
+
+
+def _format_code(register: HeliothermRegister) -> str:
+    """Return the struct code of a register, options compare the raw value."""
+    if register.codec is not None or register.options is not None:
+        return "H"
+    return "I" if register.data_type == DATATYPE_UINT32 else "h"
+
+
+def _conversion_key(register: HeliothermRegister) -> tuple:
+    """Return what decides how a register value is converted."""
+    if register.codec is not None:
+        return (id(register.codec),)
+    if register.options is not None:
+        return (id(register.options), register.default_option)
+    return (register.scale, register.sentinel)
+
+
+@lru_cache(maxsize=None)
+def _block_packer(count: int) -> struct.Struct:
+    return struct.Struct(f">{count}H")
+
+
+def pack_registers(registers: Sequence[int]) -> bytes:
+    """Pack a block of raw 16 bit registers into a big endian buffer."""
+    return _block_packer(len(registers)).pack(*registers)
+
+
+class SnapshotLayout:
+    """Fixed position of every decoded value in a snapshot.
+
+    Each key, or key and attribute for composite values like the climate
+    setpoints, owns one slot. Entities look their slots up once and read
+    snapshots by index afterwards.
+    """
+
+    def __init__(self, registers: Iterable[HeliothermRegister]) -> None:
+        """Assign a slot to every key and attribute of the register table."""
+        self.fields: tuple[tuple[str, str | None], ...] = tuple(
+            dict.fromkeys((register.key, register.attribute) for register in registers)
+        )
+        self.keys: tuple[str, ...] = tuple(key for key, _attribute in self.fields)
+        self._slots = {field: slot for slot, field in enumerate(self.fields)}
+
+    def __len__(self) -> int:
+        """Return the number of slots."""
+        return len(self.fields)
+
+    def slot(self, key: str, attribute: str | None = None) -> int | None:
+        """Return the slot of a key and attribute, None if it is not decoded."""
+        return self._slots.get((key, attribute))
+
+
+class Snapshot:
+    """Immutable values of one poll, stored in the slots of a SnapshotLayout.
+
+    A new snapshot is built per poll and swapped in as a whole, readers
+    never see a partially decoded poll.
+    """
+
+    __slots__ = ("layout", "values")
+
+    layout: SnapshotLayout
+    values: tuple[Any, ...]
+
+    def __init__(self, layout: SnapshotLayout, values: Iterable[Any]) -> None:
+        """Initialize the snapshot, values are in slot order."""
+        object.__setattr__(self, "layout", layout)
+        object.__setattr__(self, "values", tuple(values))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Snapshot is immutable")
+
+    def __getitem__(self, slot: int) -> Any:
+        """Return the value in a slot."""
+        return self.values[slot]
+
+    def get(self, key: str, attribute: str | None = None) -> Any:
+        """Return the value of a key and attribute, None if not decoded."""
+        slot = self.layout.slot(key, attribute)
+        return None if slot is None else self.values[slot]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the values as dict, composite values as nested dicts."""
+        data: dict[str, Any] = {}
+        for (key, attribute), value in zip(self.layout.fields, self.values):
+            if attribute is None:
+                data[key] = value
+            else:
+                data.setdefault(key, {})[attribute] = value
+        return data
+
+
+class BlockLayout:
+    """Precompiled struct layout of the values contained in one read block.
+
+    The values of each struct code are unpacked with a single
+    ``Struct.unpack_from`` call, unused registers in between are skipped as
+    pad bytes. The unpacked values are then converted group wise, one group
+    per struct code and conversion, and stored into their snapshot slots.
+    Values of registers with plausibility limits pass their ValueFilter on
+    the way into the slot, groups without limits store them unchanged.
+    """
+
+    def __init__(
+        self,
+        fields: Iterable[tuple[HeliothermRegister, int, int, ValueFilter | None]],
+    ) -> None:
+        """Build one struct per struct code and the conversion groups.
+
+        fields are the registers of the block with their offset in the block,
+        their snapshot slot and their value filter.
+        """
+        by_code: dict[str, dict[int, list[tuple]]] = {}
+        for register, offset, slot, value_filter in fields:
+            by_code.setdefault(_format_code(register), {}).setdefault(
+                offset, []
+            ).append((register, slot, value_filter))
+
+        self._unpackers: list[tuple[struct.Struct, list[tuple]]] = []
+        for code, registers_by_offset in by_code.items():
+            fmt = ">"
+            position = 0
+            groups: dict[tuple, tuple[Callable, list, list, list]] = {}
+            for index, offset in enumerate(sorted(registers_by_offset)):
+                if offset < position:
+                    raise ValueError(f"Overlapping {code} values at offset {offset}")
+                if offset > position:
+                    fmt += f"{2 * (offset - position)}x"
+                fmt += code
+                position = offset + (2 if code == "I" else 1)
+                for register, slot, value_filter in registers_by_offset[offset]:
+                    group = groups.setdefault(
+                        _conversion_key(register), (_compile(register), [], [], [])
+                    )
+                    group[1].append(index)
+                    group[2].append(slot)
+                    group[3].append(value_filter)
+            self._unpackers.append(
+                (
+                    struct.Struct(fmt),
+                    [
+                        (
+                            convert,
+                            _gather(indexes),
+                            tuple(slots),
+                            tuple(filters) if any(filters) else None,
+                        )
+                        for convert, indexes, slots, filters in groups.values()
+                    ],
+                )
+            )
+        self.slots: tuple[int, ...] = tuple(
+            slot
+            for registers in by_code.values()
+            for fields_at_offset in registers.values()
+            for _register, slot, _value_filter in fields_at_offset
+        )
+
+    def decode(self, buffer: bytes, values: list[Any], timestamp: float) -> None:
+        """Unpack, convert and filter every field of the buffer into its slot."""
+        for unpacker, groups in self._unpackers:
+            unpacked = unpacker.unpack_from(buffer)
+            for convert, gather, slots, filters in groups:
+                converted = convert(gather(unpacked))
+                if filters is None:
+                    for slot, value in zip(slots, converted):
+                        values[slot] = value
+                    continue
+                for slot, value, value_filter in zip(slots, converted, filters):
+                    if value_filter is not None:
+                        value = value_filter.process(timestamp, value)
+                    values[slot] = value
+
+
+def _gather(indexes: Sequence[int]) -> Callable[[Sequence[int]], Sequence[int]]:
+    """Return a function picking the values at indexes, always as a tuple."""
+    if len(indexes) == 1:
+        index = indexes[0]
+        return lambda values: (values[index],)
+    return itemgetter(*indexes)
+
+
+def decode_block(
+    layout: BlockLayout,
+    registers: Sequence[int],
+    values: list[Any],
+    timestamp: float,
+) -> None:
+    """Decode a block of raw registers read at timestamp into snapshot slots."""
+    layout.decode(pack_registers(registers), values, timestamp)
+
+
+class RegisterDecoder:
+    """Decoder compiled once from a register table and applied to read blocks.
+
+    Every register with plausibility limits has one ValueFilter, shared by
+    all block layouts containing it.
+    """
+
+    def __init__(self, registers: Iterable[HeliothermRegister]) -> None:
+        """Assign the snapshot slots, block layouts are compiled on demand."""
+        self._registers = tuple(registers)
+        self.snapshot_layout = SnapshotLayout(self._registers)
+        self._layouts: dict[tuple[str, int, int], BlockLayout] = {}
+        self._filters: dict[int, ValueFilter] = {
+            self.snapshot_layout.slot(register.key, register.attribute): ValueFilter(
+                register
+            )
+            for register in self._registers
+            if has_limits(register)
+        }
+
+    def get_layout(self, register_type: str, address: int, count: int) -> BlockLayout:
+        """Return the compiled layout of the registers contained in a block."""
+        block = (register_type, address, count)
+        layout = self._layouts.get(block)
+        if layout is None:
+            fields = []
+            for register in self._registers:
+                if (
+                    register.register_type == register_type
+                    and register.address >= address
+                    and register.address + register.count <= address + count
+                ):
+                    slot = self.snapshot_layout.slot(register.key, register.attribute)
+                    fields.append(
+                        (
+                            register,
+                            register.address - address,
+                            slot,
+                            self._filters.get(slot),
+                        )
+                    )
+            layout = self._layouts[block] = BlockLayout(fields)
+        return layout
+
+    def decode(
+        self,
+        register_type: str,
+        address: int,
+        registers: Sequence[int],
+        values: list[Any],
+        timestamp: float,
+    ) -> None:
+        """Decode a block of raw registers starting at address into values."""
+        decode_block(
+            self.get_layout(register_type, address, len(registers)),
+            registers,
+            values,
+            timestamp,
+        )
+
+    def rejected(self) -> dict[str, int]:
+        """Return the number of implausible readings per register."""
+        return {
+            value_filter.key: value_filter.rejected
+            for value_filter in self._filters.values()
+        }
+
+    def empty_snapshot(self) -> Snapshot:
+        """Return a snapshot without any decoded value."""
+        return Snapshot(self.snapshot_layout, [None] * len(self.snapshot_layout))
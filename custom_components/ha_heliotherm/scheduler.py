@@ -0,0 +1,75 @@
+"""Polling scheduler for the register tiers of the HaHeliotherm hub."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+
+
+class PollScheduler:
+    """Decide which poll tiers are due on every tick of the hub timer.
+
+    Each tier is polled every ``interval / tick`` ticks. Tiers listed in
+    ``backoff_tiers`` double their interval after ``backoff_after`` polls
+    without a changed value, up to ``max_backoff`` times the configured
+    interval, and fall back to it as soon as a value changes.
+    """
+
+    def __init__(
+        self,
+        intervals: Mapping[str, float],
+        tick: float,
+        backoff_tiers: Iterable[str] = (),
+        backoff_after: int = 4,
+        max_backoff: int = 4,
+    ) -> None:
+        """Initialize the scheduler, every tier is due on the first tick."""
+        self._every = self._get_ticks(intervals, tick)
+        self._backoff_tiers = frozenset(backoff_tiers)
+        self._backoff_after = backoff_after
+        self._max_backoff = max_backoff
+        self._backoff = dict.fromkeys(self._every, 1)
+        self._unchanged = dict.fromkeys(self._every, 0)
+        self._countdown = dict.fromkeys(self._every, 0)
+
+    @staticmethod
+    def _get_ticks(intervals: Mapping[str, float], tick: float) -> dict[str, int]:
+        """Return the number of ticks between two polls of every tier."""
+        return {
+            tier: max(1, round(interval / tick)) for tier, interval in intervals.items()
+        }
+
+    def reschedule(self, intervals: Mapping[str, float], tick: float) -> None:
+        """Change the intervals, no tier waits longer than its new interval."""
+        self._every.update(self._get_ticks(intervals, tick))
+        for tier, every in self._every.items():
+            self._countdown[tier] = min(
+                self._countdown[tier], every * self._backoff[tier]
+            )
+
+    def reset(self) -> None:
+        """Make every tier due on the next tick, e.g. after a reconnect."""
+        for tier in self._countdown:
+            self._backoff[tier] = 1
+            self._unchanged[tier] = 0
+            self._countdown[tier] = 0
+
+    def due_tiers(self) -> frozenset[str]:
+        """Advance the scheduler by one tick and return the tiers to poll."""
+        due = []
+        for tier in self._countdown:
+            self._countdown[tier] -= 1
+            if self._countdown[tier] <= 0:
+                due.append(tier)
+        return frozenset(due)
+
+    def record(self, tier: str, changed: bool) -> None:
+        """Reschedule a tier after it was polled successfully."""
+        if changed:
+            self._backoff[tier] = 1
+            self._unchanged[tier] = 0
+        elif tier in self._backoff_tiers:
+            self._unchanged[tier] += 1
+            if self._unchanged[tier] >= self._backoff_after:
+                self._backoff[tier] = min(self._backoff[tier] * 2, self._max_backoff)
+                self._unchanged[tier] = 0
+        self._countdown[tier] = self._every[tier] * self._backoff[tier]
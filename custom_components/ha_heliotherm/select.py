@@ -5,6 +5,7 @@ from . import HaHeliothermModbusHub
 
 from homeassistant.components.select import SelectEntity
 from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import *
 
@@ -33,7 +34,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     return True
 
 
-class HeliothermSelect(SelectEntity):
+class HeliothermSelect(CoordinatorEntity, SelectEntity):
     """Representation of a weenect select."""
 
     def __init__(
@@ -44,13 +45,16 @@ class HeliothermSelect(SelectEntity):
         description: HaHeliothermSelectEntityDescription,
     ):
         """Initialize the sensor."""
+        super().__init__(hub, context=description.key)
         self._platform_name = platform_name
         self._attr_device_info = device_info
         self._hub = hub
         self.entity_description: HaHeliothermSelectEntityDescription = description
+        self._value_slot = hub.snapshot_layout.slot(description.key)
         self._attr_options = description.select_options
         self._attr_current_option: str = description.default_select_option
         self._setter_function = description.setter_function
+        self._update_state()
 
     @property
     def current_option(self) -> str | None:
@@ -63,19 +67,17 @@ class HeliothermSelect(SelectEntity):
         await self._hub.setter_function_callback(self, option)
         # await self._hub.set_betriebsart(option)
 
-    async def async_added_to_hass(self):
-        """Register callbacks."""
-        self._hub.async_add_haheliotherm_modbus_sensor(self._modbus_data_updated)
-
-    async def async_will_remove_from_hass(self) -> None:
-        self._hub.async_remove_haheliotherm_modbus_sensor(self._modbus_data_updated)
-
     @callback
-    def _modbus_data_updated(self):
-        if self.entity_description.key in self._hub.data:
-            self._attr_current_option = self._hub.data[self.entity_description.key]
+    def _handle_coordinator_update(self) -> None:
+        self._update_state()
         self.async_write_ha_state()
 
+    @callback
+    def _update_state(self):
+        value = self._hub.data[self._value_slot]
+        if value is not None:
+            self._attr_current_option = value
+
     @property
     def name(self):
         """Return the name."""
@@ -1,7 +1,7 @@
 from homeassistant.const import CONF_NAME
-from homeassistant.core import callback
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.components.input_number import *
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 import logging
 from typing import Optional, Dict, Any
 
@@ -9,9 +9,12 @@ from typing import Optional, Dict, Any
 import homeassistant.util.dt as dt_util
 
 from .const import (
+    ANALYTICS_SENSOR_TYPES,
     ATTR_MANUFACTURER,
+    DIAGNOSTIC_SENSOR_TYPES,
     DOMAIN,
     SENSOR_TYPES,
+    HaHeliothermDiagnosticSensorEntityDescription,
     HaHeliothermSensorEntityDescription,
 )
 
@@ -38,11 +41,21 @@ async def async_setup_entry(hass, entry, async_add_entities):
         )
         entities.append(sensor)
 
+    for description in ANALYTICS_SENSOR_TYPES.values():
+        entities.append(
+            HaHeliothermModbusAnalyticsSensor(hub_name, hub, device_info, description)
+        )
+
+    for description in DIAGNOSTIC_SENSOR_TYPES.values():
+        entities.append(
+            HaHeliothermModbusDiagnosticSensor(hub_name, hub, device_info, description)
+        )
+
     async_add_entities(entities)
     return True
 
 
-class HaHeliothermModbusSensor(SensorEntity):
+class HaHeliothermModbusSensor(CoordinatorEntity, SensorEntity):
     """Representation of an Heliotherm Modbus sensor."""
 
     def __init__(
@@ -53,21 +66,55 @@ class HaHeliothermModbusSensor(SensorEntity):
         description: HaHeliothermSensorEntityDescription,
     ):
         """Initialize the sensor."""
+        super().__init__(hub, context=description.key)
         self._platform_name = platform_name
         self._attr_device_info = device_info
         self._hub = hub
         self.entity_description: HaHeliothermSensorEntityDescription = description
+        self._value_slot = hub.snapshot_layout.slot(description.key)
+
+    @property
+    def name(self):
+        """Return the name."""
+        return f"{self._platform_name} {self.entity_description.name}"
+
+    @property
+    def unique_id(self) -> Optional[str]:
+        return f"{self._platform_name}_{self.entity_description.key}"
+
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        return self._hub.data[self._value_slot]
+
+
+class HaHeliothermModbusAnalyticsSensor(HaHeliothermModbusSensor):
+    """Performance metric derived from the registers by the hub."""
 
-    async def async_added_to_hass(self):
-        """Register callbacks."""
-        self._hub.async_add_haheliotherm_modbus_sensor(self._modbus_data_updated)
+    @property
+    def native_value(self):
+        """Return the state of the sensor."""
+        return self._hub.analytics.values[self.entity_description.key]
 
-    async def async_will_remove_from_hass(self) -> None:
-        self._hub.async_remove_haheliotherm_modbus_sensor(self._modbus_data_updated)
 
-    @callback
-    def _modbus_data_updated(self):
-        self.async_write_ha_state()
+class HaHeliothermModbusDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Transaction statistics of the Modbus hub, updated on every poll."""
+
+    def __init__(
+        self,
+        platform_name,
+        hub,
+        device_info,
+        description: HaHeliothermDiagnosticSensorEntityDescription,
+    ):
+        """Initialize the sensor."""
+        super().__init__(hub)
+        self._platform_name = platform_name
+        self._attr_device_info = device_info
+        self._hub = hub
+        self.entity_description: HaHeliothermDiagnosticSensorEntityDescription = (
+            description
+        )
 
     @property
     def name(self):
@@ -78,11 +125,12 @@ class HaHeliothermModbusSensor(SensorEntity):
     def unique_id(self) -> Optional[str]:
         return f"{self._platform_name}_{self.entity_description.key}"
 
+    @property
+    def available(self) -> bool:
+        """Statistics are available while the gateway is unreachable."""
+        return True
+
     @property
     def native_value(self):
-        """Return the state of the sensor."""
-        return (
-            self._hub.data[self.entity_description.key]
-            if self.entity_description.key in self._hub.data
-            else None
-        )
+        """Return the statistic."""
+        return self.entity_description.value_fn(self._hub.stats)
@@ -0,0 +1,113 @@
+"""Services of the HaHeliotherm integration."""
+
+from __future__ import annotations
+
+import math
+
+import voluptuous as vol
+
+from homeassistant.const import CONF_NAME
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+import homeassistant.util.dt as dt_util
+
+from .const import (
+    ATTR_END,
+    ATTR_KEYS,
+    ATTR_RESOLUTION,
+    ATTR_START,
+    DOMAIN,
+    SERVICE_GET_HISTORY,
+)
+from .history import RESOLUTION_AUTO, RESOLUTION_RAW, RESOLUTIONS
+
+GET_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_NAME): cv.string,
+        vol.Required(ATTR_KEYS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_RESOLUTION, default=RESOLUTION_AUTO): vol.In(RESOLUTIONS),
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+
+    async def async_get_history(call: ServiceCall) -> ServiceResponse:
+        """Return the in-memory register history of a hub."""
+        hub = _get_hub(hass, call.data.get(CONF_NAME))
+        keys = call.data[ATTR_KEYS]
+        start = _timestamp(call.data.get(ATTR_START), -math.inf)
+        end = _timestamp(call.data.get(ATTR_END), math.inf)
+        resolution = call.data[ATTR_RESOLUTION]
+        if resolution == RESOLUTION_AUTO:
+            resolution = hub.history.resolution_for(keys, start)
+
+        series = hub.history.query(keys, resolution, start, end)
+        if resolution == RESOLUTION_RAW:
+            rows = {
+                name: [
+                    {"time": _isoformat(timestamp), "value": round(value, 3)}
+                    for timestamp, value in samples
+                ]
+                for name, samples in series.items()
+            }
+        else:
+            rows = {
+                name: [
+                    {
+                        "start": _isoformat(bucket_start),
+                        "min": round(minimum, 3),
+                        "max": round(maximum, 3),
+                        "mean": round(mean, 3),
+                    }
+                    for bucket_start, minimum, maximum, mean in buckets
+                ]
+                for name, buckets in series.items()
+            }
+        return {"resolution": resolution, "series": rows}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_HISTORY,
+        async_get_history,
+        schema=GET_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+def _get_hub(hass: HomeAssistant, name: str | None):
+    """Return the hub with name, or the only hub if no name is given."""
+    hubs = hass.data.get(DOMAIN, {})
+    if name is None and len(hubs) == 1:
+        return next(iter(hubs.values()))["hub"]
+    if name not in hubs:
+        raise HomeAssistantError(
+            f"Unknown heat pump {name}, configured: {', '.join(hubs)}"
+        )
+    return hubs[name]["hub"]
+
+
+def _timestamp(value, default: float) -> float:
+    """Return the POSIX timestamp of a datetime.
+
+    Naive datetimes are in the time zone configured in Home Assistant.
+    """
+    if value is None:
+        return default
+    return dt_util.as_utc(value).timestamp()
+
+
+def _isoformat(timestamp: float) -> str:
+    """Return a POSIX timestamp as ISO 8601 string in UTC."""
+    return dt_util.utc_from_timestamp(timestamp).isoformat()
@@ -0,0 +1,189 @@
+"""Transaction statistics of a HaHeliotherm hub."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Sequence
+from typing import Any
+
+KIND_READ_INPUT = "read_input"
+KIND_READ_HOLDING = "read_holding"
+KIND_WRITE = "write"
+
+# Bucket upper bounds in milliseconds, the last bucket is unbounded.
+ROUND_TRIP_BOUNDS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+DECODE_BOUNDS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Modbus TCP frame sizes: 7 byte MBAP header plus the PDU.
+READ_REQUEST_BYTES = 12
+READ_RESPONSE_BYTES = 9
+WRITE_SINGLE_BYTES = 12
+WRITE_MULTIPLE_REQUEST_BYTES = 13
+WRITE_MULTIPLE_RESPONSE_BYTES = 12
+
+
+class Histogram:
+    """Fixed bucket histogram of durations in milliseconds."""
+
+    __slots__ = ("bounds", "counts", "count", "total", "maximum")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        """Initialize an empty histogram."""
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, value: float) -> None:
+        """Count a duration in milliseconds."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean duration, None if nothing was counted."""
+        return self.total / self.count if self.count else None
+
+    def percentile(self, fraction: float) -> float | None:
+        """Return the upper bound of the bucket containing the percentile."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                if index < len(self.bounds):
+                    return min(self.bounds[index], self.maximum)
+                break
+        return self.maximum
+
+    def merge(self, other: Histogram) -> None:
+        """Add the counts of another histogram with the same bounds."""
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram for diagnostics."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "max": self.maximum,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "buckets": {
+                **{
+                    f"<={bound}": count
+                    for bound, count in zip(self.bounds, self.counts)
+                },
+                f">{self.bounds[-1]}": self.counts[-1],
+            },
+        }
+
+
+class TransactionStats:
+    """Counters and timing histograms of the Modbus transactions of a hub.
+
+    Round trip times are kept per block, the transaction kind with the
+    address and count of the registers read or written, so a slow block
+    stands out. The totals per kind are merged from them on demand.
+    """
+
+    def __init__(self) -> None:
+        """Initialize all counters with zero."""
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.exception_responses = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.round_trip: dict[tuple[str, int, int], Histogram] = {}
+        self.decode = Histogram(DECODE_BOUNDS)
+
+    def record(
+        self,
+        block: tuple[str, int, int],
+        duration: float,
+        bytes_sent: int,
+        bytes_received: int,
+        retries: int = 0,
+        error: bool = False,
+        timeout: bool = False,
+    ) -> None:
+        """Count a finished transaction of a block, duration in seconds."""
+        self.requests += 1
+        self.retries += retries
+        self.bytes_sent += bytes_sent
+        if error:
+            self.errors += 1
+            self.timeouts += timeout
+            return
+        self.bytes_received += bytes_received
+        histogram = self.round_trip.get(block)
+        if histogram is None:
+            histogram = self.round_trip[block] = Histogram(ROUND_TRIP_BOUNDS)
+        histogram.add(duration * 1000)
+
+    def record_exception_response(self) -> None:
+        """Count a Modbus exception response of the heat pump."""
+        self.exception_responses += 1
+
+    def record_decode(self, duration: float) -> None:
+        """Count the time the event loop spent decoding a poll, in seconds."""
+        self.decode.add(duration * 1000)
+
+    @property
+    def round_trip_mean(self) -> float | None:
+        """Return the mean round trip time of all transactions in ms."""
+        count = sum(histogram.count for histogram in self.round_trip.values())
+        if not count:
+            return None
+        return sum(histogram.total for histogram in self.round_trip.values()) / count
+
+    def round_trip_percentile(self, fraction: float) -> float | None:
+        """Return a round trip percentile over all transactions in ms."""
+        merged = Histogram(ROUND_TRIP_BOUNDS)
+        for histogram in self.round_trip.values():
+            merged.merge(histogram)
+        return merged.percentile(fraction)
+
+    def round_trip_by_kind(self) -> dict[str, Histogram]:
+        """Return the round trip histograms merged per transaction kind."""
+        merged = {
+            kind: Histogram(ROUND_TRIP_BOUNDS)
+            for kind in (KIND_READ_INPUT, KIND_READ_HOLDING, KIND_WRITE)
+        }
+        for (kind, _address, _count), histogram in self.round_trip.items():
+            merged[kind].merge(histogram)
+        return merged
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all statistics for diagnostics."""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "exception_responses": self.exception_responses,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "round_trip_ms": {
+                kind: histogram.as_dict()
+                for kind, histogram in self.round_trip_by_kind().items()
+            },
+            "round_trip_blocks_ms": {
+                f"{kind} {address}-{address + count - 1}": histogram.as_dict()
+                for (kind, address, count), histogram in sorted(
+                    self.round_trip.items()
+                )
+            },
+            "decode_ms": self.decode.as_dict(),
+        }
@@ -0,0 +1,259 @@
+"""Shared Modbus TCP transport for hubs behind the same gateway."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+import logging
+import time
+from typing import Any
+
+from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.exceptions import ConnectionException
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DATA_TRANSPORTS,
+    DEFAULT_REQUEST_DELAY,
+    DEFAULT_RETRIES,
+    DEFAULT_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HeliothermModbusTransport:
+    """One Modbus TCP connection multiplexed between several hubs.
+
+    Gateways in front of the heat pumps handle a single request at a time,
+    so every transaction goes through one worker task. Each hub has its own
+    queue and the worker serves the queues round robin, a hub polling many
+    blocks can not starve the other units on the same gateway. Priority
+    transactions (writes) are served before any queued read.
+
+    Timeout, retries and the delay between two transactions are configured
+    per hub, the transport uses the most patient settings of its hubs.
+    """
+
+    def __init__(self, hass: HomeAssistant, host: str, port: int) -> None:
+        """Initialize the transport."""
+        self._hass = hass
+        self._host = host
+        self._port = port
+        self.timeout = DEFAULT_TIMEOUT
+        self.retries = DEFAULT_RETRIES
+        self.request_delay = DEFAULT_REQUEST_DELAY
+        self._settings: dict[Any, tuple[float, int, float]] = {}
+        self._last_done = 0.0
+        # Reconnects are driven by the circuit breaker of the hubs.
+        self._client = AsyncModbusTcpClient(
+            host=host,
+            port=port,
+            timeout=self.timeout,
+            retries=self.retries,
+            reconnect_delay=0,
+        )
+        self._queues: dict[Any, deque] = {}
+        self._ready: deque = deque()
+        self._priority: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._worker: asyncio.Task | None = None
+        self._current: asyncio.Future | None = None
+        self.users = 0
+
+    @property
+    def client(self) -> AsyncModbusTcpClient:
+        """Return the underlying pymodbus client."""
+        return self._client
+
+    @callback
+    def async_configure(
+        self, owner: Any, timeout: float, retries: int, request_delay: float
+    ) -> None:
+        """Set the timeout, retries and request delay wanted by owner."""
+        self._settings[owner] = (timeout, retries, request_delay)
+        self._apply_settings()
+
+    @callback
+    def async_remove_owner(self, owner: Any) -> None:
+        """Forget the settings and fail the queued transactions of owner."""
+        self._settings.pop(owner, None)
+        queue = self._queues.pop(owner, None)
+        if queue:
+            self._ready.remove(owner)
+            for _request, future, _record in queue:
+                _fail(future)
+        if self._settings:
+            self._apply_settings()
+
+    def _apply_settings(self) -> None:
+        """Apply the most patient settings of all owners to the client."""
+        settings = self._settings.values()
+        self.timeout = max(timeout for timeout, _, _ in settings)
+        self.retries = max(retries for _, retries, _ in settings)
+        self.request_delay = max(delay for _, _, delay in settings)
+        # pymodbus reads both on every transaction, no reconnect is needed.
+        self._client.comm_params.timeout_connect = self.timeout
+        self._client.ctx.retries = self.retries
+
+    async def async_execute(
+        self,
+        owner: Any,
+        request: Callable[[AsyncModbusTcpClient], Awaitable[Any]],
+        priority: bool = False,
+        record: Callable[[float, Any, BaseException | None], None] | None = None,
+    ) -> Any:
+        """Queue a transaction for owner and wait for its result.
+
+        record is called with the duration of the transaction on the wire,
+        without the time spent in the queue, and its result or error.
+        """
+        future = self._hass.loop.create_future()
+        if priority:
+            self._priority.append((request, future, record))
+        else:
+            queue = self._queues.get(owner)
+            if queue is None:
+                queue = self._queues[owner] = deque()
+            if not queue:
+                self._ready.append(owner)
+            queue.append((request, future, record))
+        if self._worker is None:
+            self._worker = self._hass.async_create_background_task(
+                self._async_worker(), f"ha_heliotherm transport {self._host}"
+            )
+        self._wakeup.set()
+        return await future
+
+    async def _async_worker(self) -> None:
+        """Run queued transactions one at a time, round robin per owner."""
+        try:
+            await self._async_run_queue()
+        finally:
+            # A new transaction starts a new worker.
+            if self._worker is asyncio.current_task():
+                self._worker = None
+
+    async def _async_run_queue(self) -> None:
+        """Serve the queues until the worker is cancelled."""
+        while True:
+            if self._priority:
+                request, future, record = self._priority.popleft()
+            elif self._ready:
+                owner = self._ready.popleft()
+                queue = self._queues[owner]
+                request, future, record = queue.popleft()
+                if queue:
+                    self._ready.append(owner)
+            else:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            if future.cancelled():
+                continue
+
+            if self.request_delay:
+                delay = self._last_done + self.request_delay - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    if future.cancelled():
+                        continue
+
+            self._current = future
+            start = time.perf_counter()
+            result = error = None
+            try:
+                if not self._client.connected:
+                    await self._client.connect()
+                result = await request(self._client)
+            except asyncio.CancelledError:
+                # Only the cancellation of the worker itself stops it, a
+                # CancelledError raised by the client fails the transaction.
+                if asyncio.current_task().cancelling():
+                    raise
+                error = ConnectionException("Modbus request was cancelled")
+            except Exception as err:  # pylint: disable=broad-except
+                error = err
+            finally:
+                self._current = None
+                self._last_done = time.monotonic()
+
+            _record(record, time.perf_counter() - start, result, error)
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    @callback
+    def async_close(self) -> None:
+        """Stop the worker and disconnect the client."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        if self._current is not None:
+            _fail(self._current)
+        for queue in (*self._queues.values(), self._priority):
+            for _request, future, _record in queue:
+                _fail(future)
+        self._queues.clear()
+        self._ready.clear()
+        self._priority.clear()
+        self._client.close()
+
+
+def _record(
+    record: Callable[[float, Any, BaseException | None], None] | None,
+    duration: float,
+    result: Any,
+    err: BaseException | None,
+) -> None:
+    """Pass a finished transaction to its recorder, never raising."""
+    if record is None:
+        return
+    try:
+        record(duration, result, err)
+    except Exception:  # pylint: disable=broad-except
+        _LOGGER.exception("Recording a Modbus transaction failed")
+
+
+def _fail(future: asyncio.Future) -> None:
+    """Fail a transaction that will not be sent anymore."""
+    if not future.done():
+        future.set_exception(ConnectionException("Modbus transport closed"))
+
+
+@callback
+def async_get_transport(
+    hass: HomeAssistant, host: str, port: int
+) -> HeliothermModbusTransport:
+    """Return the shared transport for a gateway, creating it if needed."""
+    transports = hass.data.setdefault(DATA_TRANSPORTS, {})
+    transport = transports.get((host, port))
+    if transport is None:
+        transport = transports[(host, port)] = HeliothermModbusTransport(
+            hass, host, port
+        )
+    transport.users += 1
+    return transport
+
+
+@callback
+def async_release_transport(
+    hass: HomeAssistant, transport: HeliothermModbusTransport, owner: Any
+) -> None:
+    """Release the transport of owner and close it once the last hub is gone."""
+    transport.async_remove_owner(owner)
+    transport.users -= 1
+    if transport.users:
+        return
+    transports = hass.data.get(DATA_TRANSPORTS, {})
+    for key, value in list(transports.items()):
+        if value is transport:
+            del transports[key]
+    _LOGGER.debug("Closing transport %s", transport.client)
+    transport.async_close()
@@ -0,0 +1,28 @@
+"""Helpers for the HaHeliotherm tests."""
+
+import asyncio
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.ha_heliotherm import HaHeliothermModbusHub
+from simulator import HeatPumpSimulator
+
+
+def run_with_hub(tmp_path, test, **hub_options):
+    """Run test(hub, simulator) against a hub polling the simulator."""
+
+    async def run():
+        simulator = HeatPumpSimulator(port=0, tick=0, seed=1)
+        await simulator.start()
+        hass = HomeAssistant(str(tmp_path))
+        hub = HaHeliothermModbusHub(
+            hass, "test", "127.0.0.1", simulator.port, 15, **hub_options
+        )
+        try:
+            await test(hub, simulator)
+        finally:
+            await hub.async_close()
+            await simulator.stop()
+            await hass.async_stop(force=True)
+
+    asyncio.run(run())
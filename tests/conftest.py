@@ -0,0 +1,7 @@
+"""Fixtures for the HaHeliotherm tests."""
+
+from pathlib import Path
+import sys
+
+# The Modbus simulator is a development tool, not part of the package.
+sys.path.insert(0, str(Path(__file__).parents[1] / "tools"))
@@ -0,0 +1,113 @@
+"""Tests for the derived performance metrics."""
+
+from datetime import date
+
+from custom_components.ha_heliotherm.analytics import (
+    COMPRESSOR_KEY,
+    COMPRESSOR_LAST_RUNTIME,
+    COMPRESSOR_RUNTIME_TODAY,
+    COMPRESSOR_STARTS_HOUR,
+    COMPRESSOR_STARTS_TODAY,
+    COP_ROLLING,
+    COP_TODAY,
+    COP_TOTAL,
+    DEFROST_KEY,
+    DEFROSTS_TODAY,
+    ENERGY_KEY,
+    HEAT_KEY,
+    PerformanceAnalytics,
+)
+from custom_components.ha_heliotherm.registers import REGISTERS, SnapshotLayout
+
+DAY = date(2024, 1, 15)
+LAYOUT = SnapshotLayout(REGISTERS)
+
+
+class Poller:
+    """Feed polls of selected keys into the analytics."""
+
+    def __init__(self):
+        self.analytics = PerformanceAnalytics(LAYOUT)
+        self.values = [None] * len(LAYOUT)
+
+    def poll(self, timestamp, day=DAY, **readings):
+        """Update the analytics with a poll that read the given keys."""
+        slots = set()
+        for key, value in readings.items():
+            slot = LAYOUT.slot(key)
+            self.values[slot] = value
+            slots.add(slot)
+        return self.analytics.update(timestamp, day, self.values, slots)
+
+    def __getitem__(self, key):
+        return self.analytics.values[key]
+
+
+def _counters(heat, energy):
+    return {HEAT_KEY: heat, ENERGY_KEY: energy}
+
+
+def test_cop_from_counter_deltas():
+    """The COP values are heat over energy of their periods."""
+    poller = Poller()
+    poller.poll(0, **_counters(1000, 300))
+    assert poller[COP_TOTAL] == 3.33
+    assert poller[COP_ROLLING] is None
+    assert poller[COP_TODAY] is None
+    changed = poller.poll(3600, **_counters(1040, 310))
+    assert {COP_TOTAL, COP_ROLLING, COP_TODAY} <= changed
+    assert poller[COP_TOTAL] == 3.35
+    assert poller[COP_ROLLING] == 4.0
+    assert poller[COP_TODAY] == 4.0
+
+
+def test_cop_ignores_polls_without_counters():
+    """Stale counters of a poll that did not read them are not used."""
+    poller = Poller()
+    poller.poll(0, **_counters(1000, 300))
+    poller.values[LAYOUT.slot(HEAT_KEY)] = 5000
+    assert poller.poll(60, **{COMPRESSOR_KEY: "off"}) == {COMPRESSOR_STARTS_HOUR}
+    assert poller[COP_TOTAL] == 3.33
+
+
+def test_compressor_cycles_and_runtime():
+    """Starts, runtime and the length of the last run are counted."""
+    poller = Poller()
+    poller.poll(0, **{COMPRESSOR_KEY: "off"})
+    poller.poll(60, **{COMPRESSOR_KEY: "on"})
+    assert poller[COMPRESSOR_STARTS_TODAY] == 1
+    assert poller[COMPRESSOR_STARTS_HOUR] == 1
+    poller.poll(120, **{COMPRESSOR_KEY: "on"})
+    poller.poll(660, **{COMPRESSOR_KEY: "off"})
+    assert poller[COMPRESSOR_RUNTIME_TODAY] == 0.167
+    assert poller[COMPRESSOR_LAST_RUNTIME] == 10.0
+    poller.poll(700, **{COMPRESSOR_KEY: "on"})
+    assert poller[COMPRESSOR_STARTS_HOUR] == 2
+    poller.poll(4000, **{COMPRESSOR_KEY: "on"})
+    assert poller[COMPRESSOR_STARTS_HOUR] == 1
+    poller.poll(4060, day=date(2024, 1, 16), **{COMPRESSOR_KEY: "on"})
+    assert poller[COMPRESSOR_STARTS_TODAY] == 0
+
+
+def test_compressor_ignores_partial_and_late_polls():
+    """Polls without the compressor or finishing late change nothing."""
+    poller = Poller()
+    poller.poll(0, **{COMPRESSOR_KEY: "off"})
+    poller.poll(60, **{COMPRESSOR_KEY: "on"})
+    poller.values[LAYOUT.slot(COMPRESSOR_KEY)] = "off"
+    assert poller.poll(90, **_counters(1000, 300)) == {COP_TOTAL}
+    assert poller.poll(30, **{COMPRESSOR_KEY: "on"}) == set()
+    poller.poll(120, **{COMPRESSOR_KEY: "on"})
+    assert poller[COMPRESSOR_STARTS_TODAY] == 1
+    assert poller[COMPRESSOR_RUNTIME_TODAY] == 0.017
+    assert poller[COMPRESSOR_LAST_RUNTIME] is None
+
+
+def test_defrosts_are_counted():
+    """Every switch of the four way valve into defrost mode counts."""
+    poller = Poller()
+    for timestamp, state in enumerate(
+        ("Abtaubetrieb", "Aus", "Abtaubetrieb", "Abtaubetrieb", "Aus", "Abtaubetrieb")
+    ):
+        poller.poll(timestamp * 60, **{DEFROST_KEY: state})
+    assert poller[DEFROSTS_TODAY] == 2
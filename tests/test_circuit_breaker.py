@@ -0,0 +1,86 @@
+"""Tests for the circuit breaker."""
+
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.ha_heliotherm.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_jitter():
+    """Use the full retry delay."""
+    with patch(
+        "custom_components.ha_heliotherm.circuit_breaker.random.uniform",
+        return_value=1.0,
+    ):
+        yield
+
+
+def _open(breaker, now=0.0):
+    """Fail until the breaker opens."""
+    while breaker.state == STATE_CLOSED:
+        assert breaker.allow_request(now)
+        breaker.record_failure(now)
+
+
+def test_opens_after_threshold():
+    """The breaker tolerates failures below the threshold."""
+    breaker = CircuitBreaker(failure_threshold=3, base_delay=10)
+    breaker.record_failure(0)
+    breaker.record_failure(0)
+    assert breaker.available
+    breaker.record_failure(0)
+    assert breaker.state == STATE_OPEN
+    assert not breaker.available
+    assert breaker.retry_delay == 10
+    assert not breaker.allow_request(9)
+
+
+def test_success_resets_failures():
+    """A success in between starts counting from zero."""
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure(0)
+    breaker.record_success()
+    breaker.record_failure(0)
+    assert breaker.state == STATE_CLOSED
+
+
+def test_half_open_lets_a_single_probe_through():
+    """After the delay only one request is sent until its result is known."""
+    breaker = CircuitBreaker(failure_threshold=1, base_delay=10, probe_timeout=30)
+    _open(breaker)
+    assert breaker.allow_request(10)
+    assert breaker.state == STATE_HALF_OPEN
+    assert not breaker.allow_request(11)
+    assert not breaker.allow_request(39)
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow_request(12)
+
+
+def test_failed_probe_doubles_delay():
+    """A failed probe opens the breaker again with twice the delay."""
+    breaker = CircuitBreaker(failure_threshold=1, base_delay=10, max_delay=30)
+    _open(breaker)
+    for now, delay in ((10, 20), (30, 30), (60, 30)):
+        assert breaker.allow_request(now)
+        breaker.record_failure(now)
+        assert breaker.state == STATE_OPEN
+        assert breaker.retry_delay == delay
+        assert not breaker.allow_request(now + delay - 1)
+
+
+def test_lost_probe_is_replaced():
+    """A probe without a result does not block the breaker forever."""
+    breaker = CircuitBreaker(failure_threshold=1, base_delay=10, probe_timeout=30)
+    _open(breaker)
+    assert breaker.allow_request(10)
+    assert not breaker.allow_request(39)
+    assert breaker.allow_request(40)
+    assert not breaker.allow_request(41)
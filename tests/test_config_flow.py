@@ -0,0 +1,45 @@
+"""Tests for the config flow helpers."""
+
+from custom_components.ha_heliotherm.config_flow import (
+    DATA_SCHEMA,
+    split_options,
+    unique_id_for,
+    unit_key,
+    validate_options,
+)
+from custom_components.ha_heliotherm.const import (
+    CONF_SCAN_INTERVAL_NORMAL,
+    CONF_SCAN_INTERVAL_SLOW,
+)
+
+
+def _options(**changes):
+    """Return the default options with changes."""
+    user_input = DATA_SCHEMA({"host": "192.168.1.10"})
+    _data, options = split_options(user_input)
+    return {**options, **changes}
+
+
+def test_default_options_are_valid():
+    """The defaults pass the validation."""
+    assert validate_options(_options()) == {}
+
+
+def test_tier_intervals_must_not_decrease():
+    """Slower tiers may not be polled faster than faster tiers."""
+    assert validate_options(_options(scan_interval=60, scan_interval_normal=30)) == {
+        CONF_SCAN_INTERVAL_NORMAL: "interval_order"
+    }
+    assert validate_options(
+        _options(scan_interval_normal=120, scan_interval_slow=60)
+    ) == {CONF_SCAN_INTERVAL_SLOW: "interval_order"}
+    assert validate_options(_options(scan_interval_normal=15)) == {}
+
+
+def test_units_are_keyed_by_gateway():
+    """The port is part of the unit, the port number type does not matter."""
+    assert unit_key("10.0.0.2", "502", 1) == unit_key("10.0.0.2", 502, 1)
+    assert unit_key("10.0.0.2", 502, 1) != unit_key("10.0.0.2", 5020, 1)
+    assert unique_id_for("10.0.0.2", 502, 1) == "10.0.0.2"
+    assert unique_id_for("10.0.0.2", "502", 2) == "10.0.0.2_2"
+    assert unique_id_for("10.0.0.2", 5020, 2) == "10.0.0.2:5020_2"
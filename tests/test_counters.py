@@ -0,0 +1,85 @@
+"""Tests for the energy counter guards."""
+
+from custom_components.ha_heliotherm.counters import CounterGuard, CounterGuards
+from custom_components.ha_heliotherm.registers import REGISTERS, SnapshotLayout
+
+WRAP = float(1 << 32)
+
+
+def _feed(guard, readings, start=0, step=300):
+    """Return the published values of readings one step apart."""
+    return [
+        guard.process(start + index * step, reading)
+        for index, reading in enumerate(readings)
+    ]
+
+
+def test_first_value_is_published_at_once():
+    """The first reading is the baseline, no slow poll is waited for."""
+    guard = CounterGuard("wmz_gesamt", 100, WRAP)
+    assert _feed(guard, [None, 1000, 1001, 1002]) == [None, 1000, 1001, 1002]
+
+
+def test_first_zero_needs_confirmation():
+    """A zero read after a reconnect is not published as the baseline."""
+    guard = CounterGuard("wmz_gesamt", 100, WRAP)
+    assert _feed(guard, [0, 1000, 1001]) == [None, 1000, 1001]
+
+
+def test_glitched_first_frame_is_not_a_rollover():
+    """A garbage first reading is replaced once the real value is confirmed."""
+    guard = CounterGuard("wmz_gesamt", 100, WRAP)
+    assert _feed(guard, [4294967295, 1000, 1000, 1001, 1002]) == [
+        4294967295,
+        4294967295,
+        4294967295,
+        1001,
+        1002,
+    ]
+    assert guard.rejected == 3
+
+
+def test_jumps_are_rejected():
+    """Drops and too fast increases keep the last value."""
+    guard = CounterGuard("wmz_gesamt", 100, WRAP)
+    _feed(guard, [1000, 1000])
+    assert _feed(guard, [0, 1001, 99999, 1002, None], start=600) == [
+        1000,
+        1001,
+        1001,
+        1002,
+        1002,
+    ]
+    assert guard.rejected == 2
+
+
+def test_confirmed_reset_is_followed():
+    """Three consistent readings after a jump are a real reset."""
+    guard = CounterGuard("wmz_gesamt", 100, WRAP)
+    _feed(guard, [1000, 1000])
+    assert _feed(guard, [5, 5, 6, 7], start=600) == [1000, 1000, 6, 7]
+
+
+def test_rollover_continues_counter():
+    """A wrap of the register keeps counting up."""
+    guard = CounterGuard("wmz_gesamt", 100, 100.0)
+    _feed(guard, [95, 96])
+    assert _feed(guard, [99, 1, 2], start=600) == [99, 101, 102]
+
+
+def test_guards_only_monotonic_registers():
+    """Power values are not guarded, counters are."""
+    layout = SnapshotLayout(REGISTERS)
+    guards = CounterGuards(layout, REGISTERS)
+    power = layout.slot("stromz_leistung")
+    counter = layout.slot("stromz_gesamt")
+    values = [None] * len(layout)
+    for timestamp in (0, 300):
+        values[power] = values[counter] = 500
+        guards.process(timestamp, values, (power, counter))
+    values[power] = values[counter] = 0
+    guards.process(600, values, (power, counter))
+    assert values[power] == 0
+    assert values[counter] == 500
+    assert guards.rejected()["stromz_gesamt"] == 1
+    assert "stromz_leistung" not in guards.rejected()
@@ -0,0 +1,143 @@
+"""Tests for the short cycle and fault detection."""
+
+from custom_components.ha_heliotherm.const import EVENT_DETECTION
+from custom_components.ha_heliotherm.detector import (
+    EVENT_FAULT,
+    EVENT_FAULT_CLEARED,
+    EVENT_PRESSURE_ANOMALY,
+    EVENT_SHORT_CYCLE,
+    EVENT_STUCK_SETPOINT,
+    PRESSURE_ANOMALY,
+    SHORT_CYCLE,
+    STUCK_SETPOINT,
+    FaultDetector,
+)
+from custom_components.ha_heliotherm.registers import (
+    REGISTER_INPUT,
+    REGISTERS,
+    SnapshotLayout,
+)
+
+from .common import run_with_hub
+
+LAYOUT = SnapshotLayout(REGISTERS)
+
+
+class Poller:
+    """Feed polls of selected keys into the detector."""
+
+    def __init__(self):
+        self.detector = FaultDetector(LAYOUT)
+        self.values = [None] * len(LAYOUT)
+
+    def poll(self, timestamp, **readings):
+        """Check a poll that read the given keys, return the event types."""
+        slots = set()
+        for key, value in readings.items():
+            slot = LAYOUT.slot(key)
+            self.values[slot] = value
+            slots.add(slot)
+        self.changed, events = self.detector.update(timestamp, self.values, slots)
+        self.events = events
+        return [event["type"] for event in events]
+
+
+def test_short_run_is_a_short_cycle():
+    """A run shorter than ten minutes is reported once."""
+    poller = Poller()
+    poller.poll(0, on_off_verdichter="off")
+    poller.poll(60, on_off_verdichter="on")
+    assert poller.poll(300, on_off_verdichter="off") == [EVENT_SHORT_CYCLE]
+    assert poller.events[0]["runtime"] == 240
+    assert poller.changed == {SHORT_CYCLE}
+    assert poller.poll(360, on_off_verdichter="off") == []
+    assert poller.detector.states[SHORT_CYCLE]
+    poller.poll(4000, on_off_verdichter="off")
+    assert not poller.detector.states[SHORT_CYCLE]
+
+
+def test_run_going_on_at_start_is_not_a_short_cycle():
+    """The length of a run already going on when polling began is unknown."""
+    poller = Poller()
+    poller.poll(0, on_off_verdichter="on")
+    assert poller.poll(60, on_off_verdichter="off") == []
+
+
+def test_too_many_starts_are_a_short_cycle():
+    """More than three starts within an hour are reported."""
+    poller = Poller()
+    poller.poll(0, on_off_verdichter="off")
+    types = []
+    for start in (60, 760, 1460, 2160):
+        types += poller.poll(start, on_off_verdichter="on")
+        types += poller.poll(start + 640, on_off_verdichter="off")
+    assert types == [EVENT_SHORT_CYCLE]
+    assert poller.events == []
+    assert poller.detector.states[SHORT_CYCLE]
+
+
+def test_stuck_setpoint_fires_once():
+    """A setpoint unchanged for two hours of running is reported once."""
+    poller = Poller()
+    for timestamp in range(0, 7200, 600):
+        assert (
+            poller.poll(timestamp, on_off_verdichter="on", n_soll_verdichter=50) == []
+        )
+    assert poller.poll(7200, on_off_verdichter="on", n_soll_verdichter=50) == [
+        EVENT_STUCK_SETPOINT
+    ]
+    assert poller.changed == {STUCK_SETPOINT}
+    assert poller.poll(7800, on_off_verdichter="on", n_soll_verdichter=50) == []
+    poller.poll(8400, on_off_verdichter="on", n_soll_verdichter=60)
+    assert poller.changed == {STUCK_SETPOINT}
+    assert not poller.detector.states[STUCK_SETPOINT]
+
+
+def test_pressure_anomaly_fires_per_transition():
+    """A pressure anomaly fires when it starts, not on every poll."""
+    poller = Poller()
+    pressures = {"bar_niederdruck": 6.0, "temp_heissgas": 70.0}
+    poller.poll(0, on_off_verdichter="on")
+    assert poller.poll(60, bar_hochdruck=36.0, **pressures) == [EVENT_PRESSURE_ANOMALY]
+    assert poller.events[0]["reasons"] == ["high_pressure"]
+    assert poller.poll(120, bar_hochdruck=36.0, **pressures) == []
+    poller.poll(180, bar_hochdruck=21.0, **pressures)
+    assert poller.changed == {PRESSURE_ANOMALY}
+    assert poller.poll(360, bar_hochdruck=21.0, bar_niederdruck=0.5) == [
+        EVENT_PRESSURE_ANOMALY
+    ]
+    assert poller.events[0]["reasons"] == ["low_pressure"]
+
+
+def test_partial_and_late_polls_are_ignored():
+    """Stale slots of a poll that did not read them are not checked."""
+    poller = Poller()
+    poller.poll(0, on_off_verdichter="off", on_off_stoerung="off")
+    poller.poll(60, on_off_verdichter="on")
+    poller.values[LAYOUT.slot("on_off_verdichter")] = "off"
+    poller.values[LAYOUT.slot("on_off_stoerung")] = "on"
+    assert poller.poll(120, select_betriebsart="Auto") == []
+    assert poller.poll(30, on_off_verdichter="off", on_off_stoerung="on") == []
+    assert poller.poll(900, on_off_verdichter="off") == []
+
+
+def test_fault_events_are_fired_by_the_hub(tmp_path):
+    """The hub fires one detection event per switch of the fault register."""
+
+    async def test(hub, simulator):
+        events = []
+        hub.hass.bus.async_listen(
+            EVENT_DETECTION, lambda event: events.append(event.data)
+        )
+        await hub.async_refresh()
+        for fault in (1, 1, 0, 0):
+            simulator.units[1].input[26] = fault
+            await hub.async_refresh_modbus_registers(REGISTER_INPUT, [26])
+        await hub.hass.async_block_till_done()
+        assert [event["type"] for event in events] == [
+            EVENT_FAULT,
+            EVENT_FAULT_CLEARED,
+        ]
+        assert events[0]["name"] == "test"
+
+    run_with_hub(tmp_path, test)
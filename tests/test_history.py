@@ -0,0 +1,121 @@
+"""Tests for the in-memory register history."""
+
+import pytest
+
+from custom_components.ha_heliotherm.history import (
+    RESOLUTION_RAW,
+    BucketBuffer,
+    RegisterHistory,
+    RingBuffer,
+)
+from custom_components.ha_heliotherm.registers import (
+    POLL_FAST,
+    POLL_NORMAL,
+    POLL_SLOW,
+    REGISTERS,
+    SnapshotLayout,
+)
+
+INTERVALS = {POLL_FAST: 15, POLL_NORMAL: 60, POLL_SLOW: 300}
+
+
+def test_ring_buffer_overwrites_oldest():
+    """A full buffer keeps the newest samples."""
+    buffer = RingBuffer(3)
+    assert buffer.covers(0)
+    for timestamp in range(5):
+        buffer.append(timestamp, timestamp * 10)
+    assert len(buffer) == 3
+    assert buffer.samples() == [(2, 20), (3, 30), (4, 40)]
+    assert buffer.samples(3, 3) == [(3, 30)]
+    assert buffer.covers(2)
+    assert not buffer.covers(1)
+
+
+@pytest.mark.parametrize("capacity", [2, 5])
+def test_ring_buffer_resized(capacity):
+    """Resizing keeps the newest samples that fit."""
+    buffer = RingBuffer(3)
+    for timestamp in range(4):
+        buffer.append(timestamp, timestamp)
+    resized = buffer.resized(capacity)
+    assert resized.capacity == capacity
+    assert resized.samples() == buffer.samples()[-capacity:]
+
+
+def test_bucket_buffer_min_max_mean():
+    """Samples are aggregated per bucket, the open bucket is included."""
+    buffer = BucketBuffer(300, 2)
+    for timestamp, value in ((0, 1), (100, 5), (200, 3), (300, 4), (650, 2)):
+        buffer.add(timestamp, value)
+    assert buffer.buckets() == [(0, 1, 5, 3), (300, 4, 4, 4), (600, 2, 2, 2)]
+    assert buffer.buckets(500, 700) == [(300, 4, 4, 4), (600, 2, 2, 2)]
+
+
+def test_bucket_buffer_overwrites_oldest():
+    """Only capacity closed buckets are kept."""
+    buffer = BucketBuffer(60, 2)
+    for minute in range(5):
+        buffer.add(minute * 60, minute)
+    assert [bucket[0] for bucket in buffer.buckets()] == [120, 180, 240]
+    assert buffer.covers(120)
+    assert not buffer.covers(60)
+
+
+def test_large_counters_keep_full_precision():
+    """Counters above 2**24 keep their units and small deltas."""
+    buffer = RingBuffer(2)
+    buckets = BucketBuffer(300, 2)
+    for timestamp, value in ((0, 16777217.0), (60, 16777218.5)):
+        buffer.append(timestamp, value)
+        buckets.add(timestamp, value)
+    assert buffer.samples() == [(0, 16777217.0), (60, 16777218.5)]
+    assert buckets.buckets() == [(0, 16777217.0, 16777218.5, 16777217.75)]
+
+
+def _history(window):
+    layout = SnapshotLayout(REGISTERS)
+    return layout, RegisterHistory(layout.fields, REGISTERS, window, INTERVALS)
+
+
+def _record(layout, history, key, samples):
+    slot = layout.slot(key)
+    values = [None] * len(layout)
+    for timestamp, value in samples:
+        values[slot] = value
+        history.record(timestamp, values, (slot,))
+
+
+def test_raw_window_and_downsampling():
+    """Old samples leave the raw buffer but stay in the buckets."""
+    layout, history = _history(window=4 * INTERVALS[POLL_NORMAL])
+    _record(layout, history, "temp_vorlauf", ((t, t / 15) for t in range(0, 600, 15)))
+    samples = history.query(["temp_vorlauf"], RESOLUTION_RAW)["temp_vorlauf"]
+    assert [timestamp for timestamp, _value in samples] == [540, 555, 570, 585]
+    assert history.resolution_for(["temp_vorlauf"], 540) == RESOLUTION_RAW
+    assert history.resolution_for(["temp_vorlauf"], 0) == "5min"
+    buckets = history.query(["temp_vorlauf"], "5min")["temp_vorlauf"]
+    assert buckets == [(0, 0, 19, 9.5), (300, 20, 39, 29.5)]
+
+
+def test_configure_resizes_raw_buffers():
+    """A longer window keeps the recorded samples."""
+    layout, history = _history(window=2 * INTERVALS[POLL_NORMAL])
+    _record(layout, history, "temp_vorlauf", ((t, 1.0) for t in range(0, 120, 15)))
+    history.configure(10 * INTERVALS[POLL_NORMAL], INTERVALS)
+    _record(layout, history, "temp_vorlauf", ((t, 2.0) for t in range(120, 240, 15)))
+    samples = history.query(["temp_vorlauf"], RESOLUTION_RAW)["temp_vorlauf"]
+    assert samples[:3] == [(90, 1.0), (105, 1.0), (120, 2.0)]
+    assert len(samples) == 10
+
+
+def test_options_are_stored_as_codes():
+    """On/off and option values are recorded as their register code."""
+    layout, history = _history(window=3600)
+    _record(layout, history, "on_off_verdichter", ((0, "off"), (15, "on"), (30, None)))
+    _record(layout, history, "select_betriebsart", ((0, "Party"),))
+    series = history.query(["on_off_verdichter", "select_betriebsart", "x"], "raw")
+    assert series == {
+        "on_off_verdichter": [(0, 0), (15, 1)],
+        "select_betriebsart": [(0, 7)],
+    }
@@ -0,0 +1,145 @@
+"""Tests for the HaHeliotherm hub against the Modbus simulator."""
+
+import asyncio
+
+import pytest
+
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.ha_heliotherm.circuit_breaker import STATE_CLOSED
+from custom_components.ha_heliotherm.const import READ_BACK_COOLDOWN_SECONDS
+from custom_components.ha_heliotherm.registers import (
+    POLL_TIERS,
+    REGISTER_HOLDING,
+    REGISTER_INPUT,
+)
+from custom_components.ha_heliotherm.stats import KIND_READ_HOLDING, KIND_WRITE
+
+from .common import run_with_hub
+
+
+def test_refresh_decodes_registers(tmp_path):
+    """A refresh reads and decodes the simulated registers."""
+
+    async def test(hub, simulator):
+        await hub.async_refresh()
+        assert hub.last_update_success
+        assert hub.data.get("on_off_verdichter") in ("on", "off")
+        assert hub.data.get("select_betriebsart") == "Auto"
+        assert hub.data.get("wmz_leistung") == 5.2
+        assert hub.data.get("stromz_leistung") == 1450
+        assert {address for _kind, address, _count in hub.stats.round_trip} == {
+            address for _type, address, _count in hub.get_read_plan(POLL_TIERS)
+        }
+
+    run_with_hub(tmp_path, test)
+
+
+def test_rejected_write_keeps_breaker_closed(tmp_path):
+    """Exception responses to writes are reported without opening the breaker."""
+
+    async def test(hub, simulator):
+        await hub.async_refresh()
+        for _ in range(5):
+            with pytest.raises(HomeAssistantError, match="rejected"):
+                await hub.async_queue_writes({130: 1})
+        assert hub._breaker.state == STATE_CLOSED
+        assert hub._breaker.failures == 0
+        await hub.async_queue_writes({101: 220})
+        assert simulator.units[1].holding[101] == 220
+
+    run_with_hub(tmp_path, test)
+
+
+def test_only_listeners_of_changed_keys_are_called(tmp_path):
+    """A refresh calls the listeners of changed keys and keyless listeners."""
+
+    async def test(hub, simulator):
+        calls = []
+        for key in ("select_betriebsart", "climate_hkr_raum_soll", None):
+            hub.async_add_listener(lambda key=key: calls.append(key), key)
+        await hub.async_refresh()
+        assert set(calls) == {"select_betriebsart", "climate_hkr_raum_soll", None}
+        calls.clear()
+        simulator.units[1].holding[100] = 2
+        changed = await hub.async_refresh_modbus_registers(REGISTER_HOLDING, [100, 101])
+        assert changed == {"select_betriebsart"}
+        assert calls == ["select_betriebsart", None]
+        calls.clear()
+        await hub.async_refresh_modbus_registers(REGISTER_HOLDING, [100, 101])
+        assert calls == [None]
+
+    run_with_hub(tmp_path, test)
+
+
+def test_read_plan_follows_subscribed_keys(tmp_path):
+    """Only the registers of subscribed keys are read while any are subscribed."""
+
+    async def test(hub, simulator):
+        full_plan = hub.get_read_plan(POLL_TIERS)
+        remove = hub.async_add_listener(lambda: None, "select_betriebsart")
+        hub.async_add_listener(lambda: None, "temp_aussen")
+        assert hub.get_diagnostics()["subscribed_keys"] == [
+            "select_betriebsart",
+            "temp_aussen",
+        ]
+        assert hub.get_read_plan(POLL_TIERS) == (
+            (REGISTER_INPUT, 10, 1),
+            (REGISTER_HOLDING, 100, 1),
+        )
+        remove()
+        assert hub.get_read_plan(POLL_TIERS) == ((REGISTER_INPUT, 10, 1),)
+        await hub.async_refresh()
+        assert hub.data.get("temp_aussen") is not None
+        assert hub.data.get("select_betriebsart") is None
+        assert len(full_plan) > 1
+
+    run_with_hub(tmp_path, test)
+
+
+def test_setter_writes_are_batched(tmp_path):
+    """Writes within the debounce window go out as one FC16 request."""
+
+    async def test(hub, simulator):
+        await hub.async_refresh()
+        await asyncio.gather(
+            hub.set_betriebsart("Sommer"),
+            hub.set_raumtemperatur(21.0),
+            hub.set_raumtemperatur(22.5),
+            hub.set_rl_soll(31.0),
+        )
+        writes = [key for key in hub.stats.round_trip if key[0] == KIND_WRITE]
+        assert writes == [(KIND_WRITE, 100, 4)]
+        holding = simulator.units[1].holding
+        assert [holding[address] for address in range(100, 104)] == [3, 225, 310, 1]
+        await hub.set_rltkuehlen(19.0)
+        assert (KIND_WRITE, 104, 1) in hub.stats.round_trip
+        assert holding[104] == 190
+
+    run_with_hub(tmp_path, test)
+
+
+def test_written_registers_are_read_back(tmp_path):
+    """Only the written registers are read back and published."""
+
+    async def test(hub, simulator):
+        await hub.async_refresh()
+        counts = {key: trips.count for key, trips in hub.stats.round_trip.items()}
+        await hub.set_raumtemperatur(22.0)
+        assert hub.data.get("climate_hkr_raum_soll", "temperature") == 21.5
+        await asyncio.sleep(READ_BACK_COOLDOWN_SECONDS + 0.1)
+        await hub.hass.async_block_till_done()
+        reads = {
+            key
+            for key, trips in hub.stats.round_trip.items()
+            if key[0] != KIND_WRITE and trips.count > counts.get(key, 0)
+        }
+        assert reads == {(KIND_READ_HOLDING, 101, 1)}
+        assert hub.data.get("climate_hkr_raum_soll", "temperature") == 22.0
+        simulator.units[1].holding[102] = 320
+        assert await hub.async_refresh_modbus_registers(REGISTER_HOLDING, [102]) == {
+            "climate_rl_soll"
+        }
+        assert hub.data.get("climate_rl_soll", "temperature") == 32.0
+
+    run_with_hub(tmp_path, test)
@@ -0,0 +1,94 @@
+"""Tests for the options flow."""
+
+import asyncio
+from types import SimpleNamespace
+
+from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT
+
+from custom_components.ha_heliotherm.config_flow import (
+    DATA_SCHEMA,
+    OptionsFlowHandler,
+    split_options,
+)
+from custom_components.ha_heliotherm.const import CONF_UNIT_ID
+
+
+class FakeConfigEntries:
+    """Config entries of the fake hass, updates are recorded."""
+
+    def __init__(self, entries):
+        """Initialize with the configured entries."""
+        self.entries = entries
+        self.updates = []
+
+    def async_entries(self, domain):
+        """Return all entries."""
+        return self.entries
+
+    def async_update_entry(self, entry, **changes):
+        """Record an update."""
+        self.updates.append((entry, changes))
+
+
+def _entry(entry_id, host, unit_id, port=502):
+    """Return an entry with the default options."""
+    data, options = split_options(
+        DATA_SCHEMA(
+            {
+                CONF_NAME: entry_id,
+                CONF_HOST: host,
+                CONF_PORT: port,
+                CONF_UNIT_ID: unit_id,
+            }
+        )
+    )
+    return SimpleNamespace(entry_id=entry_id, data=data, options=options)
+
+
+def _submit(entries, entry, **changes):
+    """Submit the options form of entry with changes."""
+    handler = OptionsFlowHandler(entry)
+    handler.hass = SimpleNamespace(config_entries=entries)
+    user_input = {**entry.data, **entry.options, **changes}
+    del user_input[CONF_NAME]
+    return asyncio.run(handler.async_step_init(user_input))
+
+
+def test_change_to_configured_unit_is_rejected():
+    """A unit that has its own entry can not be taken over."""
+    first = _entry("first", "10.0.0.2", 1)
+    second = _entry("second", "10.0.0.2", 2)
+    entries = FakeConfigEntries([first, second])
+    result = _submit(entries, second, unit_id=1)
+    assert result["type"] == "form"
+    assert result["errors"] == {CONF_HOST: "already_configured"}
+    assert entries.updates == []
+
+
+def test_change_to_free_unit_is_saved():
+    """The entry being edited does not count as duplicate of itself."""
+    first = _entry("first", "10.0.0.2", 1)
+    entries = FakeConfigEntries([first, _entry("second", "10.0.0.2", 2)])
+    result = _submit(entries, first, unit_id=3)
+    assert result["type"] == "create_entry"
+    ((entry, changes),) = entries.updates
+    assert entry is first
+    assert changes["unique_id"] == "10.0.0.2_3"
+    assert changes["data"][CONF_UNIT_ID] == 3
+
+    entries.updates.clear()
+    result = _submit(entries, first, scan_interval=20)
+    assert result["type"] == "create_entry"
+    assert entries.updates[0][1]["unique_id"] == "10.0.0.2"
+
+
+def test_same_unit_on_another_port_is_saved():
+    """Gateways on one host with different ports are different heat pumps."""
+    first = _entry("first", "10.0.0.2", 1)
+    second = _entry("second", "10.0.0.2", 1, port="5020")
+    entries = FakeConfigEntries([first, second])
+    result = _submit(entries, second, unit_id=1)
+    assert result["type"] == "create_entry"
+    assert entries.updates[0][1]["unique_id"] == "10.0.0.2:5020"
+    result = _submit(entries, second, port=502)
+    assert result["errors"] == {CONF_HOST: "already_configured"}
@@ -0,0 +1,101 @@
+"""Tests for the read and write request planner."""
+
+import pytest
+
+from custom_components.ha_heliotherm.registers import (
+    MAX_READ_COUNT,
+    MAX_READ_GAP,
+    READ_BLOCKS,
+    REGISTER_INPUT,
+    REGISTERS,
+    HeliothermRegister,
+    plan_read_blocks,
+    plan_write_blocks,
+)
+
+
+def _input(*addresses):
+    return [HeliothermRegister(f"r{address}", address) for address in addresses]
+
+
+def test_merges_gaps_up_to_max_gap():
+    """Registers separated by at most max_gap unused ones share a request."""
+    registers = _input(10, 12, 20)
+    assert plan_read_blocks(registers, 1) == (
+        (REGISTER_INPUT, 10, 3),
+        (REGISTER_INPUT, 20, 1),
+    )
+    assert plan_read_blocks(registers, 7) == ((REGISTER_INPUT, 10, 11),)
+    assert plan_read_blocks(registers, 0) == (
+        (REGISTER_INPUT, 10, 1),
+        (REGISTER_INPUT, 12, 1),
+        (REGISTER_INPUT, 20, 1),
+    )
+
+
+def test_uint32_registers_are_read_whole():
+    """A two register value is never split between requests."""
+    counters = [r for r in REGISTERS if r.key in ("wmz_heizung", "stromz_heizung")]
+    assert plan_read_blocks(counters, 0) == ((REGISTER_INPUT, 60, 4),)
+
+
+def test_never_spans_documented_blocks():
+    """Reads stop at the documented blocks, whatever the gap."""
+    registers = [*_input(41), HeliothermRegister("counter", 60)]
+    assert plan_read_blocks(registers, MAX_READ_COUNT) == (
+        (REGISTER_INPUT, 41, 1),
+        (REGISTER_INPUT, 60, 1),
+    )
+
+
+def test_register_outside_documented_blocks():
+    """Registers in the undocumented gaps are rejected."""
+    with pytest.raises(ValueError):
+        plan_read_blocks(_input(50), 0)
+
+
+def test_max_count_splits_requests():
+    """No request is longer than max_count registers."""
+    registers = _input(*range(10, 20))
+    blocks = plan_read_blocks(registers, MAX_READ_GAP, max_count=4)
+    assert blocks == (
+        (REGISTER_INPUT, 10, 4),
+        (REGISTER_INPUT, 14, 4),
+        (REGISTER_INPUT, 18, 2),
+    )
+
+
+@pytest.mark.parametrize("max_gap", [0, 8, MAX_READ_GAP])
+def test_full_register_table(max_gap):
+    """Every register is covered by a request within a documented block."""
+    blocks = plan_read_blocks(REGISTERS, max_gap)
+    for register in REGISTERS:
+        assert any(
+            register_type == register.register_type
+            and address <= register.address
+            and register.address + register.count <= address + count
+            for register_type, address, count in blocks
+        )
+    for register_type, address, count in blocks:
+        assert count <= MAX_READ_COUNT
+        assert any(
+            register_type == block_type
+            and block_address <= address
+            and address + count <= block_address + block_count
+            for block_type, block_address, block_count in READ_BLOCKS
+        )
+    if max_gap == MAX_READ_GAP:
+        assert len(blocks) == len(READ_BLOCKS)
+
+
+def test_plan_write_blocks():
+    """Consecutive writes are merged, the run length is limited."""
+    assert plan_write_blocks({105: 2, 100: 1, 106: 3, 101: 4}) == [
+        (100, [1, 4]),
+        (105, [2, 3]),
+    ]
+    assert plan_write_blocks({100: 1, 101: 2, 102: 3}, max_count=2) == [
+        (100, [1, 2]),
+        (102, [3]),
+    ]
+    assert plan_write_blocks({}) == []
@@ -0,0 +1,131 @@
+"""Tests for the plausibility checks applied while decoding."""
+
+from custom_components.ha_heliotherm.plausibility import ValueFilter, has_limits
+from custom_components.ha_heliotherm.registers import (
+    REGISTER_INPUT,
+    REGISTERS,
+    RegisterDecoder,
+)
+from simulator import HeatPumpRegisters
+
+from .common import run_with_hub
+
+# Raw value of a glitched frame, 3276.7 °C after scaling.
+GLITCH = 0x7FFF
+
+
+def _register(key):
+    """Return the register description of key."""
+    return next(register for register in REGISTERS if register.key == key)
+
+
+def _feed(value_filter, readings, start=0, step=30):
+    """Return the published values of readings one poll apart."""
+    return [
+        value_filter.process(start + index * step, reading)
+        for index, reading in enumerate(readings)
+    ]
+
+
+def test_out_of_range_keeps_last_value():
+    """A single bad frame is hidden, a persistent one becomes unknown."""
+    value_filter = ValueFilter(_register("temp_vorlauf"))
+    assert _feed(value_filter, [34.5, 3276.7, 34.6]) == [34.5, 34.5, 34.6]
+    assert _feed(value_filter, [3276.7] * 3, start=90) == [34.6, 34.6, None]
+    assert value_filter.rejected == 4
+
+
+def test_flow_temperature_follows_compressor_start():
+    """Jumps of the water circuits within one poll are accepted at once."""
+    value_filter = ValueFilter(_register("temp_vorlauf"))
+    assert _feed(value_filter, [30.0, 36.0, 45.0, 38.0]) == [30.0, 36.0, 45.0, 38.0]
+    value_filter = ValueFilter(_register("temp_ruecklauf"))
+    assert _feed(value_filter, [25.0, 32.5]) == [25.0, 32.5]
+    assert value_filter.rejected == 0
+
+
+def test_outdoor_temperature_jump_needs_confirmation():
+    """The outdoor temperature drifts slowly, a jump must be confirmed."""
+    value_filter = ValueFilter(_register("temp_aussen"))
+    assert _feed(value_filter, [5.2, 5.3]) == [5.2, 5.3]
+    assert _feed(value_filter, [11.3, 11.3, 11.3, 11.4], start=60) == [
+        5.3,
+        5.3,
+        11.3,
+        11.4,
+    ]
+    assert value_filter.rejected == 2
+
+
+def test_outdoor_temperature_spike_is_dropped():
+    """A single implausible change keeps the last value."""
+    value_filter = ValueFilter(_register("temp_aussen"))
+    assert _feed(value_filter, [5.2, 15.2, 5.2, 5.1]) == [5.2, 5.2, 5.2, 5.1]
+    assert value_filter.rejected == 1
+
+
+def test_pressure_median_removes_spike():
+    """Pressures publish the median of the last three readings."""
+    value_filter = ValueFilter(_register("bar_hochdruck"))
+    assert _feed(value_filter, [20.0, 20.1, 45.0, 20.2, 20.1]) == [
+        20.0,
+        20.1,
+        20.1,
+        20.2,
+        20.2,
+    ]
+
+
+def test_counters_are_left_to_counter_guards():
+    """Counters and plain values get no value filter."""
+    assert has_limits(_register("temp_heissgas"))
+    assert not has_limits(_register("wmz_gesamt"))
+    assert not has_limits(_register("on_off_verdichter"))
+    rejected = RegisterDecoder(REGISTERS).rejected()
+    assert "temp_vorlauf" in rejected
+    assert "wmz_gesamt" not in rejected
+
+
+def test_decoder_filters_slots():
+    """The decode pass stores the filtered values into the snapshot."""
+    decoder = RegisterDecoder(REGISTERS)
+    image = HeatPumpRegisters()
+    registers = [image.input[address] for address in range(10, 42)]
+    values = list(decoder.empty_snapshot().values)
+    decoder.decode(REGISTER_INPUT, 10, registers, values, 0)
+    registers[12 - 10] = GLITCH
+    registers[22 - 10] = GLITCH
+    decoder.decode(REGISTER_INPUT, 10, registers, values, 30)
+    snapshot = decoder.snapshot_layout
+    assert values[snapshot.slot("temp_vorlauf")] == 34.5
+    assert values[snapshot.slot("bar_hochdruck")] == 21.5
+    assert values[snapshot.slot("temp_heissgas")] == 68.4
+    assert decoder.rejected()["temp_vorlauf"] == 1
+    assert decoder.rejected()["bar_hochdruck"] == 1
+
+
+def test_hub_hides_glitched_frame(tmp_path):
+    """A glitched register read by the hub is counted, not published."""
+
+    async def test(hub, simulator):
+        await hub.async_refresh()
+        simulator.units[1].input[12] = GLITCH
+        await hub.async_refresh_modbus_registers(REGISTER_INPUT, [12])
+        assert hub.data.get("temp_vorlauf") == 34.5
+        assert hub.get_diagnostics()["rejected_readings"]["temp_vorlauf"] == 1
+
+    run_with_hub(tmp_path, test)
+
+
+def test_erratic_readings_become_unknown():
+    """Readings that keep jumping are not hidden behind a stale value."""
+    value_filter = ValueFilter(_register("temp_aussen"))
+    assert _feed(value_filter, [5.0, 15.0, 25.0, 35.0, 45.0, 55.0]) == [
+        5.0,
+        5.0,
+        5.0,
+        None,
+        None,
+        None,
+    ]
+    assert _feed(value_filter, [20.0, 20.1, 20.1], start=180) == [None, 20.1, 20.1]
@@ -0,0 +1,121 @@
+"""Tests for the block decoding, the option codecs and the snapshots."""
+
+import random
+
+import pytest
+
+from custom_components.ha_heliotherm.registers import (
+    BETRIEBSART,
+    DATATYPE_UINT32,
+    READ_BLOCKS,
+    REGISTERS,
+    VERDICHTERANFORDERUNG,
+    BlockLayout,
+    Snapshot,
+    SnapshotLayout,
+    decode_block,
+)
+
+LAYOUT = SnapshotLayout(REGISTERS)
+# Raw value of the missing sensor marker, -50.0 after scaling.
+SENTINEL = 0x10000 - 500
+
+
+def _block_registers(register_type, address, count):
+    """Return the registers contained in a read block."""
+    return [
+        register
+        for register in REGISTERS
+        if register.register_type == register_type
+        and address <= register.address
+        and register.address + register.count <= address + count
+    ]
+
+
+def _reference_decode(register, registers, offset):
+    """Decode one value register by register, as before the struct layouts."""
+    if register.codec is not None:
+        return register.codec.decode(registers[offset])
+    if register.options is not None:
+        return register.options.get(registers[offset], register.default_option)
+    if register.data_type == DATATYPE_UINT32:
+        raw = (registers[offset] << 16) | registers[offset + 1]
+    elif registers[offset] & 0x8000:
+        raw = registers[offset] - 0x10000
+    else:
+        raw = registers[offset]
+    value = round(raw * register.scale, 1)
+    return None if value == register.sentinel else value
+
+
+def _random_register(rng):
+    """Return a raw register, biased towards codes, negatives and the sentinel."""
+    return rng.choice(
+        (
+            rng.randrange(0x10000),
+            rng.randrange(50),
+            0x10000 - rng.randrange(1, 400),
+            SENTINEL,
+        )
+    )
+
+
+@pytest.mark.parametrize("block", READ_BLOCKS)
+def test_struct_layout_matches_reference(block):
+    """The struct layout decodes every block like the per register path."""
+    block_registers = _block_registers(*block)
+    layout = BlockLayout(
+        (
+            register,
+            register.address - block[1],
+            LAYOUT.slot(register.key, register.attribute),
+            None,
+        )
+        for register in block_registers
+    )
+    rng = random.Random(block[1])
+    for _ in range(200):
+        registers = [_random_register(rng) for _ in range(block[2])]
+        values = [None] * len(LAYOUT)
+        decode_block(layout, registers, values, 0)
+        for register in block_registers:
+            slot = LAYOUT.slot(register.key, register.attribute)
+            expected = _reference_decode(
+                register, registers, register.address - block[1]
+            )
+            assert values[slot] == expected, register.key
+
+
+@pytest.mark.parametrize("codec", (BETRIEBSART, VERDICHTERANFORDERUNG))
+def test_option_codec_round_trip(codec):
+    """Every label encodes to the code it is decoded from."""
+    for label in codec.options:
+        assert codec.decode(codec.encode(label)) == label
+    for code in codec.labels:
+        assert codec.encode(codec.decode(code)) == code
+    assert codec.decode_all(list(codec.labels)) == codec.options
+
+
+def test_option_codec_unknown_values():
+    """Unknown codes decode to None, unknown labels are refused."""
+    assert BETRIEBSART.decode(99) is None
+    assert BETRIEBSART.decode_all([1, 99]) == ["Auto", None]
+    with pytest.raises(ValueError, match="Unknown Betriebsart option"):
+        BETRIEBSART.encode("Turbo")
+
+
+def test_snapshot_is_immutable():
+    """Snapshots are read by slot or key and cannot be changed."""
+    values = [None] * len(LAYOUT)
+    values[LAYOUT.slot("climate_hkr_raum_soll", "temperature")] = 21.5
+    values[LAYOUT.slot("temp_aussen")] = 5.2
+    snapshot = Snapshot(LAYOUT, values)
+    values[LAYOUT.slot("temp_aussen")] = 6.0
+    assert snapshot.get("temp_aussen") == 5.2
+    assert snapshot[LAYOUT.slot("temp_aussen")] == 5.2
+    assert snapshot.get("unknown") is None
+    assert snapshot.as_dict()["climate_hkr_raum_soll"]["temperature"] == 21.5
+    with pytest.raises(AttributeError):
+        snapshot.values = ()
+    with pytest.raises(TypeError):
+        snapshot.values[0] = 1
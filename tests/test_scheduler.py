@@ -0,0 +1,65 @@
+"""Tests for the poll scheduler."""
+
+from custom_components.ha_heliotherm.registers import POLL_FAST, POLL_NORMAL, POLL_SLOW
+from custom_components.ha_heliotherm.scheduler import PollScheduler
+
+INTERVALS = {POLL_FAST: 15, POLL_NORMAL: 30, POLL_SLOW: 60}
+
+
+def _poll(scheduler, ticks, changed=False):
+    """Run ticks, record every due tier and return the due tiers per tick."""
+    polls = []
+    for _ in range(ticks):
+        due = scheduler.due_tiers()
+        for tier in due:
+            scheduler.record(tier, changed)
+        polls.append(due)
+    return polls
+
+
+def test_every_tier_due_on_first_tick():
+    """The first tick polls everything."""
+    scheduler = PollScheduler(INTERVALS, tick=15)
+    assert scheduler.due_tiers() == {POLL_FAST, POLL_NORMAL, POLL_SLOW}
+
+
+def test_tiers_follow_their_interval():
+    """Each tier is polled every interval / tick ticks."""
+    polls = _poll(PollScheduler(INTERVALS, tick=15), 8, changed=True)
+    assert [POLL_FAST in due for due in polls] == [True] * 8
+    assert [POLL_NORMAL in due for due in polls] == [True, False] * 4
+    assert [POLL_SLOW in due for due in polls] == [True, False, False, False] * 2
+
+
+def test_interval_shorter_than_tick():
+    """A tier is polled at most once per tick."""
+    scheduler = PollScheduler({POLL_FAST: 5}, tick=15)
+    assert _poll(scheduler, 3) == [frozenset({POLL_FAST})] * 3
+
+
+def test_backoff_and_recovery():
+    """Unchanged backoff tiers slow down and recover on a change."""
+    scheduler = PollScheduler(
+        {POLL_SLOW: 15}, tick=15, backoff_tiers=(POLL_SLOW,), backoff_after=2
+    )
+    polls = _poll(scheduler, 8)
+    assert [bool(due) for due in polls] == [
+        True,
+        True,
+        False,
+        True,
+        False,
+        True,
+        False,
+        False,
+    ]
+    scheduler.reset()
+    assert _poll(scheduler, 2, changed=True) == [frozenset({POLL_SLOW})] * 2
+
+
+def test_reschedule_shortens_wait():
+    """A shorter interval takes effect without waiting out the old one."""
+    scheduler = PollScheduler({POLL_SLOW: 300}, tick=15)
+    _poll(scheduler, 1)
+    scheduler.reschedule({POLL_SLOW: 30}, tick=15)
+    assert [bool(due) for due in _poll(scheduler, 2)] == [False, True]
@@ -0,0 +1,70 @@
+"""Tests for the services of the integration."""
+
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from custom_components.ha_heliotherm.const import DOMAIN, SERVICE_GET_HISTORY
+from custom_components.ha_heliotherm.history import RegisterHistory
+from custom_components.ha_heliotherm.registers import (
+    POLL_TIERS,
+    REGISTERS,
+    SnapshotLayout,
+)
+from custom_components.ha_heliotherm.services import async_setup_services
+
+
+@pytest.fixture
+def time_zone():
+    """Configure a time zone that differs from the one of the OS."""
+    original = dt_util.DEFAULT_TIME_ZONE
+    dt_util.set_default_time_zone(dt_util.get_time_zone("America/New_York"))
+    yield
+    dt_util.set_default_time_zone(original)
+
+
+def _utc(hour, minute=0):
+    return datetime(2024, 3, 1, hour, minute, tzinfo=timezone.utc).timestamp()
+
+
+def test_get_history_naive_start_is_local_time(tmp_path, time_zone):
+    """A naive start is read in the Home Assistant time zone."""
+    layout = SnapshotLayout(REGISTERS)
+    history = RegisterHistory(
+        layout.fields, REGISTERS, 24 * 3600, dict.fromkeys(POLL_TIERS, 15)
+    )
+    slot = layout.slot("temp_vorlauf")
+    values = [None] * len(layout)
+    for timestamp, value in ((_utc(10, 30), 30.0), (_utc(11, 30), 35.0)):
+        values[slot] = value
+        history.record(timestamp, values, (slot,))
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        hass.data[DOMAIN] = {"test": {"hub": SimpleNamespace(history=history)}}
+        async_setup_services(hass)
+        try:
+            return await hass.services.async_call(
+                DOMAIN,
+                SERVICE_GET_HISTORY,
+                {
+                    "keys": ["temp_vorlauf"],
+                    "start": "2024-03-01 06:00:00",
+                    "resolution": "raw",
+                },
+                blocking=True,
+                return_response=True,
+            )
+        finally:
+            await hass.async_stop(force=True)
+
+    response = asyncio.run(run())
+    # 06:00 in New York is 11:00 UTC.
+    assert response["series"]["temp_vorlauf"] == [
+        {"time": "2024-03-01T11:30:00+00:00", "value": 35.0}
+    ]
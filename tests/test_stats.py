@@ -0,0 +1,51 @@
+"""Tests for the transaction statistics."""
+
+from custom_components.ha_heliotherm.stats import (
+    KIND_READ_HOLDING,
+    KIND_READ_INPUT,
+    KIND_WRITE,
+    Histogram,
+    TransactionStats,
+)
+
+FAST_BLOCK = (KIND_READ_INPUT, 10, 32)
+SLOW_BLOCK = (KIND_READ_INPUT, 60, 16)
+
+
+def test_histogram_percentiles():
+    """Percentiles are the bucket bounds, capped by the maximum."""
+    histogram = Histogram((10, 100))
+    for value in (1, 2, 3, 50):
+        histogram.add(value)
+    assert histogram.mean == 14
+    assert histogram.percentile(0.5) == 10
+    assert histogram.percentile(1) == 50
+    assert Histogram((10,)).percentile(0.5) is None
+
+
+def test_round_trips_per_block():
+    """A slow block stands out, the kinds are merged from the blocks."""
+    stats = TransactionStats()
+    for _ in range(9):
+        stats.record(FAST_BLOCK, 0.004, 12, 73)
+    stats.record(SLOW_BLOCK, 0.8, 12, 41)
+    stats.record((KIND_WRITE, 101, 1), 0.02, 12, 12)
+    stats.record(SLOW_BLOCK, 3, 12, 0, retries=3, error=True, timeout=True)
+
+    assert stats.round_trip[FAST_BLOCK].percentile(0.95) == 4
+    assert stats.round_trip[SLOW_BLOCK].maximum == 800
+    by_kind = stats.round_trip_by_kind()
+    assert by_kind[KIND_READ_INPUT].count == 10
+    assert by_kind[KIND_READ_HOLDING].count == 0
+    assert by_kind[KIND_WRITE].count == 1
+    assert stats.round_trip_percentile(1) == 800
+
+    assert (stats.requests, stats.errors, stats.timeouts, stats.retries) == (
+        12,
+        1,
+        1,
+        3,
+    )
+    diagnostics = stats.as_dict()
+    assert diagnostics["round_trip_ms"][KIND_READ_INPUT]["count"] == 10
+    assert diagnostics["round_trip_blocks_ms"]["read_input 60-75"]["count"] == 1
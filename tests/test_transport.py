@@ -0,0 +1,125 @@
+"""Tests for the shared Modbus transport."""
+
+import asyncio
+
+import pytest
+from pymodbus.exceptions import ConnectionException
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.ha_heliotherm.transport import HeliothermModbusTransport
+
+
+class FakeClient:
+    """Client stand-in that is always connected."""
+
+    connected = True
+
+    def close(self):
+        """Do nothing."""
+
+
+def _run(tmp_path, test):
+    """Run test with a transport on a fake client."""
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        transport = HeliothermModbusTransport(hass, "127.0.0.1", 502)
+        transport._client = FakeClient()
+        try:
+            await test(transport)
+        finally:
+            transport.async_close()
+            await hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+async def _ok(client):
+    return "ok"
+
+
+def test_failing_recorder_keeps_worker(tmp_path):
+    """A recorder raising does not stop the worker."""
+
+    def record(duration, result, err):
+        raise ValueError("broken recorder")
+
+    async def test(transport):
+        assert await transport.async_execute(None, _ok, record=record) == "ok"
+        assert await transport.async_execute(None, _ok) == "ok"
+
+    _run(tmp_path, test)
+
+
+def test_cancelled_request_fails_transaction(tmp_path):
+    """A CancelledError of the client fails only its own transaction."""
+    recorded = []
+
+    async def cancelled(client):
+        raise asyncio.CancelledError
+
+    async def test(transport):
+        with pytest.raises(ConnectionException):
+            await transport.async_execute(
+                None, cancelled, record=lambda *args: recorded.append(args)
+            )
+        assert isinstance(recorded[0][2], ConnectionException)
+        assert await transport.async_execute(None, _ok) == "ok"
+
+    _run(tmp_path, test)
+
+
+def test_worker_restarts_after_close(tmp_path):
+    """The worker is cleared when it stops and started again on demand."""
+
+    async def test(transport):
+        assert await transport.async_execute(None, _ok) == "ok"
+        worker = transport._worker
+        worker.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await worker
+        assert transport._worker is None
+        assert await transport.async_execute(None, _ok) == "ok"
+
+    _run(tmp_path, test)
+
+
+def test_priority_requests_overtake_queued_reads(tmp_path):
+    """A write queued behind reads runs right after the current transaction."""
+    order = []
+
+    def request(name, started=None, release=None):
+        async def run(client):
+            order.append(name)
+            if started is not None:
+                started.set()
+                await release.wait()
+            return name
+
+        return run
+
+    async def test(transport):
+        started = asyncio.Event()
+        release = asyncio.Event()
+        tasks = [
+            asyncio.create_task(
+                transport.async_execute("a", request("busy", started, release))
+            )
+        ]
+        await started.wait()
+        for owner, name in (("a", "read a1"), ("b", "read b1"), ("a", "read a2")):
+            tasks.append(
+                asyncio.create_task(transport.async_execute(owner, request(name)))
+            )
+        tasks.append(
+            asyncio.create_task(
+                transport.async_execute("b", request("write"), priority=True)
+            )
+        )
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+        assert order == ["busy", "write", "read a1", "read b1", "read a2"]
+
+    _run(tmp_path, test)
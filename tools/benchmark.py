@@ -0,0 +1,250 @@
+"""Benchmarks for the HaHeliotherm hub against the local simulator.
+
+Measures the latency of a full poll and of a coordinator tick through the
+shared transport, the pure decode time of the canned register blocks and
+the cost of dispatching an update to every entity of the integration.
+Reports p50/p95/p99 per benchmark, results can be saved and compared:
+
+    python tools/benchmark.py --save before.json
+    python tools/benchmark.py --compare before.json --threshold 10
+
+With --compare the exit code is 1 if a percentile got slower than the
+threshold (in percent). Needs Home Assistant and pymodbus installed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+import json
+import logging
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.ha_heliotherm import HaHeliothermModbusHub  # noqa: E402
+from custom_components.ha_heliotherm.binary_sensor import (  # noqa: E402
+    HaHeliothermModbusBinarySensor,
+)
+from custom_components.ha_heliotherm.climate import (  # noqa: E402
+    HaHeliothermModbusClimate,
+)
+from custom_components.ha_heliotherm.const import (  # noqa: E402
+    BINARYSENSOR_TYPES,
+    CLIMATE_TYPES,
+    SELECT_TYPES,
+    SENSOR_TYPES,
+)
+from custom_components.ha_heliotherm.registers import (  # noqa: E402
+    POLL_TIERS,
+    REGISTERS,
+    RegisterDecoder,
+)
+from custom_components.ha_heliotherm.select import HeliothermSelect  # noqa: E402
+from custom_components.ha_heliotherm.sensor import (  # noqa: E402
+    HaHeliothermModbusSensor,
+)
+from simulator import HeatPumpRegisters, HeatPumpSimulator  # noqa: E402
+
+PERCENTILES = ("p50", "p95", "p99")
+
+ENTITY_TYPES = (
+    ("sensor", HaHeliothermModbusSensor, SENSOR_TYPES),
+    ("binary_sensor", HaHeliothermModbusBinarySensor, BINARYSENSOR_TYPES),
+    ("select", HeliothermSelect, SELECT_TYPES),
+    ("climate", HaHeliothermModbusClimate, CLIMATE_TYPES),
+)
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Return count, mean and percentiles of samples in microseconds."""
+    micros = [sample * 1e6 for sample in samples]
+    if len(micros) < 2:
+        micros = micros * 2
+    cuts = statistics.quantiles(micros, n=100, method="inclusive")
+    return {
+        "n": len(samples),
+        "mean": statistics.fmean(micros),
+        "p50": cuts[49],
+        "p95": cuts[94],
+        "p99": cuts[98],
+    }
+
+
+async def _time_async(
+    request: Callable[[], Awaitable[object]], rounds: int
+) -> tuple[list[float], int]:
+    """Time an awaitable factory, failed rounds are counted, not timed."""
+    samples = []
+    failures = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        try:
+            await request()
+        except Exception:  # pylint: disable=broad-except
+            failures += 1
+            continue
+        samples.append(time.perf_counter() - start)
+    return samples, failures
+
+
+def bench_decode(rounds: int) -> list[float]:
+    """Time decoding the three documented blocks of a canned poll."""
+    decoder = RegisterDecoder(REGISTERS)
+    image = HeatPumpRegisters()
+    blocks = [
+        ("input", 10, [image.input[address] for address in range(10, 42)]),
+        ("input", 60, [image.input[address] for address in range(60, 76)]),
+        ("holding", 100, [image.holding[address] for address in range(100, 127)]),
+    ]
+    values = list(decoder.empty_snapshot().values)
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for register_type, address, registers in blocks:
+            decoder.decode(register_type, address, registers, values, start)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def bench_hub(args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    """Run the benchmarks that need a hub and a simulator."""
+    simulator = HeatPumpSimulator(
+        port=0,
+        latency=args.latency,
+        jitter=args.jitter,
+        loss=args.loss,
+        tick=0,
+        seed=args.seed,
+    )
+    await simulator.start()
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hub = HaHeliothermModbusHub(hass, "bench", "127.0.0.1", simulator.port, 15)
+        results = {}
+        try:
+            await hub.async_refresh()
+            full_plan = hub.get_read_plan(POLL_TIERS)
+
+            async def full_poll():
+                if await hub._async_read_plan(full_plan) is None:
+                    raise RuntimeError("poll failed")
+
+            async def tick():
+                await hub.async_refresh()
+                if not hub.last_update_success:
+                    raise RuntimeError("poll failed")
+
+            for name, request in (("poll_full", full_poll), ("poll_tick", tick)):
+                samples, failures = await _time_async(request, args.polls)
+                results[name] = {**summarize(samples), "failures": failures}
+
+            results["fan_out"] = summarize(await _bench_fan_out(hass, hub, args.rounds))
+        finally:
+            await hub.async_close()
+            await simulator.stop()
+            await hass.async_stop(force=True)
+    return results
+
+
+async def _bench_fan_out(
+    hass: HomeAssistant, hub: HaHeliothermModbusHub, rounds: int
+) -> list[float]:
+    """Time notifying every entity and writing its state."""
+    entities = []
+    for domain, entity_class, descriptions in ENTITY_TYPES:
+        for description in descriptions.values():
+            entity = entity_class("bench", hub, {}, description)
+            entity.hass = hass
+            entity.entity_id = f"{domain}.bench_{description.key}"
+            # Added without an entity platform on purpose.
+            entity._no_platform_reported = True
+            await entity.async_added_to_hass()
+            entities.append(entity)
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hub.async_update_listeners()
+        samples.append(time.perf_counter() - start)
+
+    for entity in entities:
+        await entity.async_will_remove_from_hass()
+        entity._call_on_remove_callbacks()
+    return samples
+
+
+def print_results(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]] | None = None,
+) -> None:
+    """Print the percentiles, with the change against a baseline."""
+    print(f"{'benchmark':<12}" + "".join(f"{name:>22}" for name in PERCENTILES))
+    for name, summary in results.items():
+        cells = []
+        for percentile in PERCENTILES:
+            cell = f"{summary[percentile]:.1f} us"
+            if baseline and name in baseline:
+                before = baseline[name][percentile]
+                cell += f" ({(summary[percentile] - before) / before * 100:+.0f}%)"
+            cells.append(f"{cell:>22}")
+        extra = f"  failures {summary['failures']}" if summary.get("failures") else ""
+        print(f"{name:<12}" + "".join(cells) + extra)
+
+
+def regressions(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    """Return the percentiles that got slower than threshold percent."""
+    slower = []
+    for name, summary in results.items():
+        if name not in baseline:
+            continue
+        for percentile in PERCENTILES:
+            before = baseline[name][percentile]
+            if summary[percentile] > before * (1 + threshold / 100):
+                slower.append(f"{name} {percentile}")
+    return slower
+
+
+def main() -> int:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=200, help="rounds per poll")
+    parser.add_argument("--rounds", type=int, default=2000, help="decode/fan out")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--loss", type=float, default=0.0, help="probability")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", type=Path, help="write the results as JSON")
+    parser.add_argument("--compare", type=Path, help="JSON of an earlier run")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    results = {"decode": summarize(bench_decode(args.rounds))}
+    results.update(asyncio.run(bench_hub(args)))
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_results(results, baseline)
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2))
+    if baseline:
+        slower = regressions(results, baseline, args.threshold)
+        if slower:
+            print(f"Slower than {args.threshold:.0f}%: {', '.join(slower)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
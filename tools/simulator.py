@@ -0,0 +1,369 @@
+"""Modbus TCP stand-in for a Heliotherm heat pump.
+
+Serves the documented register blocks (input 10-41 and 60-75, holding
+100-126) for one or more unit ids, accepts writes to the holding registers
+and can be made unreliable with latency, jitter, lost responses and dropped
+connections. Used to exercise polling, writes and reconnects offline:
+
+    python tools/simulator.py --port 5020 --latency 0.05 --jitter 0.02 \
+        --loss 0.01 --drop 0.005
+
+or in process:
+
+    simulator = HeatPumpSimulator(port=0, latency=0.05)
+    await simulator.start()
+    ...  # connect to 127.0.0.1:simulator.port
+    await simulator.stop()
+
+Only the standard library is needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Iterable
+import logging
+import random
+import struct
+
+_LOGGER = logging.getLogger(__name__)
+
+READ_HOLDING_REGISTERS = 0x03
+READ_INPUT_REGISTERS = 0x04
+WRITE_SINGLE_REGISTER = 0x06
+WRITE_MULTIPLE_REGISTERS = 0x10
+
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+
+MBAP_HEADER = struct.Struct(">HHHB")
+
+INPUT_BLOCKS = ((10, 32), (60, 16))
+HOLDING_BLOCKS = ((100, 27),)
+
+# Register values of a heat pump heating on a mild winter day.
+INPUT_DEFAULTS = {
+    10: 52,  # temp_aussen 5.2 °C
+    11: 478,  # temp_brauchwasser
+    12: 345,  # temp_vorlauf
+    13: 301,  # temp_ruecklauf
+    14: 330,  # temp_pufferspeicher
+    15: 41,  # temp_eq_eintritt
+    16: 12,  # temp_eq_austritt
+    17: 35,  # temp_sauggas
+    18: -38,  # temp_verdampfung
+    19: 362,  # temp_kodensation
+    20: 684,  # temp_heissgas
+    21: 61,  # bar_niederdruck
+    22: 215,  # bar_hochdruck
+    23: 1,  # on_off_heizkreispumpe
+    24: 1,  # on_off_pufferladepumpe
+    25: 1,  # on_off_verdichter
+    26: 0,  # on_off_stoerung
+    27: 0,  # vierwegeventil_luft
+    28: 184,  # wmz_durchfluss
+    29: 62,  # n_soll_verdichter
+    30: 38,  # cop
+    31: 478,  # temp_frischwasser
+    32: 1,  # on_off_evu_sperre
+    33: 55,  # temp_aussen_verzoegert
+    34: 340,  # hkr_solltemperatur
+    35: 320,  # mkr1_solltemperatur
+    36: 300,  # mkr2_solltemperatur
+    37: 1,  # on_off_eq_ventilator
+    38: 0,  # ww_vorrang
+    39: 0,  # kuehlen_umv_passiv
+    40: 235,  # expansionsventil
+    41: 20,  # verdichteranforderung
+}
+
+COUNTER_DEFAULTS = {
+    60: 18250,  # wmz_heizung
+    62: 4890,  # stromz_heizung
+    64: 3120,  # wmz_brauchwasser
+    66: 1010,  # stromz_brauchwasser
+    68: 5900,  # stromz_gesamt
+    70: 1450,  # stromz_leistung
+    72: 21370,  # wmz_gesamt
+    74: 52,  # wmz_leistung 5.2 kW, COP 3.6 at 1450 W
+}
+
+HOLDING_DEFAULTS = {
+    100: 1,  # betriebsart
+    101: 215,  # hkr_raum_soll
+    102: 300,  # rl_soll
+    103: 0,  # rl_soll aktiv
+    104: 180,  # rlt_kuehlen
+    105: 520,  # ww_bereitung max
+    106: 450,  # ww_bereitung min
+    107: 1,  # mkr1_betriebsart
+    112: 1,  # mkr2_betriebsart
+}
+
+
+def _blocks_contain(
+    blocks: Iterable[tuple[int, int]], address: int, count: int
+) -> bool:
+    return any(
+        start <= address and address + count <= start + size for start, size in blocks
+    )
+
+
+class HeatPumpRegisters:
+    """Register image of one simulated unit."""
+
+    def __init__(self) -> None:
+        """Fill the registers with the default values."""
+        self.input = dict.fromkeys(
+            (
+                address
+                for start, size in INPUT_BLOCKS
+                for address in range(start, start + size)
+            ),
+            0,
+        )
+        self.holding = dict.fromkeys(
+            (
+                address
+                for start, size in HOLDING_BLOCKS
+                for address in range(start, start + size)
+            ),
+            0,
+        )
+        for address, value in INPUT_DEFAULTS.items():
+            self.input[address] = value & 0xFFFF
+        for address, value in COUNTER_DEFAULTS.items():
+            self.set_counter(address, value)
+        self.holding.update(HOLDING_DEFAULTS)
+
+    def set_counter(self, address: int, value: int) -> None:
+        """Store a 32 bit counter, high word first."""
+        self.input[address] = (value >> 16) & 0xFFFF
+        self.input[address + 1] = value & 0xFFFF
+
+    def get_counter(self, address: int) -> int:
+        """Return a 32 bit counter."""
+        return (self.input[address] << 16) | self.input[address + 1]
+
+    def tick(self, rng: random.Random) -> None:
+        """Let temperatures drift and energy counters advance a little."""
+        for address in (10, 12, 13, 14, 15, 16):
+            value = struct.unpack(">h", struct.pack(">H", self.input[address]))[0]
+            self.input[address] = (value + rng.choice((-1, 0, 0, 1))) & 0xFFFF
+        if self.input[25]:
+            for address in (60, 62, 68, 72):
+                self.set_counter(address, self.get_counter(address) + 1)
+
+
+class HeatPumpSimulator:
+    """Asyncio Modbus TCP server answering like a Heliotherm gateway."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 5020,
+        unit_ids: Iterable[int] = (1,),
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        loss: float = 0.0,
+        drop: float = 0.0,
+        tick: float = 5.0,
+        seed: int | None = None,
+    ) -> None:
+        """Initialize the simulator, latency and jitter are in seconds.
+
+        loss is the probability that a response is silently discarded, drop
+        the probability that the connection is closed instead of answering.
+        """
+        self.host = host
+        self.port = port
+        self.units = {unit_id: HeatPumpRegisters() for unit_id in unit_ids}
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.drop = drop
+        self._tick = tick
+        self._rng = random.Random(seed)
+        self._server: asyncio.base_events.Server | None = None
+        self._ticker: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self._writers: set[asyncio.StreamWriter] = set()
+        self.requests = 0
+        self.lost = 0
+        self.dropped = 0
+
+    async def start(self) -> None:
+        """Start listening, port 0 picks a free port."""
+        self._server = await asyncio.start_server(
+            self._handle_client, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self._tick:
+            self._ticker = asyncio.create_task(self._run_ticker())
+        _LOGGER.info(
+            "Simulating units %s on %s:%s", list(self.units), self.host, self.port
+        )
+
+    async def stop(self) -> None:
+        """Stop the server and close all connections."""
+        if self._ticker is not None:
+            self._ticker.cancel()
+            self._ticker = None
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self) -> None:
+        """Run until cancelled."""
+        await self.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
+
+    async def _run_ticker(self) -> None:
+        while True:
+            await asyncio.sleep(self._tick)
+            for registers in self.units.values():
+                registers.tick(self._rng)
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        peer = writer.get_extra_info("peername")
+        _LOGGER.debug("Connection from %s", peer)
+        self._writers.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(MBAP_HEADER.size)
+                transaction_id, protocol_id, length, unit_id = MBAP_HEADER.unpack(
+                    header
+                )
+                pdu = await reader.readexactly(length - 1)
+                self.requests += 1
+
+                if self.drop and self._rng.random() < self.drop:
+                    self.dropped += 1
+                    _LOGGER.debug("Dropping connection from %s", peer)
+                    break
+
+                # The gateway answers one request at a time.
+                async with self._lock:
+                    delay = self.latency + self._rng.uniform(0, self.jitter)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    response = self._process(unit_id, pdu)
+
+                if response is None:
+                    continue
+                if self.loss and self._rng.random() < self.loss:
+                    self.lost += 1
+                    continue
+                writer.write(
+                    MBAP_HEADER.pack(
+                        transaction_id, protocol_id, len(response) + 1, unit_id
+                    )
+                    + response
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _process(self, unit_id: int, pdu: bytes) -> bytes | None:
+        """Return the response PDU, None if the unit does not answer."""
+        registers = self.units.get(unit_id)
+        if registers is None:
+            # A missing unit behind a gateway runs into the client timeout.
+            return None
+
+        function = pdu[0]
+        if function in (READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS):
+            if len(pdu) != 5:
+                return _exception(function, ILLEGAL_DATA_VALUE)
+            address, count = struct.unpack(">HH", pdu[1:5])
+            if not 1 <= count <= 125:
+                return _exception(function, ILLEGAL_DATA_VALUE)
+            if function == READ_HOLDING_REGISTERS:
+                blocks, image = HOLDING_BLOCKS, registers.holding
+            else:
+                blocks, image = INPUT_BLOCKS, registers.input
+            if not _blocks_contain(blocks, address, count):
+                return _exception(function, ILLEGAL_DATA_ADDRESS)
+            values = [image[address + offset] for offset in range(count)]
+            return struct.pack(f">BB{count}H", function, 2 * count, *values)
+
+        if function == WRITE_SINGLE_REGISTER:
+            if len(pdu) != 5:
+                return _exception(function, ILLEGAL_DATA_VALUE)
+            address, value = struct.unpack(">HH", pdu[1:5])
+            if not _blocks_contain(HOLDING_BLOCKS, address, 1):
+                return _exception(function, ILLEGAL_DATA_ADDRESS)
+            registers.holding[address] = value
+            return pdu
+
+        if function == WRITE_MULTIPLE_REGISTERS:
+            if len(pdu) < 6:
+                return _exception(function, ILLEGAL_DATA_VALUE)
+            address, count, byte_count = struct.unpack(">HHB", pdu[1:6])
+            if not 1 <= count <= 123 or byte_count != 2 * count:
+                return _exception(function, ILLEGAL_DATA_VALUE)
+            if len(pdu) != 6 + byte_count:
+                return _exception(function, ILLEGAL_DATA_VALUE)
+            if not _blocks_contain(HOLDING_BLOCKS, address, count):
+                return _exception(function, ILLEGAL_DATA_ADDRESS)
+            for offset, value in enumerate(struct.unpack(f">{count}H", pdu[6:])):
+                registers.holding[address + offset] = value
+            return struct.pack(">BHH", function, address, count)
+
+        return _exception(function, ILLEGAL_FUNCTION)
+
+
+def _exception(function: int, code: int) -> bytes:
+    return struct.pack(">BB", function | 0x80, code)
+
+
+def main() -> None:
+    """Run the simulator from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5020)
+    parser.add_argument(
+        "--unit", type=int, action="append", dest="units", help="unit id, repeatable"
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--loss", type=float, default=0.0, help="probability")
+    parser.add_argument("--drop", type=float, default=0.0, help="probability")
+    parser.add_argument("--tick", type=float, default=5.0, help="seconds")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    simulator = HeatPumpSimulator(
+        host=args.host,
+        port=args.port,
+        unit_ids=args.units or (1,),
+        latency=args.latency,
+        jitter=args.jitter,
+        loss=args.loss,
+        drop=args.drop,
+        tick=args.tick,
+        seed=args.seed,
+    )
+    try:
+        asyncio.run(simulator.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()